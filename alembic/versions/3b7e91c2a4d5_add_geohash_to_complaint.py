@@ -0,0 +1,44 @@
+"""Add geohash column to complaint table
+
+Revision ID: 3b7e91c2a4d5
+Revises: c4d19b27d01c
+Create Date: 2026-10-18 10:12:31.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+from src.complaints.geo import safe_encode
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e91c2a4d5'
+down_revision: Union[str, None] = 'c4d19b27d01c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('complaint', sa.Column('geohash', sqlmodel.sql.sqltypes.AutoString(length=12), nullable=True))
+    op.create_index(op.f('ix_complaint_geohash'), 'complaint', ['geohash'], unique=False)
+
+    # backfill existing rows
+    connection = op.get_bind()
+    rows = connection.execute(sa.text('SELECT id, latitude, longitude FROM complaint WHERE geohash IS NULL')).all()
+    updates = [
+        {'id': row.id, 'geohash': safe_encode(row.latitude, row.longitude)}
+        for row in rows
+    ]
+    updates = [update for update in updates if update['geohash'] is not None]
+    if updates:
+        connection.execute(sa.text('UPDATE complaint SET geohash = :geohash WHERE id = :id'), updates)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_complaint_geohash'), table_name='complaint')
+    op.drop_column('complaint', 'geohash')
@@ -0,0 +1,52 @@
+"""Create notification outbox table
+
+Revision ID: 5f2a8c13d9b7
+Revises: 9c41d7e0b2f8
+Create Date: 2026-10-18 14:02:51.306127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2a8c13d9b7'
+down_revision: Union[str, None] = '9c41d7e0b2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.Enum('EMAIL', 'WEBSOCKET', name='notificationchannel'), nullable=False),
+        sa.Column('recipient', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('subject', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'SENT', 'FAILED', name='outboxstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_notification_outbox_status_next_attempt_at',
+        'notification_outbox',
+        ['status', 'next_attempt_at'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notification_outbox_status_next_attempt_at', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
+    sa.Enum(name='notificationchannel').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='outboxstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,30 @@
+"""Add image variant columns to complaint and user tables
+
+Revision ID: 7a4e2b9c61d3
+Revises: 5f2a8c13d9b7
+Create Date: 2026-10-18 16:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e2b9c61d3'
+down_revision: Union[str, None] = '5f2a8c13d9b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('complaint', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('user', sa.Column('avatar_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('user', 'avatar_variants')
+    op.drop_column('complaint', 'image_variants')
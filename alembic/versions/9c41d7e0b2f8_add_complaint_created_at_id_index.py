@@ -0,0 +1,29 @@
+"""Add composite index on complaint created_at and id for cursor pagination
+
+Revision ID: 9c41d7e0b2f8
+Revises: 3b7e91c2a4d5
+Create Date: 2026-10-18 11:40:05.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c41d7e0b2f8'
+down_revision: Union[str, None] = '3b7e91c2a4d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_complaint_created_at_id', 'complaint', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_complaint_created_at_id', table_name='complaint')
@@ -0,0 +1,52 @@
+"""Create complaint_image table for multiple images per complaint
+
+Revision ID: b3d6f1a8e247
+Revises: 7a4e2b9c61d3
+Create Date: 2026-10-18 19:12:44.903615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d6f1a8e247'
+down_revision: Union[str, None] = '7a4e2b9c61d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'complaint_image',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('complaint_id', sa.Integer(), nullable=False),
+        sa.Column('url', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('variants', sa.JSON(), nullable=True),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['complaint_id'], ['complaint.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_complaint_image_complaint_id_position',
+        'complaint_image',
+        ['complaint_id', 'position'],
+        unique=False
+    )
+    # the image of every complaint becomes its first gallery image
+    op.execute(
+        "INSERT INTO complaint_image (complaint_id, url, variants, position, created_at) "
+        "SELECT id, image_url, image_variants, 0, CURRENT_TIMESTAMP FROM complaint "
+        "WHERE image_url IS NOT NULL AND image_url <> ''"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_complaint_image_complaint_id_position', table_name='complaint_image')
+    op.drop_table('complaint_image')
@@ -0,0 +1,50 @@
+"""Add indexes for complaint status, category and user filters and comment lookups
+
+Revision ID: c8e1f4a29d56
+Revises: b3d6f1a8e247
+Create Date: 2026-10-18 21:03:27.640118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e1f4a29d56'
+down_revision: Union[str, None] = 'b3d6f1a8e247'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY does not block writes while a large table is indexed, it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_complaint_status_created_at_id',
+            'complaint',
+            ['status', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_complaint_category_status_created_at_id',
+            'complaint',
+            ['category', 'status', 'created_at', 'id'],
+            unique=False,
+            postgresql_where=sa.text('category IS NOT NULL'),
+            postgresql_concurrently=True
+        )
+        op.create_index('ix_complaint_user_id', 'complaint', ['user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_comments_complaint_id', 'comments', ['complaint_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_comments_complaint_id', table_name='comments', postgresql_concurrently=True)
+        op.drop_index('ix_complaint_user_id', table_name='complaint', postgresql_concurrently=True)
+        op.drop_index('ix_complaint_category_status_created_at_id', table_name='complaint', postgresql_concurrently=True)
+        op.drop_index('ix_complaint_status_created_at_id', table_name='complaint', postgresql_concurrently=True)
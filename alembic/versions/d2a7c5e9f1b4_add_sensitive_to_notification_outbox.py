@@ -0,0 +1,31 @@
+"""Add sensitive flag to notification_outbox
+
+Revision ID: d2a7c5e9f1b4
+Revises: c8e1f4a29d56
+Create Date: 2026-10-18 21:04:17.318520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c5e9f1b4'
+down_revision: Union[str, None] = 'c8e1f4a29d56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'notification_outbox',
+        sa.Column('sensitive', sa.Boolean(), server_default=sa.false(), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notification_outbox', 'sensitive')
@@ -0,0 +1,99 @@
+"""
+Throughput of the request logging and timing middleware.
+
+"before" is the previous stack, two @app.middleware('http') functions (BaseHTTPMiddleware) that log every
+header, "after" is RequestLoggingMiddleware. Log records are formatted into an in-memory stream,
+so formatting cost is included:
+
+    python -m benchmarks.middleware --requests 5000 --concurrency 50
+
+Needs the same environment (.env) as the application, because src settings are loaded on import.
+"""
+import argparse
+import asyncio
+import io
+import logging
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.requests import Request
+
+from src.middlewares import RequestLoggingMiddleware
+
+
+def build_before() -> FastAPI:
+    app = FastAPI()
+    logger = logging.getLogger('fixkg.middlewares')
+
+    @app.middleware('http')
+    async def log_new_request_and_response(request: Request, call_next):
+        logger.info('REQUESTS - %s - %s - %s - %s', request.method, request.url, request.client.host, request.headers)
+        response = await call_next(request)
+        logger.info('RESPONSE - %d - %s', response.status_code, response.headers)
+        return response
+
+    @app.middleware('http')
+    async def add_process_time_to_requests(request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        response.headers['X-process-time'] = f'Process time: {time.perf_counter() - start:.5f}'
+        return response
+
+    return app
+
+
+def build_after(log_headers: bool) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, log_headers=log_headers)
+    return app
+
+
+def add_route(app: FastAPI) -> FastAPI:
+    @app.get('/ping')
+    async def ping():
+        return {'status': 'ok'}
+
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    """
+        :return: requests per second
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://bench') as client:
+
+        async def request():
+            async with semaphore:
+                response = await client.get('/ping', headers={'Authorization': 'Bearer token'})
+                assert 'x-process-time' in response.headers
+
+        await asyncio.gather(*[request() for _ in range(min(200, requests))])
+        start = time.perf_counter()
+        await asyncio.gather(*[request() for _ in range(requests)])
+        return requests / (time.perf_counter() - start)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('fixkg')
+    logger.handlers = [logging.StreamHandler(io.StringIO())]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    for name, app in (
+            ('before', build_before()),
+            ('after', build_after(log_headers=False)),
+            ('after + headers', build_after(log_headers=True))
+    ):
+        rps = await run(add_route(app), args.requests, args.concurrency)
+        print(f'{name:>16}: {rps:8.0f} req/s')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
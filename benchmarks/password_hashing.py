@@ -0,0 +1,90 @@
+"""
+Latency of an unrelated endpoint while logins are hammered.
+
+Compares bcrypt running inline on the event loop with the bounded PasswordHasher pool:
+
+    python -m benchmarks.password_hashing --logins 200 --concurrency 20
+
+Needs the same environment (.env) as the application, because src settings are loaded on import.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.auth import PasswordHasher, hash_password, verify_password
+
+
+def build_app(hasher: PasswordHasher | None, hashed: bytes) -> FastAPI:
+    app = FastAPI()
+
+    @app.post('/login')
+    async def login():
+        if hasher is None:
+            return verify_password(b'password', hashed)
+        return await hasher.run(verify_password, b'password', hashed)
+
+    @app.get('/ping')
+    async def ping():
+        return 'pong'
+
+    return app
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(hasher: PasswordHasher | None, logins: int, concurrency: int) -> list[float]:
+    app = build_app(hasher, hash_password(b'password').encode())
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://bench') as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login():
+            async with semaphore:
+                await client.post('/login')
+
+        async def ping(interval: float = 0.005):
+            # latency is counted from the time the ping was due, so a blocked loop shows up in the numbers
+            due = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get('/ping')
+                latencies.append((time.perf_counter() - due) * 1000)
+                due += interval
+
+        pinger = asyncio.create_task(ping())
+        await asyncio.gather(*[login() for _ in range(logins)])
+        done.set()
+        await pinger
+
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--pool-size', type=int, default=4)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(pool_size=args.pool_size, max_pending=args.logins)
+    for name, candidate in (('inline', None), ('pool', hasher)):
+        latencies = await run(candidate, args.logins, args.concurrency)
+        print(
+            f'{name:>6}: /ping samples={len(latencies)} '
+            f'p50={statistics.median(latencies):.1f}ms p99={percentile(latencies, 99):.1f}ms '
+            f'max={max(latencies):.1f}ms'
+        )
+    hasher.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+"""
+Per-request overhead of the service container.
+
+"before" rebuilds the previous eager container: a session per request and every repository and
+service constructed up front. "after" is the lazy src.core.Services. Both are measured on their own
+and behind a FastAPI route that only needs the token service:
+
+    python -m benchmarks.service_container --iterations 20000 --requests 2000
+
+No database is touched, sessions are created and closed without checking out a connection.
+Needs the same environment (.env) as the application, because src settings are loaded on import.
+"""
+import argparse
+import asyncio
+import time
+from typing import Annotated
+
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.auth import AuthService
+from src.comments import CommentRepositories
+from src.comments.services import CommentService
+from src.complaints import ComplaintService
+from src.complaints.repositories import ComplaintRepositories
+from src.core import Services, database_helper, redis_client, settings
+from src.core.cache import cache, user_cache
+from src.core.dependencies import get_token_service
+from src.core.hashing import password_hasher
+from src.core.outbox import outbox_worker
+from src.images import ImageService
+from src.notification import OutboxRepository
+from src.otp import OTPService
+from src.tokens import TokenService
+from src.users import UserService, UserRepositories
+
+
+class EagerServices:
+    def __init__(self, db: AsyncSession):
+        self.token_service = TokenService(redis_client)
+        self.outbox_repository = OutboxRepository(db, on_enqueue=outbox_worker.wake)
+        self.otp_service = OTPService(self.outbox_repository, redis_client)
+        self.image_service = ImageService()
+        self.user_repository = UserRepositories(db, user_cache=user_cache)
+        self.user_service = UserService(image_service=self.image_service, user_repo=self.user_repository)
+        self.complaint_repository = ComplaintRepositories(db)
+        self.complaint_service = ComplaintService(
+            self.complaint_repository,
+            self.user_service,
+            self.image_service,
+            cache=cache,
+            list_cache_ttl=settings.cache.complaint_list_ttl,
+            detail_cache_ttl=settings.cache.complaint_detail_ttl
+        )
+        self.comment_repository = CommentRepositories(db)
+        self.comment_service = CommentService(self.comment_repository, self.complaint_service, self.outbox_repository)
+        self.auth_service = AuthService(
+            user_service=self.user_service,
+            token_service=self.token_service,
+            otp_service=self.otp_service,
+            user_repo=self.user_repository,
+            password_hasher=password_hasher
+        )
+
+
+def eager_get_service(db: AsyncSession = Depends(database_helper.session_getter)) -> EagerServices:
+    return EagerServices(db)
+
+
+def eager_get_token_service(service: EagerServices = Depends(eager_get_service)) -> TokenService:
+    return service.token_service
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/before')
+    async def before(token_service: Annotated[TokenService, Depends(eager_get_token_service)]):
+        return 'ok'
+
+    @app.get('/after')
+    async def after(token_service: Annotated[TokenService, Depends(get_token_service)]):
+        return 'ok'
+
+    return app
+
+
+async def construct(iterations: int) -> dict[str, float]:
+    """
+        :return: microseconds per container, including session open and close
+    """
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        async with database_helper.session_factory() as session:
+            EagerServices(session).token_service
+    results['before'] = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        services = Services(database_helper.session_factory)
+        services.token_service
+        await services.close()
+    results['after'] = (time.perf_counter() - start) / iterations * 1e6
+
+    return results
+
+
+async def serve(requests: int) -> dict[str, float]:
+    """
+        :return: microseconds per request through FastAPI dependency resolution
+    """
+    results = {}
+    async with AsyncClient(transport=ASGITransport(app=build_app()), base_url='http://bench') as client:
+        for name in ('before', 'after'):
+            for _ in range(min(100, requests)):
+                await client.get(f'/{name}')
+
+            start = time.perf_counter()
+            for _ in range(requests):
+                await client.get(f'/{name}')
+            results[name] = (time.perf_counter() - start) / requests * 1e6
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    for title, results in (
+            ('container only', await construct(args.iterations)),
+            ('token-only route', await serve(args.requests))
+    ):
+        print(f'{title:>18}: before {results["before"]:8.1f} us  after {results["after"]:8.1f} us')
+
+    await database_helper.dispose()
+    password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
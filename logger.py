@@ -1,27 +1,108 @@
 # logger.py
+import atexit
+import json
 import logging
+import queue
+import random
 from logging import getLogger
+from logging.handlers import QueueHandler, QueueListener
 
-def register_logger():
-    logger = getLogger('fixkg')
-    logger.setLevel(logging.DEBUG)
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-    if not logger.handlers:
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+_listeners: dict[str, QueueListener] = {}
 
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.ERROR)
-        ch.setFormatter(formatter)
 
-        fh = logging.FileHandler('fixkg_log.log', mode='a', encoding='utf-8')
-        fh.setLevel(logging.DEBUG)
-        fh.setFormatter(formatter)
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
 
-        logger.addHandler(ch)
-        logger.addHandler(fh)
 
-        logger.propagate = False
+class SamplingFilter(logging.Filter):
+    """
+        Keep only a share of records below WARNING for the configured loggers and their children,
+        e.g. {'fixkg.db_exception_handler': 0.1} keeps every tenth debug/info line of that logger
+    """
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition('.')[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+def stop_logger(name: str = 'fixkg') -> None:
+    """
+        Flush queued records and stop the writer thread
+    """
+    listener = _listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def register_logger(
+        level: str | int = logging.DEBUG,
+        console_level: str | int = logging.ERROR,
+        filename: str = 'fixkg_log.log',
+        json_format: bool = False,
+        sample_rates: dict[str, float] | None = None,
+        name: str = 'fixkg'
+):
+    """
+        Records are put on a queue by the caller and written to console and file by a
+        QueueListener thread, so logging never blocks the event loop on disk writes.
+        Calling it again replaces the previous configuration
+    """
+    stop_logger(name)
+
+    logger = getLogger(name)
+    logger.setLevel(level)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+
+    ch = logging.StreamHandler()
+    ch.setLevel(console_level)
+    ch.setFormatter(formatter)
+
+    fh = logging.FileHandler(filename, mode='a', encoding='utf-8')
+    fh.setLevel(level)
+    fh.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    qh = QueueHandler(log_queue)
+    if sample_rates:
+        # sampled out records are dropped before the message is formatted
+        qh.addFilter(SamplingFilter(sample_rates))
+
+    listener = QueueListener(log_queue, ch, fh, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+
+    logger.addHandler(qh)
+    logger.propagate = False
+
+
+atexit.register(lambda: [stop_logger(name) for name in list(_listeners)])
 
 register_logger()
@@ -1,5 +1,5 @@
 from src.users.models import User
-from src.complaints.models import ComplaintStatus, Complaint
+from src.complaints.models import ComplaintStatus, Complaint, ComplaintImage
 from src.comments.models import Comment
 
 from .middlewares import register_middleware
\ No newline at end of file
@@ -1,4 +1,5 @@
 from .schemas import LoginUserOutput, VerifyEmailSchema
-from .exceptions import PasswordIsIncorrect
+from .exceptions import PasswordIsIncorrect, PasswordHashingOverloaded
 from .utils import hash_password, verify_password
+from .password_hasher import PasswordHasher
 from .services import AuthService
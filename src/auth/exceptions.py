@@ -1,4 +1,6 @@
-from src.common import AuthException
+from starlette import status
+
+from src.common import AuthException, BaseHTTPException
 
 
 class PasswordIsIncorrect(AuthException):
@@ -6,3 +8,6 @@ class PasswordIsIncorrect(AuthException):
         super().__init__(detail='Password is incorrect')
 
 
+class PasswordHashingOverloaded(BaseHTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Too many login attempts, try again later')
@@ -0,0 +1,43 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from .exceptions import PasswordHashingOverloaded
+
+logger = logging.getLogger('fixkg.password_hasher')
+
+T = TypeVar('T')
+
+
+class PasswordHasher:
+    """
+        Runs bcrypt hashing and verification in a bounded thread pool, bcrypt releases the GIL
+        so the event loop keeps serving other requests during a login burst.
+        At most pool_size hashes run at once, up to max_pending wait in the queue, the rest are rejected.
+    """
+    def __init__(self, pool_size: int = 4, max_pending: int = 64):
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='password-hasher')
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        if self._pending >= self.pool_size + self.max_pending:
+            logger.warning('Password hashing queue is full: %d pending', self._pending)
+            raise PasswordHashingOverloaded
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, *args))
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info('Password hasher pool shut down')
@@ -9,8 +9,10 @@ from src.common import ErrorResponse
 from src.core import get_auth_service
 from src.tokens.schemas import RefreshTokenRequest
 from src.users import UserRead, UserCreate
+from src.common import TimedRoute
 
 router = APIRouter(
+    route_class=TimedRoute,
     tags=['JWT Auth'],
     prefix='/auth',
 )
@@ -2,6 +2,7 @@ import logging
 from fastapi.security import OAuth2PasswordRequestForm
 
 from .utils import hash_password, verify_password
+from .password_hasher import PasswordHasher
 from .schemas import LoginUserOutput, VerifyEmailSchema
 from .exceptions import PasswordIsIncorrect
 
@@ -22,8 +23,10 @@ class AuthService:
             user_service: UserService,
             token_service: TokenService,
             otp_service: OTPService,
-            user_repo: UserRepositories
+            user_repo: UserRepositories,
+            password_hasher: PasswordHasher
     ):
+        self._password_hasher = password_hasher
         self._token_service = token_service
         self._user_service = user_service
         self._otp_service = otp_service
@@ -46,7 +49,7 @@ class AuthService:
 
         user = UserCreate(
             **user.model_dump(exclude={'password'}),
-            password=hash_password(user.password.encode())
+            password=await self._password_hasher.run(hash_password, user.password.encode())
         )
 
         created = await self._user_service.create_user(user)
@@ -70,9 +73,10 @@ class AuthService:
             logger.warning('User with username=%s is not verified', form_data.username)
             raise UserNotVerifyEmail
 
-        if not verify_password(
-                plain_pass=form_data.password.encode(),
-                hashed_password=exists_user.password.encode()
+        if not await self._password_hasher.run(
+                verify_password,
+                form_data.password.encode(),
+                exists_user.password.encode()
         ):
             logger.error('Incorrect password for username=%s', form_data.username)
             raise PasswordIsIncorrect
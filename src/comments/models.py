@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlmodel import SQLModel, Field, Relationship
 
 if TYPE_CHECKING:
@@ -10,7 +10,10 @@ if TYPE_CHECKING:
 
 class Comment(SQLModel, table=True):
     __tablename__ = 'comments'
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index('ix_comments_complaint_id', 'complaint_id'),
+        {"extend_existing": True}
+    )
 
     id: int | None = Field(primary_key=True, nullable=False, index=True)
     user_id: int = Field(sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False))
@@ -23,10 +23,10 @@ class CommentRepositories(BaseRepository):
     async def get_by_complaint_id(self, complaint_id: int) -> list[Comment]:
         logger.debug('Getting comments for complaint_id: %d', complaint_id)
         stmt = select(Comment).where(Comment.complaint_id == complaint_id)
-        comments = await self.db.scalars(stmt)
-        logger.info('Found %d comments for complaint_id: %d', len(list(comments)), complaint_id)
+        comments = list(await self.read_db.scalars(stmt))
+        logger.info('Found %d comments for complaint_id: %d', len(comments), complaint_id)
 
-        return list(comments)
+        return comments
 
     @db_exception_handler
     async def delete(self, comment: Comment) -> bool:
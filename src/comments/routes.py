@@ -7,8 +7,10 @@ from src.comments.services import CommentService
 from src.core import get_current_user
 from src.core.dependencies import get_comment_service
 from src.users import UserRead
+from src.common import TimedRoute
 
 router = APIRouter(
+    route_class=TimedRoute,
     tags=['Comment']
 )
 
@@ -1,12 +1,10 @@
 import logging
 from src.comments.models import Comment
 from src.comments.repositories import CommentRepositories
-from src.comments.schemas import CommentCreate
+from src.comments.schemas import CommentCreate, CommentRead
 from src.complaints import ComplaintService
 from .exceptions import CommentNotFound
-from src.notification import NotificationService
-from src.notification.websocket_notification import WebSocketNotification
-from src.websocket import manager
+from src.notification import OutboxRepository, NotificationChannel
 
 logger = logging.getLogger('fixkg.comment_service')
 
@@ -15,11 +13,11 @@ class CommentService:
         self,
         comment_repo: CommentRepositories,
         complaint_service: ComplaintService,
-        notification_service: NotificationService
+        outbox: OutboxRepository
     ):
         self._comment_repo = comment_repo
         self._complaint_service = complaint_service
-        self._notification_service = notification_service
+        self._outbox = outbox
 
     async def create_comment(self, comment_data: CommentCreate, user_id: int) -> Comment:
         logger.debug('Creating comment for user_id=%d, complaint_id=%d', user_id, comment_data.complaint_id)
@@ -30,20 +28,26 @@ class CommentService:
             **comment_data.model_dump()
         )
 
-        self._notification_service.set_strategy(WebSocketNotification(connection_manager=manager))
-        await self._notification_service.send_notification(
+        # committed together with the comment, delivered by the outbox worker
+        self._outbox.add(
+            NotificationChannel.WEBSOCKET,
             recipient=str(complaint.user_id),
             subject=f'New comment {complaint.complaint_text}',
             message=comment.content
         )
 
+        created = await self._comment_repo.create(comment)
+        self._outbox.wake()
+        await self._complaint_service.invalidate_cache(comment_data.complaint_id, include_lists=False)
+
         logger.info('Comment created for user_id=%d, complaint_id=%d', user_id, comment_data.complaint_id)
-        return await self._comment_repo.create(comment)
+        return created
 
-    async def get_comments_by_complaint(self, complaint_id: int) -> list[Comment]:
+    async def get_comments_by_complaint(self, complaint_id: int) -> list[CommentRead]:
         logger.debug('Fetching comments for complaint_id=%d', complaint_id)
-        await self._complaint_service.get_by_id(complaint_id)
-        comments = await self._comment_repo.get_by_complaint_id(complaint_id)
+        # the complaint details already carry its comments, no second query
+        complaint = await self._complaint_service.get_by_id(complaint_id)
+        comments = complaint.comments
         logger.info('Found %d comments for complaint_id=%d', len(comments), complaint_id)
 
         return comments
@@ -61,6 +65,7 @@ class CommentService:
             raise PermissionError("You do not have permission to delete this comment.")
 
         await self._comment_repo.delete(comment)
+        await self._complaint_service.invalidate_cache(comment.complaint_id, include_lists=False)
         logger.info('Comment with comment_id=%d deleted by user_id=%d', comment_id, user_id)
 
         return True
@@ -1,3 +1,8 @@
 from .exceptions import DatabaseError, ErrorResponse, BaseHTTPException, NotFoundException, AuthException
 from .base_repository import BaseRepository
-from .db_decorators import db_exception_handler
\ No newline at end of file
+from .db_decorators import db_exception_handler
+from .ttl_cache import TTLCache
+from .pagination import encode_cursor, decode_cursor
+from .redis_cache import RedisCache, CacheStats
+from .metrics import metrics, MetricsRegistry, Counter, Gauge, Histogram
+from .server_timing import TimedRoute
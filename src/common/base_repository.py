@@ -1,11 +1,22 @@
+from typing import Callable
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .db_decorators import db_exception_handler
 
 
 class BaseRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, read_db: Callable[[], AsyncSession] | None = None):
         self.db = db
+        self._read_db = read_db
+
+    @property
+    def read_db(self) -> AsyncSession:
+        """
+            Session for reads that tolerate replication lag. Objects loaded with it must not be
+            modified, methods that change data read through self.db
+        """
+        return self._read_db() if self._read_db is not None else self.db
 
     @db_exception_handler
     async def update_instance(self, instance, update_data):
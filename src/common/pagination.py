@@ -0,0 +1,20 @@
+import base64
+import datetime
+import json
+
+
+def encode_cursor(created_at: datetime.date, item_id: int) -> str:
+    """
+        :return: opaque cursor pointing right after the (created_at, id) position
+    """
+    payload = json.dumps({'c': created_at.isoformat(), 'i': item_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.date, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.date.fromisoformat(payload['c']), int(payload['i'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Invalid cursor')
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+logger = logging.getLogger('fixkg.cache')
+
+T = TypeVar('T')
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+
+class RedisCache:
+    """
+        Read-through cache on top of RedisClient.
+        Every tag has a version that is part of the keys stored under it; invalidating a tag
+        replaces its version, so those keys are never read again and simply expire. A load that
+        started before the invalidation stores under the old version and cannot bring stale data back.
+        Concurrent misses for one key run the loader once: waiters in the same worker share
+        the in-flight load, other workers wait for the lock holder to fill the key.
+        If Redis is unavailable the loader is called directly.
+    """
+    def __init__(
+            self,
+            client,
+            prefix: str = 'cache',
+            default_ttl: int = 60,
+            lock_timeout: float = 5.0,
+            poll_interval: float = 0.05,
+            tag_ttl: int = 3600
+    ):
+        self._client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.tag_ttl = tag_ttl
+        self.stats = CacheStats()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}:{key}'
+
+    def _tag_key(self, tag: str) -> str:
+        return f'{self.prefix}:tag:{tag}'
+
+    @staticmethod
+    def _new_version() -> str:
+        return secrets.token_hex(4)
+
+    async def _versioned_key(self, key: str, tags: list[str]) -> str:
+        """
+            :return: the key with the current version of every tag, a missing or expired
+                version is created, nothing was stored under it yet
+        """
+        full_key = self._key(key)
+        if not tags:
+            return full_key
+
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        versions = await self._client.mget(*tag_keys)
+        for index, version in enumerate(versions):
+            if version is None:
+                version = self._new_version()
+                if not await self._client.set(tag_keys[index], version, ex=self.tag_ttl, nx=True):
+                    # another worker created it first
+                    version = await self._client.get(tag_keys[index])
+                versions[index] = version
+        return f'{full_key}@{":".join(map(str, versions))}'
+
+    async def _safe(self, method: Callable[..., Awaitable[Any]], *args, fallback: Any = None, **kwargs) -> Any:
+        try:
+            return await method(*args, **kwargs)
+        except (RedisError, RuntimeError, OSError) as e:
+            self.stats.errors += 1
+            logger.warning('Cache operation %s failed: %s', method.__name__, e)
+            return fallback
+
+    async def get_or_load(
+            self,
+            key: str,
+            loader: Callable[[], Awaitable[T]],
+            adapter: TypeAdapter,
+            tags: Iterable[str] = (),
+            ttl: int | None = None
+    ) -> T:
+        tags = sorted(set(tags))
+        full_key = await self._safe(self._versioned_key, key, tags)
+        if full_key is None:
+            # without tag versions a stored value could not be invalidated, skip the cache
+            self.stats.misses += 1
+            return await loader()
+
+        cached = await self._safe(self._client.get, full_key)
+        if cached is not None:
+            self.stats.hits += 1
+            logger.debug('Cache hit for key=%s', full_key)
+            return adapter.validate_json(cached)
+
+        inflight = self._inflight.get(full_key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            logger.debug('Joining in-flight load for key=%s', full_key)
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await self._load(full_key, loader, adapter, tags, ttl or self.default_ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # waiters re-raise it, mark as retrieved to keep asyncio from logging it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(full_key, None)
+
+    async def _load(
+            self,
+            full_key: str,
+            loader: Callable[[], Awaitable[T]],
+            adapter: TypeAdapter,
+            tags: Iterable[str],
+            ttl: int
+    ) -> T:
+        lock_key = f'{full_key}:lock'
+        # without Redis there is nobody to wait for, act as the lock holder
+        locked = await self._safe(
+            self._client.set, lock_key, '1', ex=max(1, int(self.lock_timeout)), nx=True, fallback=True
+        )
+
+        if not locked:
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                cached = await self._safe(self._client.get, full_key)
+                if cached is not None:
+                    self.stats.hits += 1
+                    return adapter.validate_json(cached)
+            logger.warning('Timed out waiting for cache lock on key=%s', full_key)
+
+        try:
+            self.stats.misses += 1
+            logger.debug('Cache miss for key=%s', full_key)
+            value = await loader()
+            await self._safe(self._store, full_key, adapter.dump_json(value), tags, ttl)
+            return value
+        finally:
+            if locked:
+                await self._safe(self._client.delete, lock_key)
+
+    async def _store(self, full_key: str, payload: bytes, tags: Iterable[str], ttl: int) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        pipe.set(full_key, payload, ex=ttl)
+        for tag in tags:
+            # an expired version only costs a miss, keep it for as long as the key lives
+            pipe.expire(self._tag_key(tag), max(ttl, self.tag_ttl))
+        await pipe.execute()
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        await self._safe(self._invalidate_tags, tags)
+
+    async def _invalidate_tags(self, tags: Iterable[str]) -> None:
+        pipe = self._client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.set(self._tag_key(tag), self._new_version(), ex=self.tag_ttl)
+        await pipe.execute()
+        logger.debug('Cache invalidated for tags=%s', tags)
+
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_current: ContextVar['RequestTimings | None'] = ContextVar('server_timing', default=None)
+
+
+class RequestTimings:
+    """
+        Time spent per phase of one request, emitted as the Server-Timing header
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: dict[str, list[float]] = {}
+        self.endpoint_finished: float | None = None
+
+    def add(self, phase: str, duration: float) -> None:
+        entry = self.phases.setdefault(phase, [0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+
+    def header(self, response_started: float) -> str:
+        """
+            :return: value of the Server-Timing header, durations in milliseconds
+        """
+        parts = []
+        for phase, (count, duration) in self.phases.items():
+            parts.append(f'{phase};dur={duration * 1000:.2f};desc="{int(count)}"')
+        if self.endpoint_finished is not None:
+            parts.append(f'serialize;dur={(response_started - self.endpoint_finished) * 1000:.2f}')
+        parts.append(f'total;dur={(response_started - self.started) * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+def record(phase: str, duration: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, duration)
+
+
+# the start time lives on the execution context of the statement: a statement that raises never
+# reaches after_cursor_execute, a start kept on the pooled connection would pair with the next one
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context.server_timing_start = time.perf_counter()
+
+
+def _record_statement(context) -> None:
+    start = getattr(context, 'server_timing_start', None)
+    if start is not None:
+        record('db', time.perf_counter() - start)
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_statement(context)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    _record_statement(exception_context.execution_context)
+
+
+class TimedRoute(APIRoute):
+    """
+        Records the endpoint function duration, what follows until the response starts is
+        response model validation and rendering, reported as the serialize phase
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        call = self.dependant.call
+
+        if asyncio.iscoroutinefunction(call):
+            @wraps(call)
+            async def timed(*call_args, **call_kwargs):
+                start = time.perf_counter()
+                try:
+                    return await call(*call_args, **call_kwargs)
+                finally:
+                    _finish_endpoint(start)
+        else:
+            @wraps(call)
+            def timed(*call_args, **call_kwargs):
+                start = time.perf_counter()
+                try:
+                    return call(*call_args, **call_kwargs)
+                finally:
+                    _finish_endpoint(start)
+
+        self.dependant.call = timed
+
+
+def _finish_endpoint(start: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.endpoint_finished = time.perf_counter()
+        timings.add('endpoint', timings.endpoint_finished - start)
@@ -1,5 +1,6 @@
 from src.complaints.complaint_status import ComplaintStatus
-from src.complaints.models import Complaint
-from .schemas import ComplaintUpdate, ComplaintCreate, ComplaintRead,ComplaintBase, ComplaintQueryModel, ComplaintReadDetailsSchemas
-from src.complaints.exceptions import ComplaintWithIdNotFound, AccessDenied
-from src.complaints.complaint_services import ComplaintService
\ No newline at end of file
+from src.complaints.models import Complaint, ComplaintImage
+from .schemas import ComplaintUpdate, ComplaintCreate, ComplaintRead,ComplaintBase, ComplaintQueryModel, ComplaintReadDetailsSchemas, ComplaintImageRead, ComplaintClusterQueryModel, ComplaintCluster, ComplaintPage
+from src.complaints.exceptions import ComplaintWithIdNotFound, AccessDenied, InvalidTileCoordinates
+from src.complaints.complaint_services import ComplaintService
+from src.complaints.spatial_cache import SpatialCacheInvalidator
@@ -0,0 +1,84 @@
+import logging
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from src.common import TTLCache
+from . import geo
+from .complaint_status import ComplaintStatus
+from .schemas import ComplaintCluster
+
+logger = logging.getLogger('fixkg.complaint_clustering')
+
+MAX_CLUSTERS = 4096
+MAX_CLUSTER_TILES = 64
+
+# key: (cluster precision, tile geohash, category)
+cluster_cache = TTLCache(maxsize=4096, ttl=300)
+
+
+def cluster_precision(bbox: geo.BoundingBox, zoom: int) -> int:
+    """
+        Pick geohash precision so a cluster cell is about a quarter of a web map tile at this zoom,
+        but never let the viewport split into more than MAX_CLUSTERS cells
+    """
+    precision = min(geo.GEOHASH_PRECISION, max(1, round((zoom + 2) * 2 / 5)))
+    while precision > 1 and geo.estimate_cells(bbox, precision) > MAX_CLUSTERS:
+        precision -= 1
+    return precision
+
+
+def tile_precision(bbox: geo.BoundingBox, precision: int) -> int:
+    """
+        Tiles are the cache unit, coarser than the clusters, so panning only computes newly visible tiles
+    """
+    tile = max(1, precision - 2)
+    while tile > 1 and geo.estimate_cells(bbox, tile) > MAX_CLUSTER_TILES:
+        tile -= 1
+    return tile
+
+
+def cache_key(precision: int, tile: str, category: Optional[str]) -> tuple:
+    return precision, tile, category
+
+
+def build_clusters(rows: Iterable, tile_length: int) -> dict[str, list[ComplaintCluster]]:
+    """
+        :param: rows: (cell, status, count, sum_latitude, sum_longitude) grouped by cell and status
+        :return: clusters grouped by the tile they belong to
+    """
+    counts: dict[str, int] = defaultdict(int)
+    lat_sums: dict[str, float] = defaultdict(float)
+    lon_sums: dict[str, float] = defaultdict(float)
+    statuses: dict[str, dict[ComplaintStatus, int]] = defaultdict(dict)
+
+    for cell, status, count, sum_latitude, sum_longitude in rows:
+        counts[cell] += count
+        lat_sums[cell] += sum_latitude
+        lon_sums[cell] += sum_longitude
+        statuses[cell][ComplaintStatus(status)] = count
+
+    clusters: dict[str, list[ComplaintCluster]] = defaultdict(list)
+    for cell, count in counts.items():
+        clusters[cell[:tile_length]].append(ComplaintCluster(
+            geohash=cell,
+            count=count,
+            latitude=lat_sums[cell] / count,
+            longitude=lon_sums[cell] / count,
+            statuses=statuses[cell]
+        ))
+    return clusters
+
+
+def invalidate_clusters(geohash: Optional[str], category: Optional[str]) -> None:
+    """
+        Drop every cached tile that contains the point, on all precisions
+    """
+    if not geohash:
+        return
+
+    for precision in range(1, geo.GEOHASH_PRECISION + 1):
+        for tile_length in range(1, precision + 1):
+            tile = geohash[:tile_length]
+            cluster_cache.delete(cache_key(precision, tile, None))
+            cluster_cache.delete(cache_key(precision, tile, category))
+    logger.debug('Cluster cache invalidated for geohash=%s', geohash)
@@ -1,14 +1,18 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Query, UploadFile
+from starlette.responses import Response
 
 from src import ComplaintStatus
-from src.complaints import ComplaintService, ComplaintUpdate, ComplaintCreate, ComplaintQueryModel
+from src.complaints import ComplaintService, ComplaintUpdate, ComplaintCreate, ComplaintQueryModel, ComplaintClusterQueryModel, ComplaintCluster, ComplaintImageRead
 from src.core import get_current_user
 from src.core.dependencies import get_complaint_service
 from src.users import UserRead
+from src.images import DirectUploadRequest, DirectUpload, DirectUploadComplete
+from src.common import TimedRoute
 
 router = APIRouter(
+    route_class=TimedRoute,
     tags=['Complaints'],
     prefix='/complaints',
     dependencies=[Depends(get_current_user)]
@@ -21,18 +25,58 @@ CURRENT_USER_DEP = Annotated[UserRead, Depends(get_current_user)]
 @router.get('/')
 async def get_all_complaints_route(
         complaint_service: COMPLAINT_SERVICE_DEP,
-        query: Annotated[ComplaintQueryModel, Query()]
+        query: Annotated[ComplaintQueryModel, Query()],
+        response: Response
 ):
-    return await complaint_service.get_all(query_params=query)
+    page = await complaint_service.get_page(query_params=query)
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    return page.items
 
 @router.get('/statuses')
 async def get_complaint_statuses():
     return [status.value for status in ComplaintStatus]
 
+@router.get('/clusters', response_model=list[ComplaintCluster])
+async def get_complaint_clusters_route(
+        complaint_service: COMPLAINT_SERVICE_DEP,
+        query: Annotated[ComplaintClusterQueryModel, Query()]
+):
+    return await complaint_service.get_clusters(query_params=query)
+
+@router.get('/tiles/{z}/{x}/{y}.mvt', response_class=Response)
+async def get_complaint_vector_tile_route(
+        z: int,
+        x: int,
+        y: int,
+        complaint_service: COMPLAINT_SERVICE_DEP
+):
+    tile = await complaint_service.get_vector_tile(z, x, y)
+    return Response(content=tile, media_type='application/vnd.mapbox-vector-tile')
+
 @router.post('/{complaint_id}/upload_images', dependencies=[Depends(get_current_user)])
 async def upload_complaint_image(complaint_id: int, file: UploadFile, complaint_service: COMPLAINT_SERVICE_DEP):
     return await complaint_service.upload_complaint_image(file, complaint_id)
 
+@router.post('/{complaint_id}/images', response_model=list[ComplaintImageRead])
+async def upload_complaint_images(complaint_id: int, files: list[UploadFile], complaint_service: COMPLAINT_SERVICE_DEP):
+    """
+        Adds several images to the complaint at once, the first one also becomes the complaint image if it has none
+    """
+    return await complaint_service.upload_complaint_images(files, complaint_id)
+
+@router.post('/{complaint_id}/image_upload_url', response_model=DirectUpload)
+async def request_complaint_image_upload(complaint_id: int, upload: DirectUploadRequest, complaint_service: COMPLAINT_SERVICE_DEP):
+    """
+        Presigned request to upload the image straight to the S3 storage, then call image_upload_complete.
+        url is null when the same image is already stored
+    """
+    return await complaint_service.request_image_upload(complaint_id, upload)
+
+@router.post('/{complaint_id}/image_upload_complete')
+async def complete_complaint_image_upload(complaint_id: int, upload: DirectUploadComplete, complaint_service: COMPLAINT_SERVICE_DEP):
+    return await complaint_service.complete_image_upload(complaint_id, upload.key)
+
 @router.post('/')
 async def create_complaints(complaint_service: COMPLAINT_SERVICE_DEP, complaint:ComplaintCreate, current_user: CURRENT_USER_DEP):
     return await complaint_service.create_complaint(
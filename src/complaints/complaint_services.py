@@ -1,24 +1,72 @@
+import hashlib
+import json
 import logging
 from fastapi import UploadFile
+from pydantic import TypeAdapter
 
-from .exceptions import ComplaintWithIdNotFound, AccessDenied
-from .schemas import ComplaintCreate, ComplaintRead, ComplaintUpdate, ComplaintQueryModel, ComplaintReadDetailsSchemas
+from .exceptions import ComplaintWithIdNotFound, AccessDenied, InvalidTileCoordinates
+from . import clustering, geo, spatial_cache, vector_tiles
+from .schemas import ComplaintCreate, ComplaintRead, ComplaintUpdate, ComplaintQueryModel, ComplaintReadDetailsSchemas, ComplaintImageRead, ComplaintClusterQueryModel, ComplaintCluster, ComplaintPage
 from src.complaints import Complaint
 from src.complaints.repositories import ComplaintRepositories
+from src.complaints.spatial_cache import SpatialCacheInvalidator
 from src.comments.schemas import CommentRead
+from src.common import encode_cursor, RedisCache
 from src.users import UserService
-from src.images import ImageService
+from src.images import ImageService, StoredImage, DirectUploadRequest, DirectUpload
 
 
 logger = logging.getLogger('fixkg.complaint_service')
 
+LIST_CACHE_TAG = 'complaints:list'
+_COMPLAINT_LIST_ADAPTER = TypeAdapter(list[ComplaintRead])
+_COMPLAINT_DETAILS_ADAPTER = TypeAdapter(ComplaintReadDetailsSchemas)
+
 class ComplaintService:
-    def __init__(self, complaint_repo: ComplaintRepositories, user_service: UserService, image_service: ImageService):
+    def __init__(
+            self,
+            complaint_repo: ComplaintRepositories,
+            user_service: UserService,
+            image_service: ImageService,
+            cache: RedisCache | None = None,
+            list_cache_ttl: int = 30,
+            detail_cache_ttl: int = 60,
+            spatial_invalidator: SpatialCacheInvalidator | None = None
+    ):
         self._complaint_repo = complaint_repo
         self._user_service = user_service
         self._image_service = image_service
+        self._cache = cache
+        self._list_cache_ttl = list_cache_ttl
+        self._detail_cache_ttl = detail_cache_ttl
+        self._spatial_invalidator = spatial_invalidator
         logger.info('ComplaintService initialized')
 
+    @staticmethod
+    def _detail_cache_tag(complaint_id: int) -> str:
+        return f'complaint:{complaint_id}'
+
+    @staticmethod
+    def _list_cache_key(query_params: ComplaintQueryModel) -> str:
+        normalized = json.dumps(query_params.model_dump(mode='json'), sort_keys=True)
+        return f'complaints:list:{hashlib.sha1(normalized.encode()).hexdigest()}'
+
+    async def invalidate_cache(self, complaint_id: int | None = None, include_lists: bool = True) -> None:
+        if self._cache is None:
+            return
+
+        tags = [LIST_CACHE_TAG] if include_lists else []
+        if complaint_id is not None:
+            tags.append(self._detail_cache_tag(complaint_id))
+
+        logger.debug('Invalidating complaint cache tags: %s', tags)
+        await self._cache.invalidate_tags(*tags)
+
+    async def _invalidate_spatial_caches(self, complaint: Complaint) -> None:
+        # the repository already dropped the entries of this worker, tell the other workers
+        if self._spatial_invalidator is not None:
+            await self._spatial_invalidator.invalidate(complaint)
+
     @staticmethod
     def _ensure_user_access(complaint_user_id: int, user_id: int) -> None:
         logger.debug('Checking access for user_id=%d to complaint_user_id=%d', user_id, complaint_user_id)
@@ -36,18 +84,112 @@ class ComplaintService:
         )
         created = await self._complaint_repo.create(complaint_in_db)
         logger.info('Complaint created successfully for user_id=%d', user_id)
+        await self.invalidate_cache()
+        await self._invalidate_spatial_caches(created)
 
         return ComplaintRead(**created.model_dump())
 
     async def get_all(self, query_params: ComplaintQueryModel) -> list[ComplaintRead]:
         logger.debug('Fetching all complaints with query params: %s', query_params)
+        if self._cache is None:
+            return await self._load_all(query_params)
+
+        return await self._cache.get_or_load(
+            key=self._list_cache_key(query_params),
+            loader=lambda: self._load_all(query_params),
+            adapter=_COMPLAINT_LIST_ADAPTER,
+            tags=[LIST_CACHE_TAG],
+            ttl=self._list_cache_ttl
+        )
+
+    async def _load_all(self, query_params: ComplaintQueryModel) -> list[ComplaintRead]:
         complaints = await self._complaint_repo.get_all(query_params)
         logger.info('Fetched %d complaints', len(complaints))
 
         return [ComplaintRead(**complaint.model_dump()) for complaint in complaints]
 
+    async def get_page(self, query_params: ComplaintQueryModel) -> ComplaintPage:
+        complaints = await self.get_all(query_params)
+
+        next_cursor = None
+        if complaints and len(complaints) == query_params.limit:
+            last = complaints[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return ComplaintPage(items=complaints, next_cursor=next_cursor)
+
+    async def get_clusters(self, query_params: ComplaintClusterQueryModel) -> list[ComplaintCluster]:
+        logger.debug('Fetching complaint clusters with query params: %s', query_params)
+        bbox = query_params.get_bounding_box()
+        precision = clustering.cluster_precision(bbox, query_params.zoom)
+        tile_length = clustering.tile_precision(bbox, precision)
+        tiles = geo.cells_at_precision(bbox, tile_length)
+
+        clusters_by_tile: dict[str, list[ComplaintCluster]] = {}
+        missing_tiles = []
+        for tile in tiles:
+            cached = clustering.cluster_cache.get(clustering.cache_key(precision, tile, query_params.category))
+            if cached is None:
+                missing_tiles.append(tile)
+            else:
+                clusters_by_tile[tile] = cached
+
+        if missing_tiles:
+            generation = spatial_cache.generation()
+            rows = await self._complaint_repo.get_cluster_rows(missing_tiles, precision, query_params.category)
+            computed = clustering.build_clusters(rows, tile_length)
+            # a complaint written during the query may be missing from the rows, serve them but do not cache them
+            cacheable = spatial_cache.generation() == generation
+            for tile in missing_tiles:
+                clusters_by_tile[tile] = computed.get(tile, [])
+                if cacheable:
+                    clustering.cluster_cache.set(
+                        clustering.cache_key(precision, tile, query_params.category),
+                        clusters_by_tile[tile]
+                    )
+
+        logger.info('Clusters for %d tiles, %d computed', len(tiles), len(missing_tiles))
+        return [
+            cluster
+            for tile in tiles
+            for cluster in clusters_by_tile[tile]
+            if bbox.contains(cluster.latitude, cluster.longitude)
+        ]
+
+    async def get_vector_tile(self, z: int, x: int, y: int) -> bytes:
+        logger.debug('Fetching vector tile z=%d x=%d y=%d', z, x, y)
+        if not vector_tiles.is_valid_tile(z, x, y):
+            logger.error('Invalid tile coordinates z=%d x=%d y=%d', z, x, y)
+            raise InvalidTileCoordinates(z, x, y)
+
+        tile = vector_tiles.tile_cache.get((z, x, y))
+        if tile is not None:
+            logger.debug('Vector tile z=%d x=%d y=%d served from cache', z, x, y)
+            return tile
+
+        generation = spatial_cache.generation()
+        points = await self._complaint_repo.get_tile_points(vector_tiles.tile_bounds(z, x, y))
+        tile = vector_tiles.encode_tile(points, z, x, y)
+        if spatial_cache.generation() == generation:
+            vector_tiles.tile_cache.set((z, x, y), tile)
+        logger.info('Vector tile z=%d x=%d y=%d encoded with %d points', z, x, y, len(points))
+
+        return tile
+
     async def get_by_id(self, complaint_id: int) -> ComplaintReadDetailsSchemas:
         logger.debug('Fetching complaint by id=%d', complaint_id)
+        if self._cache is None:
+            return await self._load_by_id(complaint_id)
+
+        return await self._cache.get_or_load(
+            key=f'complaints:detail:{complaint_id}',
+            loader=lambda: self._load_by_id(complaint_id),
+            adapter=_COMPLAINT_DETAILS_ADAPTER,
+            tags=[self._detail_cache_tag(complaint_id)],
+            ttl=self._detail_cache_ttl
+        )
+
+    async def _load_by_id(self, complaint_id: int) -> ComplaintReadDetailsSchemas:
         complaint = await self._complaint_repo.get_by_id_with_comments(complaint_id)
 
         if not complaint:
@@ -57,7 +199,8 @@ class ComplaintService:
         logger.info('Complaint with id=%d found', complaint_id)
         return ComplaintReadDetailsSchemas(
             **complaint.model_dump(),
-            comments=[CommentRead(**c.model_dump()) for c in complaint.comments]
+            comments=[CommentRead(**c.model_dump()) for c in complaint.comments],
+            images=[ComplaintImageRead(**image.model_dump()) for image in complaint.images]
         )
 
     async def update_complaint(self, complaint_id: int, user_id: int, new_data: ComplaintUpdate) -> ComplaintRead:
@@ -76,6 +219,8 @@ class ComplaintService:
             new_data=new_data,
         )
         logger.info('Complaint with id=%d updated successfully', complaint_id)
+        await self.invalidate_cache(complaint_id)
+        await self._invalidate_spatial_caches(updated)
         return ComplaintRead(**updated.model_dump())
 
     async def delete_by_id(self, complaint_id: int, user_id: int) -> None:
@@ -91,6 +236,8 @@ class ComplaintService:
 
         await self._complaint_repo.delete(complaint)
         logger.info('Complaint with id=%d deleted successfully', complaint_id)
+        await self.invalidate_cache(complaint_id)
+        await self._invalidate_spatial_caches(complaint)
 
     async def get_complaints_by_user_id(self, user_id: int) -> list[ComplaintRead]:
         logger.debug('Fetching complaints for user_id=%d', user_id)
@@ -107,13 +254,50 @@ class ComplaintService:
 
         await self.get_by_id(complaint_id)
 
-        image_url = await self._image_service.save_complaint_image(file, complaint_id)
+        image = await self._image_service.save_complaint_image(file, complaint_id)
         logger.info('Image uploaded successfully for complaint_id=%d', complaint_id)
 
+        return await self._attach_image(complaint_id, image)
+
+    async def upload_complaint_images(self, files: list[UploadFile], complaint_id: int) -> list[ComplaintImageRead]:
+        logger.debug('Uploading %d images for complaint_id=%d', len(files), complaint_id)
+
+        await self.get_by_id(complaint_id)
+
+        images = await self._image_service.save_complaint_images(files, complaint_id)
+        created = await self._complaint_repo.add_images(
+            complaint_id=complaint_id,
+            images=[(image.url, image.variants) for image in images]
+        )
+        logger.info('%d images uploaded successfully for complaint_id=%d', len(created), complaint_id)
+        await self.invalidate_cache(complaint_id)
+
+        return [ComplaintImageRead(**image.model_dump()) for image in created]
+
+    async def request_image_upload(self, complaint_id: int, upload: DirectUploadRequest) -> DirectUpload:
+        logger.debug('Presigning direct image upload for complaint_id=%d', complaint_id)
+
+        await self.get_by_id(complaint_id)
+
+        return await self._image_service.presign_complaint_upload(upload)
+
+    async def complete_image_upload(self, complaint_id: int, key: str) -> ComplaintRead:
+        logger.debug('Completing direct image upload %s for complaint_id=%d', key, complaint_id)
+
+        await self.get_by_id(complaint_id)
+
+        image = await self._image_service.complete_complaint_upload(key)
+        logger.info('Direct image upload completed for complaint_id=%d', complaint_id)
+
+        return await self._attach_image(complaint_id, image)
+
+    async def _attach_image(self, complaint_id: int, image: StoredImage) -> ComplaintRead:
         updated_complaint = await self._complaint_repo.save_complaint_image(
-            image_url=image_url,
+            image_url=image.url,
+            image_variants=image.variants,
             complaint_id=complaint_id
         )
         logger.info('Complaint image updated for complaint_id=%d', complaint_id)
+        await self.invalidate_cache(complaint_id)
 
         return ComplaintRead(**updated_complaint.model_dump())
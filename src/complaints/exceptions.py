@@ -10,4 +10,9 @@ class ComplaintWithIdNotFound(NotFoundException):
 
 class AccessDenied(BaseHTTPException):
     def __init__(self):
-        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail="You don't have permission to access this complaint.")
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail="You don't have permission to access this complaint.")
+
+
+class InvalidTileCoordinates(BaseHTTPException):
+    def __init__(self, z: int, x: int, y: int):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=f'Tile {z}/{x}/{y} does not exist')
@@ -0,0 +1,241 @@
+import math
+from typing import NamedTuple, Optional
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE_MAP = {char: index for index, char in enumerate(BASE32)}
+
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_M = 6_371_008.8
+MAX_COVERING_CELLS = 32
+
+
+class BoundingBox(NamedTuple):
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        if not self.min_lat <= latitude <= self.max_lat:
+            return False
+        if self.min_lon <= self.max_lon:
+            return self.min_lon <= longitude <= self.max_lon
+        # box crosses the antimeridian
+        return longitude >= self.min_lon or longitude <= self.max_lon
+
+    def split_antimeridian(self) -> list['BoundingBox']:
+        if self.min_lon <= self.max_lon:
+            return [self]
+        return [
+            BoundingBox(self.min_lat, self.min_lon, self.max_lat, 180.0),
+            BoundingBox(self.min_lat, -180.0, self.max_lat, self.max_lon),
+        ]
+
+
+def parse_bbox(value: str) -> BoundingBox:
+    """
+        :param: value: "min_lon,min_lat,max_lon,max_lat", min_lon > max_lon means the box crosses the antimeridian
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    except ValueError:
+        raise ValueError('bbox must be "min_lon,min_lat,max_lon,max_lat"')
+
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError('bbox is out of range')
+    return BoundingBox(min_lat, min_lon, max_lat, max_lon)
+
+
+def is_valid_point(latitude: float, longitude: float) -> bool:
+    return -90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+        :return: geohash of the point. Neighbouring points share a common prefix,
+        so a prefix is a rectangular cell and a B-tree index on the column can answer cell lookups
+    """
+    if not is_valid_point(latitude, longitude):
+        raise ValueError(f'Invalid coordinates: latitude={latitude}, longitude={longitude}')
+
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def safe_encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> Optional[str]:
+    if latitude is None or longitude is None or not is_valid_point(latitude, longitude):
+        return None
+    return encode(latitude, longitude, precision)
+
+
+def decode_bbox(geohash: str) -> BoundingBox:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = _DECODE_MAP[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return BoundingBox(lat_range[0], lon_range[0], lat_range[1], lon_range[1])
+
+
+def decode(geohash: str) -> tuple[float, float]:
+    """
+        :return: (latitude, longitude) of the cell center
+    """
+    box = decode_bbox(geohash)
+    return (box.min_lat + box.max_lat) / 2, (box.min_lon + box.max_lon) / 2
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """
+        :return: (height, width) of a geohash cell in degrees
+    """
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+        :return: great-circle distance between two points in meters
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_around(latitude: float, longitude: float, radius_m: float) -> BoundingBox:
+    d_lat = math.degrees(radius_m / EARTH_RADIUS_M)
+    min_lat = max(-90.0, latitude - d_lat)
+    max_lat = min(90.0, latitude + d_lat)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-12:
+        return BoundingBox(min_lat, -180.0, max_lat, 180.0)
+
+    d_lon = math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat))
+    if d_lon >= 180.0:
+        return BoundingBox(min_lat, -180.0, max_lat, 180.0)
+
+    min_lon = longitude - d_lon
+    max_lon = longitude + d_lon
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return BoundingBox(min_lat, min_lon, max_lat, max_lon)
+
+
+def _cells_for_box(box: BoundingBox, precision: int) -> set[str]:
+    height, width = cell_size(precision)
+    cells = set()
+
+    lat = box.min_lat
+    while True:
+        lon = box.min_lon
+        while True:
+            cells.add(encode(min(lat, 90.0), min(lon, 180.0), precision))
+            if lon >= box.max_lon:
+                break
+            lon = min(lon + width, box.max_lon)
+        if lat >= box.max_lat:
+            break
+        lat = min(lat + height, box.max_lat)
+
+    return cells
+
+
+def cells_at_precision(bbox: BoundingBox, precision: int) -> list[str]:
+    cells = set()
+    for box in bbox.split_antimeridian():
+        cells |= _cells_for_box(box, precision)
+    return sorted(cells)
+
+
+def _estimate_cells(box: BoundingBox, precision: int) -> int:
+    height, width = cell_size(precision)
+    rows = math.floor((box.max_lat - box.min_lat) / height) + 2
+    cols = math.floor((box.max_lon - box.min_lon) / width) + 2
+    return rows * cols
+
+
+def covering_prefixes(bbox: BoundingBox, max_cells: int = MAX_COVERING_CELLS) -> list[str]:
+    """
+        Choose the finest geohash precision whose cells covering the box stay under max_cells.
+        :return: sorted geohash prefixes covering the whole box
+    """
+    precision = 1
+    for candidate in range(1, GEOHASH_PRECISION + 1):
+        if estimate_cells(bbox, candidate) > max_cells:
+            break
+        precision = candidate
+
+    return cells_at_precision(bbox, precision)
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+        :return: next geohash cell of the same precision, so [prefix, upper) holds every geohash
+        starting with prefix. None when the range is unbounded
+    """
+    chars = list(prefix)
+    for position in range(len(chars) - 1, -1, -1):
+        index = _DECODE_MAP[chars[position]]
+        if index + 1 < len(BASE32):
+            chars[position] = BASE32[index + 1]
+            return ''.join(chars)
+        chars[position] = BASE32[0]
+    return None
+
+
+def estimate_cells(bbox: BoundingBox, precision: int) -> int:
+    return sum(_estimate_cells(box, precision) for box in bbox.split_antimeridian())
+
+
+def prefix_ranges(prefixes: list[str]) -> list[tuple[str, Optional[str]]]:
+    """
+        Merge sorted prefixes into [start, end) ranges, so adjacent cells become a single index range scan.
+    """
+    ranges: list[tuple[str, Optional[str]]] = []
+    for prefix in sorted(prefixes):
+        upper = prefix_upper_bound(prefix)
+        if ranges and ranges[-1][1] == prefix:
+            ranges[-1] = (ranges[-1][0], upper)
+        else:
+            ranges.append((prefix, upper))
+    return ranges
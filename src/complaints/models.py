@@ -1,8 +1,8 @@
 import datetime
 from typing import Optional, TYPE_CHECKING
 
-from sqlalchemy import Column, Integer, ForeignKey
-from sqlmodel import Field, Relationship
+from sqlalchemy import Column, Integer, ForeignKey, Index, JSON, text
+from sqlmodel import SQLModel, Field, Relationship
 
 from .schemas import ComplaintBase
 from .complaint_status import ComplaintStatus
@@ -14,11 +14,26 @@ if TYPE_CHECKING:
 
 class Complaint(ComplaintBase, table=True):
     __tablename__ = "complaint"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index('ix_complaint_created_at_id', 'created_at', 'id'),
+        # the feed filters by status (pending by default) and pages by (created_at, id)
+        Index('ix_complaint_status_created_at_id', 'status', 'created_at', 'id'),
+        # most complaints have no category, only the categorized ones are indexed
+        Index(
+            'ix_complaint_category_status_created_at_id',
+            'category', 'status', 'created_at', 'id',
+            postgresql_where=text('category IS NOT NULL'),
+            sqlite_where=text('category IS NOT NULL')
+        ),
+        Index('ix_complaint_user_id', 'user_id'),
+        {"extend_existing": True}
+    )
 
     id: Optional[int] = Field(primary_key=True, nullable=False, index=True)
     user_id: int = Field(sa_column=Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False))
     image_url: str = Field(nullable=True)
+    image_variants: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    geohash: Optional[str] = Field(default=None, max_length=12, nullable=True, index=True)
     status: ComplaintStatus = Field(default=ComplaintStatus.PENDING, nullable=False)
     created_at: datetime.date = Field(default_factory=datetime.date.today)
     updated_at: datetime.date = Field(default_factory=datetime.date.today)
@@ -31,5 +46,30 @@ class Complaint(ComplaintBase, table=True):
             "passive_deletes": True
         }
     )
+    images: list["ComplaintImage"] = Relationship(
+        back_populates="complaint",
+        sa_relationship_kwargs={
+            "cascade": "all, delete-orphan",
+            "passive_deletes": True,
+            "order_by": "ComplaintImage.position"
+        }
+    )
+
+
+class ComplaintImage(SQLModel, table=True):
+    __tablename__ = "complaint_image"
+    __table_args__ = (
+        Index('ix_complaint_image_complaint_id_position', 'complaint_id', 'position'),
+        {"extend_existing": True}
+    )
+
+    id: Optional[int] = Field(primary_key=True, nullable=False)
+    complaint_id: int = Field(sa_column=Column(Integer, ForeignKey("complaint.id", ondelete="CASCADE"), nullable=False))
+    url: str = Field(nullable=False)
+    variants: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    position: int = Field(default=0, nullable=False)
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+    complaint: "Complaint" = Relationship(back_populates="images")
 
 
@@ -1,23 +1,75 @@
+import datetime
 import logging
+from sqlalchemy import func, insert, tuple_, update
 from sqlalchemy.orm import selectinload
 from sqlmodel import select
-from sqlmodel import and_
+from sqlmodel import and_, or_
 
+from . import geo, spatial_cache
 from .schemas import ComplaintUpdate, ComplaintQueryModel
-from .models import Complaint
+from .models import Complaint, ComplaintImage
 from src.common import BaseRepository, db_exception_handler
 
 
 logger = logging.getLogger('fixkg.complaint_repository')
 
 class ComplaintRepositories(BaseRepository):
+    @staticmethod
+    def _prefix_filter(prefixes: list[str]):
+        ranges = []
+        for start, end in geo.prefix_ranges(prefixes):
+            if end is None:
+                ranges.append(Complaint.geohash >= start)
+            else:
+                ranges.append(and_(Complaint.geohash >= start, Complaint.geohash < end))
+        return or_(*ranges)
+
+    @staticmethod
+    def _geo_filters(bbox: geo.BoundingBox) -> list:
+        """
+            Geohash prefix ranges hit the B-tree index, the coordinate comparison removes the cell overhang
+        """
+        if bbox.min_lon <= bbox.max_lon:
+            lon_filter = Complaint.longitude.between(bbox.min_lon, bbox.max_lon)
+        else:
+            lon_filter = or_(Complaint.longitude >= bbox.min_lon, Complaint.longitude <= bbox.max_lon)
+
+        return [
+            ComplaintRepositories._prefix_filter(geo.covering_prefixes(bbox)),
+            Complaint.latitude.between(bbox.min_lat, bbox.max_lat),
+            lon_filter
+        ]
+
+    @staticmethod
+    def _distance_expression(latitude: float, longitude: float):
+        """
+            Haversine distance in meters, computed by Postgres
+        """
+        d_lat = func.radians(Complaint.latitude - latitude) / 2
+        d_lon = func.radians(Complaint.longitude - longitude) / 2
+        a = (
+            func.power(func.sin(d_lat), 2)
+            + func.cos(func.radians(latitude)) * func.cos(func.radians(Complaint.latitude)) * func.power(func.sin(d_lon), 2)
+        )
+        return 2 * geo.EARTH_RADIUS_M * func.asin(func.least(1.0, func.sqrt(a)))
+
+    def _supports_sql_distance(self) -> bool:
+        return self.read_db.bind.dialect.name == 'postgresql'
+
+    @staticmethod
+    def _invalidate_spatial_caches(complaint: Complaint) -> None:
+        spatial_cache.invalidate_local(complaint.geohash, complaint.category, complaint.latitude, complaint.longitude)
+
     @db_exception_handler
     async def create(self, complaint: Complaint) -> Complaint:
         logger.debug('Создание жалобы: %s', complaint)
+        if complaint.geohash is None:
+            complaint.geohash = geo.safe_encode(complaint.latitude, complaint.longitude)
         self.db.add(complaint)
         await self.db.commit()
         await self.db.refresh(complaint)
         logger.info('Жалоба успешно создана с ID: %d', complaint.id)
+        self._invalidate_spatial_caches(complaint)
 
         return complaint
 
@@ -32,17 +84,87 @@ class ComplaintRepositories(BaseRepository):
         if query_param.category:
             filters.append(Complaint.category == query_param.category)
 
-        stmt = select(Complaint)
+        bbox = query_param.get_bounding_box()
+        if bbox:
+            filters.extend(self._geo_filters(bbox))
+
+        cursor_position = query_param.get_cursor_position()
+        if cursor_position:
+            filters.append(tuple_(Complaint.created_at, Complaint.id) < tuple_(*cursor_position))
+
+        stmt = select(Complaint).order_by(Complaint.created_at.desc(), Complaint.id.desc())
 
         if filters:
             stmt = stmt.where(and_(*filters))
 
-        stmt = stmt.limit(query_param.limit).offset(query_param.offset)
+        filter_by_radius_in_process = query_param.radius is not None and not self._supports_sql_distance()
 
-        results = await self.db.scalars(stmt)
-        logger.info('Найдено %d жалоб', len(list(results)))
+        if query_param.radius is not None and not filter_by_radius_in_process:
+            stmt = stmt.where(
+                self._distance_expression(query_param.lat, query_param.lon) <= query_param.radius
+            )
 
-        return list(results)
+        if not filter_by_radius_in_process:
+            stmt = stmt.limit(query_param.limit).offset(query_param.offset)
+
+        results = await self.read_db.scalars(stmt)
+        complaints = list(results.all())
+
+        if filter_by_radius_in_process:
+            complaints = [
+                c for c in complaints
+                if geo.haversine(query_param.lat, query_param.lon, c.latitude, c.longitude) <= query_param.radius
+            ]
+            complaints = complaints[query_param.offset:query_param.offset + query_param.limit]
+
+        logger.info('Найдено %d жалоб', len(complaints))
+
+        return complaints
+
+    @db_exception_handler
+    async def get_cluster_rows(self, tiles: list[str], precision: int, category: str | None = None) -> list:
+        """
+            :return: rows of (cell, status, count, sum_latitude, sum_longitude) for complaints inside the tiles,
+            grouped by geohash cell of the given precision
+        """
+        logger.debug('Кластеризация жалоб в %d тайлах с точностью %d', len(tiles), precision)
+        cell = func.substr(Complaint.geohash, 1, precision)
+        stmt = (
+            select(
+                cell,
+                Complaint.status,
+                func.count(),
+                func.sum(Complaint.latitude),
+                func.sum(Complaint.longitude)
+            )
+            .where(self._prefix_filter(tiles))
+            .group_by(cell, Complaint.status)
+        )
+
+        if category:
+            stmt = stmt.where(Complaint.category == category)
+
+        result = await self.read_db.execute(stmt)
+        rows = result.all()
+        logger.info('Получено %d групп для кластеров', len(rows))
+
+        return rows
+
+    @db_exception_handler
+    async def get_tile_points(self, bbox: geo.BoundingBox) -> list:
+        """
+            :return: rows of (id, latitude, longitude, status, category), without building ORM objects
+        """
+        logger.debug('Получение точек жалоб в области: %s', bbox)
+        stmt = (
+            select(Complaint.id, Complaint.latitude, Complaint.longitude, Complaint.status, Complaint.category)
+            .where(and_(*self._geo_filters(bbox)))
+        )
+        result = await self.read_db.execute(stmt)
+        rows = result.all()
+        logger.info('Найдено %d точек жалоб', len(rows))
+
+        return rows
 
     @db_exception_handler
     async def get_by_id(self, complaint_id: int) -> Complaint:
@@ -60,9 +182,9 @@ class ComplaintRepositories(BaseRepository):
         stmt = (
             select(Complaint)
             .where(Complaint.id == complaint_id)
-            .options(selectinload(Complaint.comments))
+            .options(selectinload(Complaint.comments), selectinload(Complaint.images))
         )
-        result = await self.db.execute(stmt)
+        result = await self.read_db.execute(stmt)
         complaint = result.scalars().first()
 
         if not complaint:
@@ -78,6 +200,7 @@ class ComplaintRepositories(BaseRepository):
             update_data=new_data
         )
         logger.info('Жалоба с ID %d успешно обновлена', complaint.id)
+        self._invalidate_spatial_caches(updated_instance)
 
         return updated_instance
 
@@ -87,6 +210,7 @@ class ComplaintRepositories(BaseRepository):
         await self.db.delete(complaint)
         await self.db.commit()
         logger.info('Жалоба с ID %d успешно удалена', complaint.id)
+        self._invalidate_spatial_caches(complaint)
 
         return None
 
@@ -94,20 +218,78 @@ class ComplaintRepositories(BaseRepository):
     async def get_by_user_id(self, user_id: int) -> list[Complaint]:
         logger.debug('Получение жалоб пользователя с ID: %d', user_id)
         stmt = select(Complaint).where(Complaint.user_id == user_id)
-        results = await self.db.scalars(stmt)
+        results = await self.read_db.scalars(stmt)
         complaints = results.all()
 
         logger.info('Найдено %d жалоб для пользователя с ID: %d', len(complaints), user_id)
 
         return list(complaints)
 
+    @staticmethod
+    def _lock_complaint(complaint_id: int):
+        return select(Complaint.id).where(Complaint.id == complaint_id).with_for_update()
+
+    async def _next_image_position(self, complaint_id: int) -> int:
+        """
+            Locks the complaint row until the caller commits, so concurrent uploads to one
+            complaint take their positions one after another instead of reading the same max
+        """
+        await self.db.execute(self._lock_complaint(complaint_id))
+        last_position = await self.db.scalar(
+            select(func.max(ComplaintImage.position)).where(ComplaintImage.complaint_id == complaint_id)
+        )
+        return 0 if last_position is None else last_position + 1
+
     @db_exception_handler
-    async def save_complaint_image(self, complaint_id: int, image_url: str):
+    async def save_complaint_image(self, complaint_id: int, image_url: str, image_variants: dict | None = None):
         logger.debug('Сохранение изображения для жалобы с ID: %d', complaint_id)
         complaint = await self.get_by_id(complaint_id)
         complaint.image_url = image_url
+        complaint.image_variants = image_variants
+        self.db.add(ComplaintImage(
+            complaint_id=complaint_id,
+            url=image_url,
+            variants=image_variants,
+            position=await self._next_image_position(complaint_id)
+        ))
         await self.db.commit()
         await self.db.refresh(complaint)
         logger.info('Изображение для жалобы с ID %d обновлено с URL: %s', complaint_id, image_url)
 
         return complaint
+
+    @db_exception_handler
+    async def add_images(self, complaint_id: int, images: list[tuple[str, dict | None]]) -> list[ComplaintImage]:
+        """
+            Appends (url, variants) images to the complaint gallery with one multi-row INSERT.
+            The first image also becomes the complaint image when it has none
+        """
+        if not images:
+            return []
+
+        logger.debug('Добавление %d изображений к жалобе с ID: %d', len(images), complaint_id)
+        position = await self._next_image_position(complaint_id)
+        created_at = datetime.datetime.now()
+        rows = [
+            {
+                'complaint_id': complaint_id,
+                'url': url,
+                'variants': variants,
+                'position': position + offset,
+                'created_at': created_at
+            }
+            for offset, (url, variants) in enumerate(images)
+        ]
+        result = await self.db.scalars(insert(ComplaintImage).values(rows).returning(ComplaintImage))
+        created = sorted(result.all(), key=lambda image: image.position)
+
+        first_url, first_variants = images[0]
+        await self.db.execute(
+            update(Complaint)
+            .where(Complaint.id == complaint_id, or_(Complaint.image_url.is_(None), Complaint.image_url == ''))
+            .values(image_url=first_url, image_variants=first_variants)
+        )
+        await self.db.commit()
+        logger.info('К жалобе с ID %d добавлено %d изображений', complaint_id, len(created))
+
+        return created
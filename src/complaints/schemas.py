@@ -1,9 +1,12 @@
 import datetime
 from typing import Optional
 
+from pydantic import model_validator
 from sqlmodel import SQLModel, Field
 from .complaint_status import ComplaintStatus
+from .geo import BoundingBox, bbox_around, parse_bbox
 from src.comments.schemas import CommentRead
+from src.common.pagination import decode_cursor
 
 
 class ComplaintBase(SQLModel):
@@ -22,11 +25,20 @@ class ComplaintRead(ComplaintBase):
     user_id: int
     status: ComplaintStatus
     image_url: str | None = Field(nullable=True)
+    # resized copies of the image, {'thumb': {'webp': url, 'jpeg': url}, 'medium': {...}}
+    image_variants: dict[str, dict[str, str]] | None = None
     created_at: datetime.date
     updated_at: datetime.date
 
+class ComplaintImageRead(SQLModel):
+    id: int
+    url: str
+    variants: dict[str, dict[str, str]] | None = None
+    position: int
+
 class ComplaintReadDetailsSchemas(ComplaintRead):
     comments: list[CommentRead] = []
+    images: list[ComplaintImageRead] = []
 
 class ComplaintUpdate(SQLModel):
     status: Optional[ComplaintStatus] = ComplaintStatus.PENDING
@@ -35,6 +47,72 @@ class ComplaintUpdate(SQLModel):
 class ComplaintQueryModel(SQLModel):
     category: Optional[str] = None
     limit: int = 10
-    offset: int = 0
+    offset: int = Field(default=0, description='Deprecated, use cursor')
+    cursor: Optional[str] = Field(default=None, description='next_cursor from the previous page')
     status: Optional[ComplaintStatus] = ComplaintStatus.PENDING
+    bbox: Optional[str] = Field(
+        default=None,
+        description='Bounding box as "min_lon,min_lat,max_lon,max_lat"'
+    )
+    lat: Optional[float] = Field(default=None, ge=-90, le=90)
+    lon: Optional[float] = Field(default=None, ge=-180, le=180)
+    radius: Optional[float] = Field(default=None, gt=0, le=100_000, description='Radius in meters')
+
+    @model_validator(mode='after')
+    def _check_geo_params(self):
+        center = (self.lat, self.lon, self.radius)
+        if any(v is not None for v in center) and not all(v is not None for v in center):
+            raise ValueError('lat, lon and radius must be passed together')
+
+        if self.bbox is not None:
+            self.get_bounding_box()
+
+        if self.cursor is not None:
+            if self.offset:
+                raise ValueError('cursor and offset can not be used together')
+            self.get_cursor_position()
+        return self
+
+    def get_cursor_position(self) -> tuple[datetime.date, int] | None:
+        if self.cursor is None:
+            return None
+        return decode_cursor(self.cursor)
+
+    def get_bounding_box(self) -> BoundingBox | None:
+        """
+            :return: Area to filter complaints by. For center+radius it is the box around the circle
+        """
+        if self.radius is not None:
+            return bbox_around(self.lat, self.lon, self.radius)
+
+        if self.bbox is None:
+            return None
+
+        return parse_bbox(self.bbox)
+
+
+class ComplaintPage(SQLModel):
+    items: list[ComplaintRead]
+    next_cursor: Optional[str] = None
+
+
+class ComplaintClusterQueryModel(SQLModel):
+    bbox: str = Field(description='Bounding box as "min_lon,min_lat,max_lon,max_lat"')
+    zoom: int = Field(ge=0, le=22)
+    category: Optional[str] = None
+
+    @model_validator(mode='after')
+    def _check_bbox(self):
+        parse_bbox(self.bbox)
+        return self
+
+    def get_bounding_box(self) -> BoundingBox:
+        return parse_bbox(self.bbox)
+
 
+class ComplaintCluster(SQLModel):
+    geohash: str
+    count: int
+    latitude: float
+    longitude: float
+    statuses: dict[ComplaintStatus, int]
@@ -0,0 +1,54 @@
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+
+from . import clustering, vector_tiles
+from .models import Complaint
+
+logger = logging.getLogger('fixkg.complaint_spatial_cache')
+
+INVALIDATION_CHANNEL = 'complaints:spatial-cache'
+
+_generation = 0
+
+
+def generation() -> int:
+    """
+        Take it before reading the DB and compare before caching the result: when it changed,
+        an invalidation landed during the read and the result may already be stale
+    """
+    return _generation
+
+
+def invalidate_local(geohash: Optional[str], category: Optional[str], latitude: Optional[float], longitude: Optional[float]) -> None:
+    """
+        Drop the cached clusters and vector tiles containing the point in this worker
+    """
+    global _generation
+    _generation += 1
+    clustering.invalidate_clusters(geohash, category)
+    vector_tiles.invalidate_tiles(latitude, longitude)
+
+
+class SpatialCacheInvalidator:
+    """
+        Cluster and vector tile caches are kept in every worker. The worker that wrote a complaint
+        drops its own entries at once in the repository, the others are told over pub/sub.
+        If pub/sub is down they serve the old tiles until the cache ttl runs out.
+    """
+    def __init__(self, publish: Callable[[str, str], Awaitable[None]]):
+        self._publish = publish
+
+    async def invalidate(self, complaint: Complaint) -> None:
+        payload = {
+            'geohash': complaint.geohash,
+            'category': complaint.category,
+            'latitude': complaint.latitude,
+            'longitude': complaint.longitude
+        }
+        logger.debug('Broadcasting spatial cache invalidation for complaint %s', complaint.id)
+        await self._publish(INVALIDATION_CHANNEL, json.dumps(payload))
+
+    @staticmethod
+    async def handle(data: str) -> None:
+        invalidate_local(**json.loads(data))
@@ -0,0 +1,134 @@
+import logging
+import math
+from typing import Iterable, Optional
+
+from src.common import TTLCache
+from .geo import BoundingBox, is_valid_point
+
+logger = logging.getLogger('fixkg.complaint_vector_tiles')
+
+MAX_ZOOM = 22
+TILE_EXTENT = 4096
+LAYER_NAME = 'complaints'
+MAX_MERCATOR_LAT = 85.0511287798
+
+# key: (z, x, y)
+tile_cache = TTLCache(maxsize=2048, ttl=600)
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= MAX_ZOOM and 0 <= x < (1 << z) and 0 <= y < (1 << z)
+
+
+def _tile_to_lat(y: float, z: int) -> float:
+    n = math.pi - 2 * math.pi * y / (1 << z)
+    return math.degrees(math.atan(math.sinh(n)))
+
+
+def tile_bounds(z: int, x: int, y: int) -> BoundingBox:
+    n = 1 << z
+    return BoundingBox(
+        min_lat=_tile_to_lat(y + 1, z),
+        min_lon=x / n * 360.0 - 180.0,
+        max_lat=_tile_to_lat(y, z),
+        max_lon=(x + 1) / n * 360.0 - 180.0
+    )
+
+
+def _project(latitude: float, longitude: float, z: int) -> tuple[float, float]:
+    """
+        :return: position of the point in tile units on zoom z (web mercator)
+    """
+    latitude = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, latitude))
+    n = 1 << z
+    lat_rad = math.radians(latitude)
+    x = (longitude + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    return x, y
+
+
+def point_to_tile(latitude: float, longitude: float, z: int) -> tuple[int, int]:
+    x, y = _project(latitude, longitude, z)
+    n = 1 << z
+    return min(n - 1, max(0, int(x))), min(n - 1, max(0, int(y)))
+
+
+def invalidate_tiles(latitude: Optional[float], longitude: Optional[float]) -> None:
+    """
+        Drop the cached tile containing the point on every zoom level
+    """
+    if latitude is None or longitude is None or not is_valid_point(latitude, longitude):
+        return
+
+    for z in range(MAX_ZOOM + 1):
+        x, y = point_to_tile(latitude, longitude, z)
+        tile_cache.delete((z, x, y))
+    logger.debug('Tile cache invalidated for point (%s, %s)', latitude, longitude)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+
+def _length_delimited(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+
+def _packed(number: int, values: Iterable[int]) -> bytes:
+    return _length_delimited(number, b''.join(_varint(v) for v in values))
+
+
+def encode_tile(points: Iterable, z: int, x: int, y: int) -> bytes:
+    """
+        Encode complaint points as a Mapbox Vector Tile (spec v2) with a single point layer.
+        :param: points: rows of (id, latitude, longitude, status, category)
+    """
+    keys: dict[str, int] = {}
+    values: dict[str, int] = {}
+    features = []
+
+    def tag(key: str, value: str) -> list[int]:
+        return [keys.setdefault(key, len(keys)), values.setdefault(value, len(values))]
+
+    for complaint_id, latitude, longitude, status, category in points:
+        px, py = _project(latitude, longitude, z)
+        tile_x = round((px - x) * TILE_EXTENT)
+        tile_y = round((py - y) * TILE_EXTENT)
+
+        tags = tag('status', getattr(status, 'value', status))
+        if category is not None:
+            tags += tag('category', category)
+
+        feature = (
+            _field(1, 0) + _varint(complaint_id)
+            + _packed(2, tags)
+            + _field(3, 0) + _varint(1)  # POINT
+            + _packed(4, [(1 & 0x7) | (1 << 3), _zigzag(tile_x), _zigzag(tile_y)])  # MoveTo(1)
+        )
+        features.append(_length_delimited(2, feature))
+
+    layer = (
+        _field(15, 0) + _varint(2)
+        + _length_delimited(1, LAYER_NAME.encode())
+        + b''.join(features)
+        + b''.join(_length_delimited(3, key.encode()) for key in keys)
+        + b''.join(_length_delimited(4, _length_delimited(1, value.encode())) for value in values)
+        + _field(5, 0) + _varint(TILE_EXTENT)
+    )
+    return _length_delimited(3, layer)
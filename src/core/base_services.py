@@ -1,36 +1,121 @@
+from functools import cached_property
+from typing import Callable
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.auth import AuthService
 from src.comments import CommentRepositories
 from src.comments.services import CommentService
 from src.complaints import ComplaintService
 from src.complaints.repositories import ComplaintRepositories
-from src.images import ImageService
-from src.notification import NotificationService
+from src.notification import OutboxRepository
 from src.otp import OTPService
 from src.tokens.token_service import TokenService
-from src.core import redis_client
+from src.core import redis_client, settings
+from src.core.cache import cache, spatial_cache_invalidator, user_cache
+from src.core.hashing import password_hasher
+from src.core.images import image_service
+from src.core.outbox import outbox_worker
 from src.users import UserService, UserRepositories
 
+# stateless, shared by every request of the process
+token_service = TokenService(redis_client)
+
 
 class Services:
-    def __init__(self, db: AsyncSession):
-        self.token_service = TokenService(redis_client)
-        self.notification_service = NotificationService()
-        self.otp_service = OTPService(self.notification_service, redis_client)
-        self.image_service = ImageService()
+    """
+        Request-scoped container. Shared services are returned as is, the DB session,
+        repositories and services that depend on them are built on first access only,
+        so a route that needs the token service never creates a session.
+        With replicas, repository reads get a second session on a replica until the request
+        commits on the primary; reads after that stay on the primary to see their own writes.
+    """
+    token_service = token_service
+    image_service = image_service
+
+    def __init__(
+            self,
+            session_factory: Callable[[], AsyncSession],
+            read_session_factory: Callable[[], AsyncSession] | None = None
+    ):
+        self._session_factory = session_factory
+        self._read_session_factory = read_session_factory
+        self._db: AsyncSession | None = None
+        self._read_db: AsyncSession | None = None
+        self._committed = False
+
+    @property
+    def db(self) -> AsyncSession:
+        if self._db is None:
+            self._db = self._session_factory()
+            if self._read_session_factory is not None:
+                event.listen(self._db.sync_session, 'after_commit', self._on_commit)
+        return self._db
+
+    def _on_commit(self, session) -> None:
+        self._committed = True
+
+    def read_db(self) -> AsyncSession:
+        if self._read_session_factory is None or self._committed:
+            return self.db
+        if self._read_db is None:
+            self._read_db = self._read_session_factory()
+        return self._read_db
+
+    async def close(self) -> None:
+        if self._read_db is not None:
+            await self._read_db.close()
+            self._read_db = None
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
 
-        self.user_repository = UserRepositories(db)
-        self.user_service = UserService(image_service=self.image_service, user_repo=self.user_repository)
+    @cached_property
+    def outbox_repository(self) -> OutboxRepository:
+        return OutboxRepository(self.db, on_enqueue=outbox_worker.wake)
+
+    @cached_property
+    def otp_service(self) -> OTPService:
+        return OTPService(self.outbox_repository, redis_client)
+
+    @cached_property
+    def user_repository(self) -> UserRepositories:
+        return UserRepositories(self.db, user_cache=user_cache)
+
+    @cached_property
+    def user_service(self) -> UserService:
+        return UserService(image_service=self.image_service, user_repo=self.user_repository)
+
+    @cached_property
+    def complaint_repository(self) -> ComplaintRepositories:
+        return ComplaintRepositories(self.db, read_db=self.read_db)
+
+    @cached_property
+    def complaint_service(self) -> ComplaintService:
+        return ComplaintService(
+            self.complaint_repository,
+            self.user_service,
+            self.image_service,
+            cache=cache,
+            list_cache_ttl=settings.cache.complaint_list_ttl,
+            detail_cache_ttl=settings.cache.complaint_detail_ttl,
+            spatial_invalidator=spatial_cache_invalidator
+        )
 
-        self.complaint_repository = ComplaintRepositories(db)
-        self.complaint_service = ComplaintService(self.complaint_repository, self.user_service, self.image_service)
+    @cached_property
+    def comment_repository(self) -> CommentRepositories:
+        return CommentRepositories(self.db, read_db=self.read_db)
 
-        self.comment_repository = CommentRepositories(db)
-        self.comment_service = CommentService(self.comment_repository, self.complaint_service, self.notification_service)
+    @cached_property
+    def comment_service(self) -> CommentService:
+        return CommentService(self.comment_repository, self.complaint_service, self.outbox_repository)
 
-        self.auth_service = AuthService(
+    @cached_property
+    def auth_service(self) -> AuthService:
+        return AuthService(
             user_service=self.user_service,
             token_service=self.token_service,
             otp_service=self.otp_service,
-            user_repo=self.user_repository
+            user_repo=self.user_repository,
+            password_hasher=password_hasher
         )
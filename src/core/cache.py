@@ -0,0 +1,29 @@
+from src.common import RedisCache, metrics
+from src.complaints.spatial_cache import INVALIDATION_CHANNEL, SpatialCacheInvalidator
+from src.core import settings
+from src.core.redis_client import redis_client
+from src.users import UserCache
+from src.users.user_cache import INVALIDATION_CHANNEL as USER_INVALIDATION_CHANNEL
+from src.websocket import broker
+
+cache = RedisCache(
+    redis_client,
+    lock_timeout=settings.cache.lock_timeout
+)
+
+metrics.counter('cache_hits_total', 'Reads served from the Redis cache', function=lambda: cache.stats.hits)
+metrics.counter('cache_misses_total', 'Reads that ran the loader', function=lambda: cache.stats.misses)
+metrics.counter('cache_coalesced_total', 'Misses that joined a load already in flight', function=lambda: cache.stats.coalesced)
+metrics.counter('cache_errors_total', 'Redis cache operations that failed', function=lambda: cache.stats.errors)
+
+user_cache = UserCache(
+    redis_client,
+    local_ttl=settings.cache.user_local_ttl,
+    redis_ttl=settings.cache.user_redis_ttl,
+    local_maxsize=settings.cache.user_local_maxsize,
+    publish=broker.publish
+)
+broker.listen(USER_INVALIDATION_CHANNEL, user_cache.handle_invalidation)
+
+spatial_cache_invalidator = SpatialCacheInvalidator(broker.publish)
+broker.listen(INVALIDATION_CHANNEL, spatial_cache_invalidator.handle)
@@ -1,31 +1,171 @@
+import itertools
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
 from logging import getLogger
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable, Iterator
 
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.common import metrics
 from src.core import settings
 
 logger = getLogger('fixkg.database_helper')
 
+_query_counter: ContextVar['QueryCounter | None'] = ContextVar('query_counter', default=None)
+
+DB_POOL_CHECKOUT = metrics.histogram(
+    'db_pool_checkout_seconds',
+    'Time to get a DB connection from the pool: waiting for a free one, opening and pinging it',
+    labels=('pool',),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+DB_POOL_EXHAUSTED = metrics.counter(
+    'db_pool_exhausted_total',
+    'Checkouts that found every pooled and overflow connection in use and had to wait',
+    labels=('pool',)
+)
+DB_POOL_TIMEOUTS = metrics.counter('db_pool_timeouts_total', 'Checkouts that failed after waiting pool_timeout', labels=('pool',))
+
+
+class QueryCounter:
+    """
+        Statements executed inside count_queries(). Shapes are statements with whitespace and
+        bound parameter lists collapsed, so the same query with other values counts as a duplicate
+    """
+    def __init__(self, parent: 'QueryCounter | None' = None):
+        self.parent = parent
+        self.statements: list[str] = []
+
+    @staticmethod
+    def shape(statement: str) -> str:
+        statement = re.sub(r'\s+', ' ', statement).strip()
+        # IN (?, ?, ?) and IN ($1, $2) have the same shape whatever the number of values
+        return re.sub(r'\((?:\s*(?:\?|\$\d+|%\(\w+\)s|:\w+)\s*,?)+\)', '(?)', statement)
+
+    def add(self, statement: str) -> None:
+        counter = self
+        shape = self.shape(statement)
+        while counter is not None:
+            counter.statements.append(shape)
+            counter = counter.parent
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def duplicates(self) -> dict[str, int]:
+        """
+            :return: shapes executed more than once, a sign of N+1 or repeated loads
+        """
+        return {shape: n for shape, n in Counter(self.statements).items() if n > 1}
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    counter = QueryCounter(parent=_query_counter.get())
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.add(statement)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+        Reports checkout time and exhaustion per pool, labelled with the engine pool_logging_name
+    """
+    @property
+    def _name(self) -> str:
+        return self._orig_logging_name or 'default'
+
+    def connect(self):
+        if self._pool.empty() and -1 < self._max_overflow <= self._overflow:
+            DB_POOL_EXHAUSTED.inc(self._name)
+            logger.debug('DB pool %s exhausted, %d connections in use', self._name, self.checkedout())
+
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc(self._name)
+            logger.warning('No DB connection in pool %s after %.1fs, %d in use', self._name, self._timeout, self.checkedout())
+            raise
+        finally:
+            DB_POOL_CHECKOUT.observe(self._name, value=time.perf_counter() - start)
+
+
+def asyncpg_connect_args(
+        statement_cache_size: int,
+        prepared_statement_cache_size: int,
+        statement_timeout: int
+) -> dict:
+    """
+        :return: connect_args of an asyncpg engine. statement_cache_size is the asyncpg cache,
+        prepared_statement_cache_size the one of the SQLAlchemy adapter; statement_timeout in ms, 0 for none
+    """
+    connect_args = {
+        'statement_cache_size': statement_cache_size,
+        'prepared_statement_cache_size': prepared_statement_cache_size
+    }
+    if statement_timeout:
+        connect_args['server_settings'] = {'statement_timeout': str(statement_timeout)}
+    return connect_args
+
+
 class DatabaseHelper:
     def __init__(
             self,
             url: str,
-            echo: bool = True,
+            echo: bool = False,
             pool_size: int = 5,
             max_overflow: int = 10,
-            echo_pool: bool = False
+            echo_pool: bool = False,
+            replica_urls: list[str] | None = None,
+            pool_timeout: float = 30,
+            pool_pre_ping: bool = False,
+            pool_recycle: int = -1,
+            statement_cache_size: int = 100,
+            prepared_statement_cache_size: int = 100,
+            statement_timeout: int = 0
     ):
-        logger.debug('Initializing DatabaseHelper with URL: %s', url)
-
-        self.async_engine = create_async_engine(
-            url=url,
-            echo=echo,
-            pool_size=pool_size,
-            max_overflow=max_overflow,
-            echo_pool=echo_pool
-        )
+        logger.debug('Initializing DatabaseHelper with URL: %s', make_url(url))
+
+        def create_engine(engine_url: str, pool_name: str):
+            connect_args = {}
+            if make_url(engine_url).get_driver_name() == 'asyncpg':
+                connect_args = asyncpg_connect_args(statement_cache_size, prepared_statement_cache_size, statement_timeout)
+            return create_async_engine(
+                url=engine_url,
+                echo=echo,
+                echo_pool=echo_pool,
+                poolclass=InstrumentedQueuePool,
+                pool_logging_name=pool_name,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_pre_ping=pool_pre_ping,
+                pool_recycle=pool_recycle,
+                connect_args=connect_args
+            )
+
+        self.async_engine = create_engine(url, 'primary')
+        self.replica_engines = [
+            create_engine(replica_url, f'replica{number}') for number, replica_url in enumerate(replica_urls or [], start=1)
+        ]
+        self._replicas = itertools.cycle(self.replica_engines)
 
         self.session_factory = async_sessionmaker(
             bind=self.async_engine,
@@ -34,7 +174,7 @@ class DatabaseHelper:
             expire_on_commit=False
         )
 
-        logger.info('DatabaseHelper initialized successfully with async engine')
+        logger.info('DatabaseHelper initialized successfully with async engine and %d replicas', len(self.replica_engines))
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         logger.debug('Getting database session')
@@ -43,13 +183,52 @@ class DatabaseHelper:
             yield session
         logger.debug('Session closed')
 
+    def get_session_factory(self) -> async_sessionmaker:
+        """
+            Dependency for lazy session creation, the caller opens and closes the session
+        """
+        return self.session_factory
+
+    def read_session(self) -> AsyncSession:
+        """
+            Session on the next replica, round robin. It may lag behind the primary
+        """
+        return self.session_factory(bind=next(self._replicas))
+
+    def get_read_session_factory(self) -> Callable[[], AsyncSession] | None:
+        """
+            Dependency like get_session_factory for reads, None without replicas: reads then share the write session
+        """
+        return self.read_session if self.replica_engines else None
+
     async def dispose(self):
         logger.debug('Disposing async engine')
         await self.async_engine.dispose()
+        for engine in self.replica_engines:
+            await engine.dispose()
         logger.info('Async engine disposed successfully')
 
 
 # Example usage of DatabaseHelper:
 database_helper = DatabaseHelper(
-    url=settings.database.get_url()
+    url=settings.database.get_url(),
+    replica_urls=settings.database.replica_urls,
+    echo=settings.database.echo,
+    echo_pool=settings.database.echo_pool,
+    pool_size=settings.database.pool_size,
+    max_overflow=settings.database.max_overflow,
+    pool_timeout=settings.database.pool_timeout,
+    pool_pre_ping=settings.database.pool_pre_ping,
+    pool_recycle=settings.database.pool_recycle,
+    statement_cache_size=settings.database.statement_cache_size,
+    prepared_statement_cache_size=settings.database.prepared_statement_cache_size,
+    statement_timeout=settings.database.statement_timeout
 )
+
+def _pool_stat(name: str) -> float:
+    stat = getattr(database_helper.async_engine.pool, name, None)
+    return stat() if stat else 0
+
+metrics.gauge('db_pool_size', 'Configured size of the DB connection pool', function=lambda: _pool_stat('size'))
+metrics.gauge('db_pool_checked_out', 'DB connections in use', function=lambda: _pool_stat('checkedout'))
+metrics.gauge('db_pool_overflow', 'DB connections opened above pool_size', function=lambda: max(0, _pool_stat('overflow')))
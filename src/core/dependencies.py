@@ -1,3 +1,5 @@
+from typing import AsyncGenerator, Callable
+
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,8 +13,15 @@ from src.tokens import TokenService
 from ..comments.services import CommentService
 
 
-def get_service(db: AsyncSession = Depends(database_helper.session_getter)) -> Services:
-    return Services(db)
+async def get_service(
+        session_factory: Callable[[], AsyncSession] = Depends(database_helper.get_session_factory),
+        read_session_factory: Callable[[], AsyncSession] | None = Depends(database_helper.get_read_session_factory)
+) -> AsyncGenerator[Services, None]:
+    services = Services(session_factory, read_session_factory)
+    try:
+        yield services
+    finally:
+        await services.close()
 
 def get_user_service(service: Services = Depends(get_service)) -> UserService:
     return service.user_service
@@ -20,8 +29,8 @@ def get_user_service(service: Services = Depends(get_service)) -> UserService:
 def get_auth_service(service: Services = Depends(get_service)) -> AuthService:
     return service.auth_service
 
-def get_token_service(service: Services = Depends(get_service)) -> TokenService:
-    return service.token_service
+def get_token_service() -> TokenService:
+    return Services.token_service
 
 def get_complaint_service(service: Services = Depends(get_service)) -> ComplaintService:
     return service.complaint_service
@@ -0,0 +1,7 @@
+from src.auth import PasswordHasher
+from src.core import settings
+
+password_hasher = PasswordHasher(
+    pool_size=settings.password_hashing.pool_size,
+    max_pending=settings.password_hashing.max_pending
+)
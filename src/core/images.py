@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import Callable
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.complaints.models import Complaint, ComplaintImage
+from src.core import database_helper, settings
+from src.images import ImageProcessor, ImageService, ImageStorage, LocalStorage, S3Storage, collect_garbage, clean_staging
+from src.images.images_service import AVATAR_FOLDER, COMPLAINT_FOLDER
+from src.users.models import User
+
+
+def _build_storage() -> ImageStorage:
+    storage_settings = settings.image_storage
+    if storage_settings.backend == 's3':
+        return S3Storage(
+            endpoint_url=storage_settings.s3_endpoint_url,
+            bucket=storage_settings.s3_bucket,
+            access_key=storage_settings.s3_access_key,
+            secret_key=storage_settings.s3_secret_key,
+            region=storage_settings.s3_region,
+            public_base_url=storage_settings.s3_public_base_url,
+            part_size=storage_settings.s3_part_size
+        )
+    return LocalStorage(root=Path(storage_settings.local_root), base_url=storage_settings.local_base_url)
+
+
+image_storage = _build_storage()
+
+image_processor = ImageProcessor(
+    sizes=settings.images.variant_sizes,
+    quality=settings.images.variant_quality,
+    pool_size=settings.images.process_pool_size
+)
+
+image_service = ImageService(
+    storage=image_storage,
+    staging_dir=Path(settings.images.staging_dir) if settings.images.staging_dir else None,
+    max_size=settings.images.max_size,
+    chunk_size=settings.images.chunk_size,
+    processor=image_processor,
+    presign_expires=settings.images.presign_expires,
+    max_files=settings.images.max_files,
+    upload_concurrency=settings.images.upload_concurrency
+)
+
+
+async def referenced_image_urls(session: AsyncSession) -> set[str]:
+    """
+        :return: URLs of every stored image and variant still used by a complaint or a user
+    """
+    urls = set()
+    for column, variants_column in (
+            (Complaint.image_url, Complaint.image_variants),
+            (ComplaintImage.url, ComplaintImage.variants),
+            (User.avatar_url, User.avatar_variants)
+    ):
+        rows = await session.execute(select(column, variants_column).where(column.is_not(None)))
+        for url, variants in rows:
+            urls.add(url)
+            for files in (variants or {}).values():
+                urls.update(files.values())
+    return urls
+
+
+async def collect_image_garbage(
+        session_factory: Callable[[], AsyncSession] = database_helper.session_factory,
+        grace_period: float = settings.images.gc_grace_period
+) -> list[str]:
+    async with session_factory() as session:
+        referenced = await referenced_image_urls(session)
+
+    await run_in_threadpool(clean_staging, image_service.staging_dir, grace_period)
+    return await collect_garbage(image_storage, [AVATAR_FOLDER, COMPLAINT_FOLDER], referenced, grace_period)
@@ -0,0 +1,22 @@
+from src.core import settings
+from src.core.database_helper import database_helper
+from src.core.smtp import smtp_pool
+from src.notification import OutboxWorker, NotificationChannel, EmailNotification
+from src.notification.websocket_notification import WebSocketNotification
+from src.websocket import broker
+
+outbox_worker = OutboxWorker(
+    database_helper.session_factory,
+    strategies={
+        NotificationChannel.EMAIL: EmailNotification(smtp_pool),
+        NotificationChannel.WEBSOCKET: WebSocketNotification(connection_manager=broker)
+    },
+    batch_size=settings.outbox.batch_size,
+    poll_interval=settings.outbox.poll_interval,
+    max_attempts=settings.outbox.max_attempts,
+    backoff_base=settings.outbox.backoff_base,
+    backoff_max=settings.outbox.backoff_max,
+    lease_timeout=settings.outbox.lease_timeout,
+    retention=settings.outbox.retention,
+    purge_interval=settings.outbox.purge_interval
+)
@@ -1,9 +1,34 @@
+import time
 from datetime import timedelta
+from functools import wraps
 
 import redis.asyncio as redis
 
+from src.common import metrics, server_timing
 from src.core import settings
 
+REDIS_COMMAND_DURATION = metrics.histogram(
+    'redis_command_duration_seconds',
+    'Latency of Redis commands sent through RedisClient',
+    labels=('command',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+
+def timed(command: str):
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                duration = time.perf_counter() - start
+                REDIS_COMMAND_DURATION.observe(command, value=duration)
+                server_timing.record('redis', duration)
+        return wrapper
+    return decorator
+
 
 class RedisClient:
 
@@ -30,20 +55,44 @@ class RedisClient:
             raise RuntimeError('Redis is not connected')
         return self._client
 
-    async def set(self, key: str, value: str | int | dict | list | set, ex: int | timedelta = None):
+    @timed('set')
+    async def set(self, key: str, value: str | int | dict | list | set, ex: int | timedelta = None, nx: bool = False):
         """
         :param: key: take a str and help to get data from redis by this key
         :param: value: a data
         :param: ex: take a life seconds
+        :param: nx: set only if key does not exist yet
+        :return: False if nx is set and the key already exists
         """
-        await self._get_client().set(name=key, value=value, ex=ex)
+        return await self._get_client().set(name=key, value=value, ex=ex, nx=nx)
 
+    @timed('get')
     async def get(self, key: str):
         return await self._get_client().get(name=key)
 
+    @timed('delete')
     async def delete(self, key: str):
         await self._get_client().delete(key)
 
+    @timed('delete_many')
+    async def delete_many(self, *keys: str):
+        if keys:
+            await self._get_client().delete(*keys)
+
+    @timed('mget')
+    async def mget(self, *keys: str) -> list:
+        return await self._get_client().mget(keys)
+
+    @timed('publish')
+    async def publish(self, channel: str, message: str) -> int:
+        return await self._get_client().publish(channel, message)
+
+    def pubsub(self):
+        return self._get_client().pubsub()
+
+    def pipeline(self, transaction: bool = True):
+        return self._get_client().pipeline(transaction=transaction)
+
 redis_client = RedisClient(
     port = settings.redis.port,
     host = settings.redis.host,
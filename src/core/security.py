@@ -3,17 +3,35 @@ from typing import Annotated
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 
-from .dependencies import get_user_service, get_token_service
-from src.users import UserRead, UserService
+from .cache import user_cache
+from .dependencies import get_service, get_token_service
+from .base_services import Services
+from .settings import settings
+from src.users import UserRead
 from ..tokens import TokenService, TokenType
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='/auth/login-user')
 
 async def get_current_user(
         token: Annotated[str, Depends(oauth2_scheme)],
-        user_service: Annotated[UserService, Depends(get_user_service)],
+        services: Annotated[Services, Depends(get_service)],
         token_service: Annotated[TokenService, Depends(get_token_service)]
 ) -> UserRead:
     decoded_token = token_service.decode_token_with_token_type_checking(token, TokenType.access)
-    user: UserRead = await user_service.get_user_by_id(int(decoded_token['sub']))
+    user_id = int(decoded_token['sub'])
+
+    if settings.jwt.trust_token_claims:
+        user = token_service.user_from_claims(decoded_token)
+        if user:
+            return user
+
+    user = await user_cache.get(user_id)
+    if user:
+        return user
+
+    # read before the DB, so a load that races an update or delete is not cached
+    version = await user_cache.version(user_id)
+    # the session and user repository are created only on a cache miss
+    user: UserRead = await services.user_service.get_user_by_id(user_id)
+    await user_cache.set(user, version)
     return user
\ No newline at end of file
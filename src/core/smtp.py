@@ -0,0 +1,14 @@
+from src.core import settings
+from src.notification import SMTPPool
+
+smtp_pool = SMTPPool(
+    hostname=settings.smtp.hostname,
+    port=settings.smtp.port,
+    username=settings.smtp.user_email,
+    password=settings.smtp.password,
+    size=settings.smtp.pool_size,
+    start_tls=settings.smtp.start_tls,
+    timeout=settings.smtp.timeout,
+    max_idle=settings.smtp.max_idle,
+    max_messages_per_connection=settings.smtp.max_messages_per_connection
+)
@@ -0,0 +1,30 @@
+"""
+    Removes stored images that no complaint or user references any more, run it periodically (cron):
+
+        python -m src.image_gc
+"""
+import asyncio
+
+from logger import register_logger
+from src.core import database_helper, settings
+from src.core.images import collect_image_garbage, image_storage
+
+
+async def main():
+    register_logger(
+        level=settings.logging.level,
+        console_level=settings.logging.console_level,
+        filename=settings.logging.filename,
+        json_format=settings.logging.json_format,
+        sample_rates=settings.logging.sample_rates
+    )
+    try:
+        removed = await collect_image_garbage()
+        print(f'Removed {len(removed)} unreferenced image files')
+    finally:
+        await image_storage.close()
+        await database_helper.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
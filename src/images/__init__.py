@@ -1 +1,7 @@
-from .images_service import ImageService
\ No newline at end of file
+from .schemas import DirectUploadRequest, DirectUpload, DirectUploadComplete
+from .exceptions import InvalidImage, ImageTooLarge, UploadNotFound, DirectUploadUnavailable, ImageStorageUnavailable, TooManyImages
+from .storage import ImageStorage, LocalStorage, S3Storage, StorageError
+from .images_service import ImageService, StoredImage
+from .variants import ImageProcessor
+from .garbage import collect_garbage, clean_staging, is_content_addressed, image_key
+from .static import ImmutableStaticFiles
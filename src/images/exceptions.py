@@ -0,0 +1,33 @@
+from starlette import status
+
+from src.common import BaseHTTPException
+
+
+class InvalidImage(BaseHTTPException):
+    def __init__(self, detail: str = 'Only image files are allowed'):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class ImageTooLarge(BaseHTTPException):
+    def __init__(self, max_size: int):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f'Image must not exceed {max_size} bytes')
+
+
+class UploadNotFound(BaseHTTPException):
+    def __init__(self, key: str):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=f'Nothing was uploaded to {key}')
+
+
+class DirectUploadUnavailable(BaseHTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail='Direct uploads need an S3 image storage')
+
+
+class ImageStorageUnavailable(BaseHTTPException):
+    def __init__(self):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail='Image storage is unavailable')
+
+
+class TooManyImages(BaseHTTPException):
+    def __init__(self, max_files: int):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=f'At most {max_files} images can be uploaded at once')
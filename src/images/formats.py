@@ -0,0 +1,41 @@
+"""
+Image type detection from the first bytes of the file, the client supplied content type
+and file name are not trusted
+"""
+# enough bytes to recognize every supported format
+HEADER_SIZE = 16
+
+IMAGE_EXTENSIONS = {
+    'jpeg': '.jpg',
+    'png': '.png',
+    'gif': '.gif',
+    'webp': '.webp',
+    'heic': '.heic',
+}
+
+IMAGE_CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'heic': 'image/heic',
+}
+
+_HEIC_BRANDS = (b'heic', b'heix', b'heim', b'heis', b'hevc', b'hevx', b'mif1', b'msf1')
+
+
+def detect_format(header: bytes) -> str | None:
+    """
+        :return: format name (a key of IMAGE_EXTENSIONS) or None when the bytes are not a supported image
+    """
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    if header[4:8] == b'ftyp' and header[8:12] in _HEIC_BRANDS:
+        return 'heic'
+    return None
@@ -0,0 +1,84 @@
+import os
+import re
+import shutil
+import time
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .storage import ImageStorage
+
+logger = getLogger('fixkg.image_garbage')
+
+# <sha256>.jpg for originals, <sha256>_thumb.webp for their variants
+CONTENT_ADDRESSED_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})(?:_\w+)?\.\w+$')
+
+TEMPORARY_SUFFIX = '.part'
+
+
+def is_content_addressed(filename: str) -> bool:
+    return CONTENT_ADDRESSED_NAME.match(filename) is not None
+
+
+def image_key(url: str) -> str:
+    """
+        :return: storage key of an image URL, the same for every storage backend and base URL
+    """
+    return '/'.join(url.rsplit('/', 2)[-2:])
+
+
+async def collect_garbage(
+        storage: 'ImageStorage',
+        prefixes: Iterable[str],
+        referenced_urls: set[str],
+        grace_period: float
+) -> list[str]:
+    """
+        Removes content-addressed images no row references any more and temporary files left by
+        interrupted uploads. Files modified within grace_period are kept, they may belong to an upload
+        whose row is not committed yet. Other names, such as images stored before content addressing,
+        are never touched.
+        :return: removed keys
+    """
+    deadline = time.time() - grace_period
+    referenced = {image_key(url) for url in referenced_urls}
+    removed = []
+    for prefix in prefixes:
+        async for stored in storage.list(prefix):
+            name = stored.key.rsplit('/', 1)[-1]
+            if stored.modified > deadline:
+                continue
+            if is_content_addressed(name):
+                if stored.key in referenced:
+                    continue
+            elif not (name.startswith('.') and name.endswith(TEMPORARY_SUFFIX)):
+                continue
+
+            # an upload of the same content may have touched it since the listing
+            current = await storage.stat(stored.key)
+            if current is None or current.modified > deadline:
+                continue
+
+            await storage.delete(stored.key)
+            removed.append(stored.key)
+
+    logger.info('Removed %d unreferenced image files', len(removed))
+    return removed
+
+
+def clean_staging(staging_dir: Path, grace_period: float) -> list[Path]:
+    """
+        Removes upload working directories abandoned by a crashed process
+    """
+    deadline = time.time() - grace_period
+    removed = []
+    for entry in os.scandir(staging_dir):
+        if entry.stat().st_mtime > deadline:
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.remove(entry.path)
+        removed.append(Path(entry.path))
+    return removed
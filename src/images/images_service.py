@@ -1,51 +1,120 @@
+import asyncio
+import base64
+import hashlib
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO
+
 from fastapi import HTTPException, UploadFile, status
-import os
 from logging import getLogger
+from starlette.concurrency import run_in_threadpool
+
+from .exceptions import DirectUploadUnavailable, ImageStorageUnavailable, ImageTooLarge, InvalidImage, TooManyImages, UploadNotFound
+from .formats import HEADER_SIZE, IMAGE_CONTENT_TYPES, IMAGE_EXTENSIONS, detect_format
+from .schemas import DirectUpload, DirectUploadRequest
+from .storage import DirectUploadNotSupported, ImageStorage, LocalStorage, StorageError
+from .variants import ImageProcessor, Variants
 
 logger = getLogger('fixkg.image_service')
 
-USER_AVATAR_DIR = Path("static/avatars")
-COMPLAINT_IMAGE_DIR = Path("static/complaints")
+AVATAR_FOLDER = 'avatars'
+COMPLAINT_FOLDER = 'complaints'
+
+VARIANT_CONTENT_TYPES = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    url: str
+    # {variant name: {format: url}}, None when no variants could be generated
+    variants: Variants | None = None
+
+
+@dataclass(frozen=True)
+class _StagedImage:
+    workdir: Path
+    path: Path
+    digest: str
+    image_format: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.digest}{IMAGE_EXTENSIONS[self.image_format]}"
 
-USER_AVATAR_DIR.mkdir(parents=True, exist_ok=True)
-COMPLAINT_IMAGE_DIR.mkdir(parents=True, exist_ok=True)
 
 class ImageService:
-    @staticmethod
-    async def save_user_avatar_image(file: UploadFile, user_id: int) -> str:
+    def __init__(
+            self,
+            storage: ImageStorage | None = None,
+            staging_dir: Path | None = None,
+            max_size: int = 10 * 1024 * 1024,
+            chunk_size: int = 1024 * 1024,
+            processor: ImageProcessor | None = None,
+            presign_expires: int = 900,
+            max_files: int = 10,
+            upload_concurrency: int = 4
+    ):
+        self.storage = storage or LocalStorage()
+        self.staging_dir = staging_dir or Path(tempfile.gettempdir()) / "fixkg-images"
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.presign_expires = presign_expires
+        self.max_files = max_files
+        self.upload_concurrency = upload_concurrency
+        self._processor = processor
+
+    async def save_user_avatar_image(self, file: UploadFile, user_id: int) -> StoredImage:
         logger.info("Attempting to save avatar for user %d", user_id)
-        return await ImageService._save_image(file, f"user_{user_id}", USER_AVATAR_DIR)
+        return await self._save_image(file, AVATAR_FOLDER)
 
-    @staticmethod
-    async def save_complaint_image(file: UploadFile, complaint_id: int) -> str:
+    async def save_complaint_image(self, file: UploadFile, complaint_id: int) -> StoredImage:
         logger.info("Attempting to save image for complaint %d", complaint_id)
-        return await ImageService._save_image(file, f"complaint_{complaint_id}", COMPLAINT_IMAGE_DIR)
+        return await self._save_image(file, COMPLAINT_FOLDER)
 
-    @staticmethod
-    async def _save_image(file: UploadFile, prefix: str, directory: Path) -> str:
-        if not file.content_type.startswith('image/'):
-            logger.warning("Invalid file type for image upload: %s", file.content_type)
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Only image files are allowed"
-            )
+    async def save_complaint_images(self, files: list[UploadFile], complaint_id: int) -> list[StoredImage]:
+        """
+            Stores the files concurrently, at most upload_concurrency at a time, so a large batch
+            does not occupy every worker thread and storage connection. The first failure cancels
+            the uploads still running; images already stored are left to the garbage collector.
+            :return: stored images in the order of files
+        """
+        if len(files) > self.max_files:
+            raise TooManyImages(self.max_files)
 
-        ext = Path(file.filename).suffix
-        filename = f"{prefix}{ext}"
-        file_path = directory / filename
+        logger.info("Attempting to save %d images for complaint %d", len(files), complaint_id)
+        semaphore = asyncio.Semaphore(self.upload_concurrency)
 
-        if file_path.exists():
-            os.remove(file_path)
-            logger.info("Existing file %s removed", file_path)
+        async def save(file: UploadFile) -> StoredImage:
+            async with semaphore:
+                return await self._save_image(file, COMPLAINT_FOLDER)
 
         try:
-            logger.info("Saving image %s to path %s", filename, file_path)
-            content = await file.read()
-            with open(file_path, "wb") as buffer:
-                buffer.write(content)
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(save(file)) for file in files]
+        except ExceptionGroup as errors:
+            # callers handle a single error, whatever its type: the first one stands for the batch
+            raise errors.exceptions[0]
+        return [task.result() for task in tasks]
+
+    async def presign_complaint_upload(self, upload: DirectUploadRequest) -> DirectUpload:
+        return await self._presign_upload(upload, COMPLAINT_FOLDER)
+
+    async def complete_complaint_upload(self, key: str) -> StoredImage:
+        return await self._complete_upload(key, COMPLAINT_FOLDER)
 
-            logger.info("Image saved successfully to %s", file_path)
+    async def _save_image(self, file: UploadFile, folder: str) -> StoredImage:
+        if file.size is not None and file.size > self.max_size:
+            raise self._too_large()
+
+        try:
+            # the whole copy runs in one worker thread, the event loop only awaits it
+            staged = await run_in_threadpool(self._stage, file.file)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error("Error occurred while saving image: %s", str(e))
             raise HTTPException(
@@ -53,6 +122,180 @@ class ImageService:
                 detail=f"An error occurred while saving the image: {str(e)}"
             )
 
-        image_url = f"/static/{directory.name}/{filename}"
+        key = f"{folder}/{staged.name}"
+        try:
+            # variants first, storing the original may move the staged file away
+            variants = await self._store_variants(staged.digest, folder, staged.workdir, source=staged.path)
+            if await self.storage.exists(key):
+                # a fresh modification time keeps the garbage collector off it until the row is saved
+                await self.storage.touch(key)
+                logger.info("Image %s is already stored", key)
+            else:
+                await self.storage.put_file(key, staged.path, IMAGE_CONTENT_TYPES[staged.image_format])
+        except StorageError as e:
+            logger.error("Image storage failed for %s: %s", key, e)
+            raise ImageStorageUnavailable()
+        finally:
+            await run_in_threadpool(shutil.rmtree, staged.workdir, True)
+
+        image_url = self.storage.url(key)
         logger.info("Image URL generated: %s", image_url)
-        return image_url
+        return StoredImage(url=image_url, variants=variants)
+
+    def _stage(self, source: BinaryIO) -> _StagedImage:
+        """
+            Copies the upload in chunks to a working directory, hashing it on the way. The image is
+            stored under <sha256><extension>: the same content always gets the same key, so a
+            repeated upload reuses the stored file and a new image always gets a new URL.
+            The extension comes from the magic bytes, not from the client file name
+        """
+        header = source.read(HEADER_SIZE)
+        image_format = detect_format(header)
+        if image_format is None:
+            logger.warning("Invalid file type for image upload, header: %r", header[:8])
+            raise InvalidImage()
+
+        workdir = Path(tempfile.mkdtemp(dir=self.staging_dir))
+        path = workdir / "upload"
+        digest = hashlib.sha256(header)
+        try:
+            with open(path, "wb") as buffer:
+                buffer.write(header)
+                size = len(header)
+                while chunk := source.read(self.chunk_size):
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise self._too_large()
+                    digest.update(chunk)
+                    buffer.write(chunk)
+        except BaseException:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+
+        return _StagedImage(workdir=workdir, path=path, digest=digest.hexdigest(), image_format=image_format)
+
+    async def _store_variants(
+            self,
+            digest: str,
+            folder: str,
+            workdir: Path,
+            source: Path | None = None,
+            original_key: str | None = None
+    ) -> Variants | None:
+        """
+            Variants already stored for this content are reused, otherwise they are rendered from
+            source, or from original_key downloaded into workdir
+        """
+        if self._processor is None:
+            return None
+
+        keys = {
+            name: {image_format: f"{folder}/{filename}" for image_format, filename in files.items()}
+            for name, files in self._processor.file_names(digest).items()
+        }
+        all_keys = [key for files in keys.values() for key in files.values()]
+
+        if all(await asyncio.gather(*(self.storage.exists(key) for key in all_keys))):
+            await asyncio.gather(*(self.storage.touch(key) for key in all_keys))
+        else:
+            if source is None:
+                source = workdir / "original"
+                await self.storage.get_file(original_key, source)
+
+            rendered = await self._processor.render(source, digest)
+            if rendered is None:
+                return None
+
+            await asyncio.gather(*(
+                self.storage.put_file(keys[name][image_format], workdir / filename, VARIANT_CONTENT_TYPES[image_format])
+                for name, files in rendered.items()
+                for image_format, filename in files.items()
+            ))
+            logger.info("Generated %d image variants for %s", len(rendered), digest)
+
+        return {
+            name: {image_format: self.storage.url(key) for image_format, key in files.items()}
+            for name, files in keys.items()
+        }
+
+    async def _presign_upload(self, upload: DirectUploadRequest, folder: str) -> DirectUpload:
+        """
+            The client uploads straight to the storage with the returned request. The key is derived
+            from the declared hash, the storage rejects a body that does not match it or the size
+        """
+        image_format = next(
+            (name for name, content_type in IMAGE_CONTENT_TYPES.items() if content_type == upload.content_type),
+            None
+        )
+        if image_format is None:
+            raise InvalidImage(f"Unsupported content type {upload.content_type}")
+        if upload.size > self.max_size:
+            raise self._too_large()
+
+        key = f"{folder}/{upload.sha256}{IMAGE_EXTENSIONS[image_format]}"
+        try:
+            if await self.storage.exists(key):
+                logger.info("Direct upload of %s skipped, already stored", key)
+                return DirectUpload(key=key)
+
+            presigned = await self.storage.presign_upload(
+                key,
+                content_type=upload.content_type,
+                size=upload.size,
+                sha256=base64.b64encode(bytes.fromhex(upload.sha256)).decode(),
+                expires=self.presign_expires
+            )
+        except DirectUploadNotSupported:
+            raise DirectUploadUnavailable()
+        except StorageError as e:
+            logger.error("Image storage failed for %s: %s", key, e)
+            raise ImageStorageUnavailable()
+
+        logger.info("Direct upload of %s presigned", key)
+        return DirectUpload(
+            key=key,
+            url=presigned.url,
+            method=presigned.method,
+            headers=presigned.headers,
+            expires_in=self.presign_expires
+        )
+
+    async def _complete_upload(self, key: str, folder: str) -> StoredImage:
+        """
+            Checks a directly uploaded file before it gets referenced: size and magic bytes, the
+            storage has verified the content hash already
+        """
+        match = re.fullmatch(rf"{folder}/(?P<digest>[0-9a-f]{{64}})(?P<extension>\.\w+)", key)
+        if match is None:
+            raise UploadNotFound(key)
+
+        try:
+            stored = await self.storage.stat(key)
+            if stored is None:
+                raise UploadNotFound(key)
+            if stored.size > self.max_size:
+                await self.storage.delete(key)
+                raise self._too_large()
+
+            image_format = detect_format(await self.storage.read(key, 0, HEADER_SIZE))
+            if image_format is None or IMAGE_EXTENSIONS[image_format] != match["extension"]:
+                logger.warning("Direct upload %s is not a %s image", key, match["extension"])
+                await self.storage.delete(key)
+                raise InvalidImage()
+
+            await self.storage.touch(key)
+            workdir = Path(await run_in_threadpool(tempfile.mkdtemp, None, None, self.staging_dir))
+            try:
+                variants = await self._store_variants(match["digest"], folder, workdir, original_key=key)
+            finally:
+                await run_in_threadpool(shutil.rmtree, workdir, True)
+        except StorageError as e:
+            logger.error("Image storage failed for %s: %s", key, e)
+            raise ImageStorageUnavailable()
+
+        logger.info("Direct upload %s completed", key)
+        return StoredImage(url=self.storage.url(key), variants=variants)
+
+    def _too_large(self) -> ImageTooLarge:
+        logger.warning("Image upload exceeds %d bytes", self.max_size)
+        return ImageTooLarge(self.max_size)
@@ -0,0 +1,20 @@
+from sqlmodel import SQLModel, Field
+
+
+class DirectUploadRequest(SQLModel):
+    content_type: str = Field(description='One of image/jpeg, image/png, image/gif, image/webp, image/heic')
+    size: int = Field(gt=0, description='File size in bytes')
+    sha256: str = Field(regex=r'^[0-9a-f]{64}$', description='Hex SHA-256 of the file')
+
+
+class DirectUpload(SQLModel):
+    key: str
+    # None when the same file is already stored, the client goes straight to completion
+    url: str | None = None
+    method: str = 'PUT'
+    headers: dict[str, str] = {}
+    expires_in: int = 0
+
+
+class DirectUploadComplete(SQLModel):
+    key: str
@@ -0,0 +1,37 @@
+import os
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .garbage import CONTENT_ADDRESSED_NAME
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+        Content-addressed images never change under their URL: they are cached for a year without
+        revalidation and the name, derived from the content hash, is their strong ETag.
+        Other files keep the StaticFiles defaults. Range requests are served by FileResponse
+    """
+    def file_response(
+            self,
+            full_path: str | os.PathLike[str],
+            stat_result: os.stat_result,
+            scope: Scope,
+            status_code: int = 200
+    ) -> Response:
+        name = os.path.basename(full_path)
+        if not CONTENT_ADDRESSED_NAME.match(name):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        headers = {
+            'cache-control': IMMUTABLE_CACHE_CONTROL,
+            'etag': f'"{name.rsplit(".", 1)[0]}"'
+        }
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
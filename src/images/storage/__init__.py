@@ -0,0 +1,4 @@
+from .base import ImageStorage, StoredObject, PresignedUpload, StorageError, DirectUploadNotSupported
+from .local import LocalStorage
+from .s3 import S3Storage
+from .signing import SigV4Signer
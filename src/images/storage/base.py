@@ -0,0 +1,85 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator
+
+
+class StorageError(Exception):
+    pass
+
+
+class DirectUploadNotSupported(StorageError):
+    pass
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    # unix time of the last write
+    modified: float
+
+
+@dataclass(frozen=True)
+class PresignedUpload:
+    url: str
+    method: str
+    # the client must send exactly these headers, they are part of the signature
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class ImageStorage(ABC):
+    """
+        Where image files live. Keys are relative paths such as complaints/<sha256>.jpg,
+        files are written once under a key and never modified
+    """
+    @abstractmethod
+    async def put_file(self, key: str, path: Path, content_type: str) -> None:
+        """
+            Store a local file under key. The local file may be moved, callers must not use it afterwards
+        """
+
+    @abstractmethod
+    async def get_file(self, key: str, path: Path) -> None:
+        pass
+
+    @abstractmethod
+    async def read(self, key: str, start: int, length: int) -> bytes:
+        pass
+
+    @abstractmethod
+    async def stat(self, key: str) -> StoredObject | None:
+        pass
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    @abstractmethod
+    async def touch(self, key: str) -> None:
+        """
+            Refresh the modification time, so the garbage collector grace period applies again
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def list(self, prefix: str) -> AsyncIterator[StoredObject]:
+        pass
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """
+            :return: URL clients download the file from
+        """
+
+    async def presign_upload(self, key: str, content_type: str, size: int, sha256: str, expires: int) -> PresignedUpload:
+        """
+            :param sha256: base64 SHA-256 of the content, the storage rejects a body that does not match
+            :return: request the client sends to upload the file without going through the API
+        """
+        raise DirectUploadNotSupported(f'{type(self).__name__} does not support direct uploads')
+
+    async def close(self) -> None:
+        pass
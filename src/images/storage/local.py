@@ -0,0 +1,93 @@
+import errno
+import os
+import shutil
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+from typing import AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from .base import ImageStorage, StoredObject
+
+
+class LocalStorage(ImageStorage):
+    """
+        Files under root on the API host, served by the /static mount
+    """
+    def __init__(self, root: Path = Path('static'), base_url: str = '/static'):
+        self.root = root
+        self.base_url = base_url.rstrip('/')
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f'Key {key} is outside of the storage root')
+        return path
+
+    async def put_file(self, key: str, path: Path, content_type: str) -> None:
+        await run_in_threadpool(self._put_file, self._path(key), path)
+
+    @staticmethod
+    def _put_file(target: Path, path: Path) -> None:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # another file system: copy next to the target first, so the rename stays atomic,
+            # under a name of its own so concurrent writers of the same key never share it
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as tmp_file, open(path, 'rb') as file:
+                    shutil.copyfileobj(file, tmp_file)
+                os.replace(tmp_name, target)
+            except BaseException:
+                with suppress(FileNotFoundError):
+                    os.remove(tmp_name)
+                raise
+            os.remove(path)
+
+    async def get_file(self, key: str, path: Path) -> None:
+        await run_in_threadpool(shutil.copyfile, self._path(key), path)
+
+    async def read(self, key: str, start: int, length: int) -> bytes:
+        def read() -> bytes:
+            with open(self._path(key), 'rb') as file:
+                file.seek(start)
+                return file.read(length)
+        return await run_in_threadpool(read)
+
+    async def stat(self, key: str) -> StoredObject | None:
+        try:
+            stat_result = await run_in_threadpool(os.stat, self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key=key, size=stat_result.st_size, modified=stat_result.st_mtime)
+
+    async def touch(self, key: str) -> None:
+        await run_in_threadpool(os.utime, self._path(key))
+
+    async def delete(self, key: str) -> None:
+        with suppress(FileNotFoundError):
+            await run_in_threadpool(os.remove, self._path(key))
+
+    async def list(self, prefix: str) -> AsyncIterator[StoredObject]:
+        directory = self._path(prefix)
+        if not directory.is_dir():
+            return
+
+        def scan() -> list[StoredObject]:
+            return [
+                StoredObject(key=f'{prefix.rstrip("/")}/{entry.name}', size=stat.st_size, modified=stat.st_mtime)
+                for entry in os.scandir(directory)
+                if entry.is_file() and (stat := entry.stat())
+            ]
+
+        for stored in await run_in_threadpool(scan):
+            yield stored
+
+    def url(self, key: str) -> str:
+        return f'{self.base_url}/{key}'
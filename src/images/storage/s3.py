@@ -0,0 +1,212 @@
+import datetime
+import hashlib
+import os
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+from pathlib import Path
+from typing import AsyncIterator
+from xml.etree import ElementTree
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from .base import ImageStorage, PresignedUpload, StorageError, StoredObject
+from .signing import SigV4Signer, UNSIGNED_PAYLOAD, canonical_query, canonical_uri
+
+logger = getLogger('fixkg.s3_storage')
+
+
+class S3Storage(ImageStorage):
+    """
+        S3-compatible object storage (AWS S3, MinIO, Ceph, R2) over plain HTTP with SigV4 signing
+        and path-style URLs. Files larger than part_size are sent as a multipart upload with one
+        part in memory at a time; S3 requires parts of at least 5 MiB except the last one.
+    """
+    def __init__(
+            self,
+            endpoint_url: str,
+            bucket: str,
+            access_key: str,
+            secret_key: str,
+            region: str = 'us-east-1',
+            public_base_url: str | None = None,
+            part_size: int = 8 * 1024 * 1024,
+            timeout: float = 30,
+            client: httpx.AsyncClient | None = None
+    ):
+        self.endpoint = httpx.URL(endpoint_url.rstrip('/'))
+        self.bucket = bucket
+        self.public_base_url = (public_base_url or f'{self.endpoint}/{bucket}').rstrip('/')
+        self.part_size = part_size
+        self._signer = SigV4Signer(access_key, secret_key, region)
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=timeout)
+
+    @property
+    def _host(self) -> str:
+        return self.endpoint.netloc.decode()
+
+    def _path(self, key: str = '') -> str:
+        return f'{self.endpoint.path.rstrip("/")}/{self.bucket}/{key}'.rstrip('/')
+
+    def _url(self, path: str, query: dict[str, str] | None = None) -> httpx.URL:
+        raw_path = canonical_uri(path) + (f'?{canonical_query(query)}' if query else '')
+        return self.endpoint.copy_with(raw_path=raw_path.encode())
+
+    async def _request(
+            self,
+            method: str,
+            key: str = '',
+            query: dict[str, str] | None = None,
+            headers: dict[str, str] | None = None,
+            content: bytes = b'',
+            payload_hash: str | None = None,
+            expected: tuple[int, ...] = (200,),
+            stream: bool = False
+    ) -> httpx.Response:
+        path = self._path(key)
+        signed_headers = self._signer.sign_headers(
+            method,
+            self._host,
+            path,
+            query=query,
+            headers=headers,
+            payload_hash=payload_hash or hashlib.sha256(content).hexdigest()
+        )
+        request = self._client.build_request(method, self._url(path, query), headers=signed_headers, content=content)
+        try:
+            response = await self._client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            raise StorageError(f'{method} {key or self.bucket} failed: {e}') from e
+
+        if response.status_code not in expected:
+            body = (await response.aread()).decode(errors='replace')
+            await response.aclose()
+            raise StorageError(f'{method} {key or self.bucket} failed with {response.status_code}: {body[:300]}')
+        return response
+
+    async def put_file(self, key: str, path: Path, content_type: str) -> None:
+        # file system calls run in the thread pool like the reads, a slow disk must not stall the loop
+        size = await run_in_threadpool(os.path.getsize, path)
+        if size <= self.part_size:
+            content = await run_in_threadpool(path.read_bytes)
+            await self._request('PUT', key, headers={'content-type': content_type}, content=content, payload_hash=UNSIGNED_PAYLOAD)
+        else:
+            await self._multipart_upload(key, path, content_type)
+        logger.info('Stored %s, %d bytes', key, size)
+
+    async def _multipart_upload(self, key: str, path: Path, content_type: str) -> None:
+        response = await self._request('POST', key, query={'uploads': ''}, headers={'content-type': content_type})
+        upload_id = _find_text(response.content, 'UploadId')
+        parts = []
+        try:
+            file = await run_in_threadpool(open, path, 'rb')
+            try:
+                while part := await run_in_threadpool(file.read, self.part_size):
+                    part_number = len(parts) + 1
+                    response = await self._request(
+                        'PUT',
+                        key,
+                        query={'partNumber': str(part_number), 'uploadId': upload_id},
+                        content=part,
+                        payload_hash=UNSIGNED_PAYLOAD
+                    )
+                    parts.append((part_number, response.headers['etag']))
+            finally:
+                await run_in_threadpool(file.close)
+
+            body = ''.join(f'<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>' for number, etag in parts)
+            response = await self._request(
+                'POST',
+                key,
+                query={'uploadId': upload_id},
+                content=f'<CompleteMultipartUpload>{body}</CompleteMultipartUpload>'.encode()
+            )
+            # S3 may report a failed completion with status 200 and an error document
+            if b'<Error>' in response.content:
+                raise StorageError(f'Completing the upload of {key} failed: {response.text[:300]}')
+        except BaseException:
+            try:
+                await self._request('DELETE', key, query={'uploadId': upload_id}, expected=(200, 204, 404))
+            except StorageError as e:
+                logger.warning('Could not abort the multipart upload of %s: %s', key, e)
+            raise
+
+    async def get_file(self, key: str, path: Path) -> None:
+        response = await self._request('GET', key, stream=True)
+        try:
+            file = await run_in_threadpool(open, path, 'wb')
+            try:
+                async for chunk in response.aiter_bytes():
+                    await run_in_threadpool(file.write, chunk)
+            finally:
+                await run_in_threadpool(file.close)
+        finally:
+            await response.aclose()
+
+    async def read(self, key: str, start: int, length: int) -> bytes:
+        response = await self._request('GET', key, headers={'range': f'bytes={start}-{start + length - 1}'}, expected=(200, 206))
+        return response.content[:length]
+
+    async def stat(self, key: str) -> StoredObject | None:
+        response = await self._request('HEAD', key, expected=(200, 404))
+        if response.status_code == 404:
+            return None
+        return StoredObject(
+            key=key,
+            size=int(response.headers.get('content-length', 0)),
+            modified=parsedate_to_datetime(response.headers['last-modified']).timestamp()
+        )
+
+    async def touch(self, key: str) -> None:
+        # copying an object onto itself with new metadata is the only way to update its modification time
+        response = await self._request('HEAD', key)
+        await self._request('PUT', key, headers={
+            'x-amz-copy-source': canonical_uri(f'/{self.bucket}/{key}'),
+            'x-amz-metadata-directive': 'REPLACE',
+            'content-type': response.headers.get('content-type', 'application/octet-stream')
+        })
+
+    async def delete(self, key: str) -> None:
+        await self._request('DELETE', key, expected=(200, 204, 404))
+
+    async def list(self, prefix: str) -> AsyncIterator[StoredObject]:
+        query = {'list-type': '2', 'prefix': f'{prefix.rstrip("/")}/'}
+        while True:
+            response = await self._request('GET', query=query)
+            root = ElementTree.fromstring(response.content)
+            for item in root.findall('{*}Contents'):
+                yield StoredObject(
+                    key=item.findtext('{*}Key'),
+                    size=int(item.findtext('{*}Size', '0')),
+                    modified=datetime.datetime.fromisoformat(item.findtext('{*}LastModified')).timestamp()
+                )
+            token = root.findtext('{*}NextContinuationToken')
+            if root.findtext('{*}IsTruncated') != 'true' or not token:
+                return
+            query = {**query, 'continuation-token': token}
+
+    def url(self, key: str) -> str:
+        return f'{self.public_base_url}/{key}'
+
+    async def presign_upload(self, key: str, content_type: str, size: int, sha256: str, expires: int) -> PresignedUpload:
+        headers = {
+            'content-type': content_type,
+            'content-length': str(size),
+            # S3 rejects the upload when the body does not hash to this value
+            'x-amz-checksum-sha256': sha256
+        }
+        path = self._path(key)
+        query = self._signer.presign('PUT', self._host, path, expires, headers=headers)
+        return PresignedUpload(url=str(self._url(path, query)), method='PUT', headers=headers)
+
+    async def close(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+
+def _find_text(document: bytes, tag: str) -> str:
+    value = ElementTree.fromstring(document).findtext(f'{{*}}{tag}')
+    if value is None:
+        raise StorageError(f'{tag} is missing in the storage response')
+    return value
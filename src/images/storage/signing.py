@@ -0,0 +1,138 @@
+"""
+AWS Signature Version 4 for S3-compatible storage (AWS S3, MinIO, Ceph, R2...)
+"""
+import datetime
+import hashlib
+import hmac
+from urllib.parse import quote
+
+ALGORITHM = 'AWS4-HMAC-SHA256'
+UNSIGNED_PAYLOAD = 'UNSIGNED-PAYLOAD'
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b'').hexdigest()
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _uri_encode(value: str, safe: str = '-_.~') -> str:
+    return quote(value, safe=safe)
+
+
+def canonical_uri(path: str) -> str:
+    """
+        :return: the path percent-encoded once, as it is sent and as it is signed
+    """
+    return _uri_encode(path, safe='/-_.~')
+
+
+def canonical_query(params: dict[str, str]) -> str:
+    return '&'.join(
+        f'{_uri_encode(name)}={_uri_encode(value)}'
+        for name, value in sorted(params.items())
+    )
+
+
+class SigV4Signer:
+    def __init__(self, access_key: str, secret_key: str, region: str = 'us-east-1', service: str = 's3'):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _scope(self, date: str) -> str:
+        return f'{date}/{self.region}/{self.service}/aws4_request'
+
+    def _signature(self, amz_date: str, canonical_request: str) -> str:
+        date = amz_date[:8]
+        string_to_sign = '\n'.join((
+            ALGORITHM,
+            amz_date,
+            self._scope(date),
+            hashlib.sha256(canonical_request.encode()).hexdigest()
+        ))
+        key = _hmac(f'AWS4{self.secret_key}'.encode(), date)
+        for part in (self.region, self.service, 'aws4_request'):
+            key = _hmac(key, part)
+        return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def _canonical_request(
+            method: str,
+            path: str,
+            query: dict[str, str],
+            headers: dict[str, str],
+            payload_hash: str
+    ) -> tuple[str, str]:
+        """
+            :param path: the path before percent-encoding, it is encoded here exactly once
+            :return: canonical request and the signed header names
+        """
+        normalized = {name.lower(): ' '.join(str(value).split()) for name, value in headers.items()}
+        signed_headers = ';'.join(sorted(normalized))
+        canonical_headers = ''.join(f'{name}:{normalized[name]}\n' for name in sorted(normalized))
+        canonical_request = '\n'.join((
+            method,
+            canonical_uri(path),
+            canonical_query(query),
+            canonical_headers,
+            signed_headers,
+            payload_hash
+        ))
+        return canonical_request, signed_headers
+
+    def sign_headers(
+            self,
+            method: str,
+            host: str,
+            path: str,
+            query: dict[str, str] | None = None,
+            headers: dict[str, str] | None = None,
+            payload_hash: str = EMPTY_PAYLOAD_HASH,
+            now: datetime.datetime | None = None
+    ) -> dict[str, str]:
+        """
+            :return: request headers including x-amz-date, x-amz-content-sha256 and Authorization
+        """
+        amz_date = (now or datetime.datetime.now(datetime.UTC)).strftime('%Y%m%dT%H%M%SZ')
+        headers = {
+            **(headers or {}),
+            'host': host,
+            'x-amz-content-sha256': payload_hash,
+            'x-amz-date': amz_date
+        }
+        canonical_request, signed_headers = self._canonical_request(method, path, query or {}, headers, payload_hash)
+        signature = self._signature(amz_date, canonical_request)
+        headers['Authorization'] = (
+            f'{ALGORITHM} Credential={self.access_key}/{self._scope(amz_date[:8])}, '
+            f'SignedHeaders={signed_headers}, Signature={signature}'
+        )
+        del headers['host']
+        return headers
+
+    def presign(
+            self,
+            method: str,
+            host: str,
+            path: str,
+            expires: int,
+            headers: dict[str, str] | None = None,
+            now: datetime.datetime | None = None
+    ) -> dict[str, str]:
+        """
+            Query string authentication: whoever holds the URL can send this request until it
+            expires, with exactly the given headers.
+            :return: query parameters to append to the URL
+        """
+        amz_date = (now or datetime.datetime.now(datetime.UTC)).strftime('%Y%m%dT%H%M%SZ')
+        headers = {**(headers or {}), 'host': host}
+        query = {
+            'X-Amz-Algorithm': ALGORITHM,
+            'X-Amz-Credential': f'{self.access_key}/{self._scope(amz_date[:8])}',
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(expires),
+            'X-Amz-SignedHeaders': ';'.join(sorted(name.lower() for name in headers))
+        }
+        canonical_request, _ = self._canonical_request(method, path, query, headers, UNSIGNED_PAYLOAD)
+        query['X-Amz-Signature'] = self._signature(amz_date, canonical_request)
+        return query
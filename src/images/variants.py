@@ -0,0 +1,103 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from logging import getLogger
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from .garbage import TEMPORARY_SUFFIX
+
+logger = getLogger('fixkg.image_processor')
+
+# variant name: longest side in pixels
+DEFAULT_SIZES = {'thumb': 320, 'medium': 1280}
+
+# format name in the URLs: (Pillow format, file extension)
+VARIANT_FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+
+type Variants = dict[str, dict[str, str]]
+
+
+def variant_file_names(stem: str, sizes: dict[str, int]) -> Variants:
+    """
+        :return: {variant name: {format: file name}}, e.g. {'thumb': {'webp': '<sha256>_thumb.webp'}}
+    """
+    return {
+        name: {format_name: f'{stem}_{name}.{extension}' for format_name, (_, extension) in VARIANT_FORMATS.items()}
+        for name in sizes
+    }
+
+
+def render_variants(source: str, stem: str, sizes: dict[str, int], quality: int) -> Variants:
+    """
+        Runs in a worker process. Writes every size in every format next to the source,
+        without EXIF (location, camera) and with the EXIF orientation applied to the pixels.
+        :return: file names as in variant_file_names
+    """
+    directory = Path(source).parent
+    variants = variant_file_names(stem, sizes)
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.mode in ('LA', 'P', 'PA') else 'RGB')
+
+        for name, size in sizes.items():
+            resized = image.copy()
+            # never upscales, keeps the aspect ratio
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+            for format_name, (image_format, _) in VARIANT_FORMATS.items():
+                variant = resized.convert('RGB') if image_format == 'JPEG' and resized.mode != 'RGB' else resized
+                filename = variants[name][format_name]
+                tmp_path = directory / f'.{filename}{TEMPORARY_SUFFIX}'
+                # metadata is only written when passed explicitly, so the variant has none
+                variant.save(tmp_path, image_format, quality=quality, optimize=True)
+                os.replace(tmp_path, directory / filename)
+
+    return variants
+
+
+class ImageProcessor:
+    """
+        Generates resized variants of uploaded images in a process pool, decoding and resizing
+        a phone photo is CPU bound and would block the event loop or hold the GIL in a thread.
+        The pool is started on first use, with spawn so no event loop state is forked into workers.
+    """
+    def __init__(self, sizes: dict[str, int] | None = None, quality: int = 80, pool_size: int = 2):
+        self.sizes = sizes or DEFAULT_SIZES
+        self.quality = quality
+        self.pool_size = pool_size
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def file_names(self, stem: str) -> Variants:
+        return variant_file_names(stem, self.sizes)
+
+    async def render(self, source: Path, stem: str) -> Variants | None:
+        """
+            :return: file names of the variants, None if the image can not be decoded
+        """
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool(),
+                partial(render_variants, str(source), stem, self.sizes, self.quality)
+            )
+        except Exception as e:
+            logger.error('Could not generate variants for %s: %s', source, e)
+            return None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info('Image processor pool shut down')
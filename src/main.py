@@ -1,34 +1,59 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from starlette.staticfiles import StaticFiles
 
 from logger import register_logger
 from src import register_middleware
-from src.core import redis_client, database_helper
+from src.core import redis_client, database_helper, settings
+from src.core.hashing import password_hasher
+from src.core.images import image_processor, image_storage
+from src.images import ImmutableStaticFiles, LocalStorage
+from src.core.outbox import outbox_worker
+from src.core.smtp import smtp_pool
+from src.websocket import broker, manager
 from src.auth.routes import router as auth_router
 from src.websocket.routes import router as websocket_router
 from src.users.routes import router as user_router
 from src.complaints.complaint_routes import router as complaint_router
 from src.comments.routes import router as comment_router
+from src.monitoring.routes import router as monitoring_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await redis_client.connect()
+    await broker.start()
+    if settings.outbox.run_in_process:
+        outbox_worker.start()
 
     yield
 
+    await outbox_worker.stop()
+    await smtp_pool.close()
+    await broker.stop()
+    await manager.close()
     await redis_client.close()
     await database_helper.dispose()
+    password_hasher.shutdown()
+    image_processor.shutdown()
+    await image_storage.close()
 
 app = FastAPI(lifespan=lifespan)
 
-app.mount('/static', StaticFiles(directory="static"), name='static')
+if isinstance(image_storage, LocalStorage):
+    # with S3 storage clients download images from the bucket or CDN, not through the API
+    app.mount(image_storage.base_url, ImmutableStaticFiles(directory=image_storage.root), name='static')
 
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(complaint_router)
 app.include_router(comment_router)
 app.include_router(websocket_router)
+app.include_router(monitoring_router)
 
 register_middleware(app)
-register_logger()
\ No newline at end of file
+register_logger(
+    level=settings.logging.level,
+    console_level=settings.logging.console_level,
+    filename=settings.logging.filename,
+    json_format=settings.logging.json_format,
+    sample_rates=settings.logging.sample_rates
+)
\ No newline at end of file
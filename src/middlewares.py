@@ -1,47 +1,169 @@
+import random
 import time
 from logging import getLogger
-from typing import Callable, Awaitable
 
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
 
+from src.common import metrics, server_timing
 from src.core import settings
-
-type CallNext = Callable[[Request], Awaitable[Response]]
+from src.core.database_helper import count_queries
 
 logger = getLogger('fixkg.middlewares')
 
-def register_middleware(app: FastAPI):
+HTTP_REQUESTS = metrics.counter('http_requests_total', 'HTTP requests by route and status', labels=('method', 'route', 'status'))
+HTTP_REQUEST_DURATION = metrics.histogram('http_request_duration_seconds', 'Time until the response starts, by route', labels=('method', 'route'))
+HTTP_REQUESTS_IN_PROGRESS = metrics.gauge('http_requests_in_progress', 'HTTP requests being processed')
+
+
+class RequestLoggingMiddleware:
+    """
+        Pure ASGI middleware: logs the request and response and sets X-process-time in one pass,
+        without the extra task and response streaming of @app.middleware('http').
+        Headers are logged only with log_headers, they are large and may carry credentials
+    """
+    def __init__(self, app: ASGIApp, log_headers: bool = False):
+        self.app = app
+        self.log_headers = log_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
 
-    @app.middleware('http')
-    async def log_new_request_and_response(
-            request: Request,
-            call_next: CallNext
-    ) -> Response:
-        logger.info('REQUESTS - %s - %s - %s - %s', request.method, request.url, request.client.host, request.headers)
-
-        response: Response = await call_next(request)
-        logger.info('RESPONSE - %d - %s', response.status_code, response.headers)
-        return response
-
-    @app.middleware('http')
-    async def add_process_time_to_requests(
-            request: Request,
-            call_next: CallNext
-    ) -> Response:
         start = time.perf_counter()
-        response = await call_next(request)
-        process_time = time.perf_counter() - start
+        client = scope.get('client')
+        path = scope['path']
+        if scope.get('query_string'):
+            path = f"{path}?{scope['query_string'].decode('latin-1')}"
+
+        if self.log_headers:
+            logger.info('REQUESTS - %s - %s - %s - %s', scope['method'], path, client[0] if client else None, scope['headers'])
+        else:
+            logger.info('REQUESTS - %s - %s - %s', scope['method'], path, client[0] if client else None)
+
+        async def send_with_process_time(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                process_time = time.perf_counter() - start
+                headers = list(message.get('headers', []))
+                headers.append((b'x-process-time', f'Process time: {process_time:.5f}'.encode()))
+                message['headers'] = headers
+
+                if self.log_headers:
+                    logger.info('RESPONSE - %d - %.5f - %s', message['status'], process_time, headers)
+                else:
+                    logger.info('RESPONSE - %d - %.5f', message['status'], process_time)
+            await send(message)
+
+        await self.app(scope, receive, send_with_process_time)
+
+
+class MetricsMiddleware:
+    """
+        Pure ASGI middleware counting requests per route template, so path parameters
+        do not create a label per complaint id
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+
+        async def send_with_metrics(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                # the router stores the matched route in the scope
+                route = getattr(scope.get('route'), 'path', 'unmatched')
+                HTTP_REQUESTS.inc(scope['method'], route, str(message['status']))
+                HTTP_REQUEST_DURATION.observe(scope['method'], route, value=time.perf_counter() - start)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+
 
-        response.headers['X-process-time'] = f'Process time: {process_time:.5f}'
-        return response
+class ServerTimingMiddleware:
+    """
+        Adds a Server-Timing header with db, redis, endpoint and serialize phases.
+        Collection is opt-in: requests sending request_header, or a sample_rate share of all requests
+    """
+    def __init__(self, app: ASGIApp, request_header: str = 'X-Debug-Timing', sample_rate: float = 0.0):
+        self.app = app
+        self.request_header = request_header.lower().encode()
+        self.sample_rate = sample_rate
+
+    def _enabled(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        return any(name == self.request_header for name, _ in scope['headers'])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not self._enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timings = server_timing.start_request()
+
+        async def send_with_server_timing(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', timings.header(time.perf_counter()).encode()))
+                message['headers'] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_server_timing)
+
+
+class QueryCountMiddleware:
+    """
+        Warns about requests that run too many statements or repeat one, see count_queries
+    """
+    def __init__(self, app: ASGIApp, warn_threshold: int = 0, warn_on_duplicates: bool = False):
+        self.app = app
+        self.warn_threshold = warn_threshold
+        self.warn_on_duplicates = warn_on_duplicates
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as queries:
+            await self.app(scope, receive, send)
+
+        route = getattr(scope.get('route'), 'path', scope['path'])
+        if self.warn_threshold and queries.count > self.warn_threshold:
+            logger.warning('%s %s ran %d SQL statements', scope['method'], route, queries.count)
+        if self.warn_on_duplicates and (duplicates := queries.duplicates()):
+            logger.warning('%s %s repeated SQL statements: %s', scope['method'], route, duplicates)
+
+
+def register_middleware(app: FastAPI):
+    if settings.query_count.warn_threshold or settings.query_count.warn_on_duplicates:
+        app.add_middleware(
+            QueryCountMiddleware,
+            warn_threshold=settings.query_count.warn_threshold,
+            warn_on_duplicates=settings.query_count.warn_on_duplicates
+        )
+    app.add_middleware(
+        ServerTimingMiddleware,
+        request_header=settings.server_timing.request_header,
+        sample_rate=settings.server_timing.sample_rate
+    )
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(RequestLoggingMiddleware, log_headers=settings.LOG_HEADERS)
 
     app.add_middleware(
         CORSMiddleware,
         allow_origins = settings.ALLOW_ORIGINS,
         allow_methods = settings.ALLOW_METHODS,
-        allow_headers = settings.ALLOW_HEADERS
+        allow_headers = settings.ALLOW_HEADERS,
+        expose_headers = settings.EXPOSE_HEADERS
     )
-
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from src.common import metrics
+
+router = APIRouter(
+    tags=['Monitoring']
+)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics() -> Response:
+    return Response(content=metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,4 +1,7 @@
 from .schemas import EmailNotificationSchema
 from .notification_strategy import NotificationStrategy
+from .models import NotificationOutbox, NotificationChannel, OutboxStatus
+from .outbox import OutboxRepository
+from .outbox_worker import OutboxWorker
+from .smtp_pool import SMTPPool
 from .email_notification import EmailNotification
-from .services import NotificationService
\ No newline at end of file
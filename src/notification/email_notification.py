@@ -1,40 +1,37 @@
 from logging import getLogger
 from email.message import EmailMessage
-import aiosmtplib
 
-from src.core import settings
 from .notification_strategy import NotificationStrategy
+from .smtp_pool import SMTPPool
 
 logger = getLogger('fixkg.email_notification')
 
 class EmailNotification(NotificationStrategy):
-    def __init__(self):
-        self.smtp_host = settings.smtp.hostname
-        self.smtp_port = settings.smtp.port
-        self.smtp_user = settings.smtp.user_email
-        self.smtp_password = settings.smtp.password
-        logger.info("EmailNotification initialized with SMTP host: %s, port: %d", self.smtp_host, self.smtp_port)
+    def __init__(self, pool: SMTPPool, sender: str | None = None):
+        self.pool = pool
+        self.smtp_user = sender or pool.username
+        logger.info("EmailNotification initialized with SMTP host: %s, port: %d", pool.hostname, pool.port)
 
-    async def notify(self, recipient: str, subject: str, message: str) -> bool:
+    def _build_email(self, recipient: str, subject: str, message: str) -> EmailMessage:
         email = EmailMessage()
         email["From"] = self.smtp_user
         email["To"] = recipient
         email["Subject"] = subject
         email.set_content(message)
+        return email
+
+    async def notify(self, recipient: str, subject: str, message: str) -> bool:
+        [sent] = await self.notify_many([(recipient, subject, message)])
+        return sent
+
+    async def notify_many(self, notifications: list[tuple[str, str, str]]) -> list[bool]:
+        logger.info("Attempting to send %d emails", len(notifications))
+
+        errors = await self.pool.send_all(self._build_email(*notification) for notification in notifications)
 
-        logger.info("Attempting to send email to %s with subject: %s", recipient, subject)
-
-        try:
-            await aiosmtplib.send(
-                email,
-                hostname=self.smtp_host,
-                port=self.smtp_port,
-                start_tls=True,
-                username=self.smtp_user,
-                password=self.smtp_password
-            )
-            logger.info("Email successfully sent to %s", recipient)
-            return True
-        except aiosmtplib.SMTPException as e:
-            logger.error("Failed to send email to %s: %s", recipient, str(e))
-            return False
+        for (recipient, subject, _), error in zip(notifications, errors):
+            if error is None:
+                logger.info("Email successfully sent to %s", recipient)
+            else:
+                logger.error("Failed to send email to %s: %s", recipient, str(error))
+        return [error is None for error in errors]
@@ -0,0 +1,43 @@
+import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import Column, Index, Text
+from sqlmodel import SQLModel, Field
+
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+
+
+class NotificationChannel(str, Enum):
+    EMAIL = 'email'
+    WEBSOCKET = 'websocket'
+
+
+class OutboxStatus(str, Enum):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+
+class NotificationOutbox(SQLModel, table=True):
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        Index('ix_notification_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+        {"extend_existing": True}
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True, nullable=False)
+    channel: NotificationChannel = Field(nullable=False)
+    recipient: str = Field(nullable=False)
+    subject: str = Field(nullable=False)
+    message: str = Field(sa_column=Column(Text, nullable=False))
+    # the message is blanked once the notification is sent or given up, e.g. it carries a one-time code
+    sensitive: bool = Field(default=False, nullable=False)
+    status: OutboxStatus = Field(default=OutboxStatus.PENDING, nullable=False)
+    attempts: int = Field(default=0, nullable=False)
+    next_attempt_at: datetime.datetime = Field(default_factory=utcnow, nullable=False)
+    last_error: Optional[str] = Field(default=None, nullable=True)
+    created_at: datetime.datetime = Field(default_factory=utcnow, nullable=False)
+    sent_at: Optional[datetime.datetime] = Field(default=None, nullable=True)
@@ -4,4 +4,11 @@ from abc import ABC, abstractmethod
 class NotificationStrategy(ABC):
     @abstractmethod
     async def notify(self, recipient: str, subject: str, message: str) -> bool:
-        pass
\ No newline at end of file
+        pass
+
+    async def notify_many(self, notifications: list[tuple[str, str, str]]) -> list[bool]:
+        """
+            Deliver a batch of (recipient, subject, message), strategies override it when
+            a batch is cheaper than separate calls
+        """
+        return [await self.notify(*notification) for notification in notifications]
@@ -0,0 +1,101 @@
+import datetime
+import logging
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import delete, select
+
+from src.common import BaseRepository, db_exception_handler
+from .models import NotificationOutbox, NotificationChannel, OutboxStatus
+
+logger = logging.getLogger('fixkg.notification_outbox')
+
+
+class OutboxRepository(BaseRepository):
+    """
+        Notifications are written to the outbox table in the transaction of the domain change
+        and delivered later by OutboxWorker, so request latency never includes SMTP or WebSocket
+    """
+    def __init__(self, db: AsyncSession, on_enqueue: Callable[[], None] | None = None):
+        super().__init__(db)
+        self._on_enqueue = on_enqueue
+
+    def add(
+            self,
+            channel: NotificationChannel,
+            recipient: str,
+            subject: str,
+            message: str,
+            sensitive: bool = False
+    ) -> NotificationOutbox:
+        """
+            Stage the notification in the current transaction, it is saved by the caller's commit.
+            The message of a sensitive notification is not kept after delivery
+        """
+        entry = NotificationOutbox(channel=channel, recipient=recipient, subject=subject, message=message, sensitive=sensitive)
+        self.db.add(entry)
+        logger.debug('Notification for %s staged in outbox via %s', recipient, channel.value)
+        return entry
+
+    @db_exception_handler
+    async def enqueue(
+            self,
+            channel: NotificationChannel,
+            recipient: str,
+            subject: str,
+            message: str,
+            sensitive: bool = False
+    ) -> NotificationOutbox:
+        entry = self.add(channel, recipient, subject, message, sensitive)
+        await self.db.commit()
+        self.wake()
+        return entry
+
+    def wake(self) -> None:
+        """
+            Tell the in-process worker there is a committed notification, call after commit
+        """
+        if self._on_enqueue is not None:
+            self._on_enqueue()
+
+    @db_exception_handler
+    async def claim_batch(self, limit: int, now: datetime.datetime, lease: float) -> list[NotificationOutbox]:
+        """
+            Leases due pending notifications: they are locked only while next_attempt_at is moved
+            lease seconds ahead and committed, so concurrent workers skip them without a transaction
+            staying open during delivery. If the worker dies, they are due again when the lease ends.
+            :return: leased notifications
+        """
+        stmt = (
+            select(NotificationOutbox)
+            .where(
+                NotificationOutbox.status == OutboxStatus.PENDING,
+                NotificationOutbox.next_attempt_at <= now
+            )
+            .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        entries = list(await self.db.scalars(stmt))
+        lease_until = now + datetime.timedelta(seconds=lease)
+        for entry in entries:
+            entry.next_attempt_at = lease_until
+        await self.db.commit()
+        logger.debug('Claimed %d outbox notifications until %s', len(entries), lease_until)
+        return entries
+
+    @db_exception_handler
+    async def purge(self, before: datetime.datetime) -> int:
+        """
+            Deletes sent and failed notifications created before the given time
+            :return: number of deleted notifications
+        """
+        result = await self.db.execute(
+            delete(NotificationOutbox).where(
+                NotificationOutbox.status.in_([OutboxStatus.SENT, OutboxStatus.FAILED]),
+                NotificationOutbox.created_at < before
+            )
+        )
+        await self.db.commit()
+        logger.info('Purged %d delivered or failed outbox notifications', result.rowcount)
+        return result.rowcount
@@ -0,0 +1,173 @@
+import asyncio
+import datetime
+import logging
+import random
+from collections import defaultdict
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.common import metrics
+
+from .models import NotificationOutbox, NotificationChannel, OutboxStatus, utcnow
+from .notification_strategy import NotificationStrategy
+from .outbox import OutboxRepository
+
+logger = logging.getLogger('fixkg.outbox_worker')
+
+NOTIFICATIONS = metrics.counter('notifications_total', 'Outbox delivery attempts by outcome: sent, retry or failed', labels=('channel', 'outcome'))
+
+
+class OutboxWorker:
+    """
+        Drains the notification outbox in batches. A failed delivery is retried with
+        exponential backoff and jitter, after max_attempts the notification is marked failed.
+        A batch is leased in one short transaction and its outcomes saved in another, no
+        transaction or connection is held while SMTP or WebSocket delivery runs. Sent and failed
+        notifications older than retention are purged every purge_interval.
+        Runs as a task of the API process or on its own, see src/outbox_worker.py
+    """
+    def __init__(
+            self,
+            session_factory: async_sessionmaker,
+            strategies: dict[NotificationChannel, NotificationStrategy],
+            batch_size: int = 50,
+            poll_interval: float = 1.0,
+            max_attempts: int = 5,
+            backoff_base: float = 2.0,
+            backoff_max: float = 300.0,
+            lease_timeout: float = 600.0,
+            retention: float = 7 * 24 * 3600,
+            purge_interval: float = 3600.0
+    ):
+        self._session_factory = session_factory
+        self._strategies = strategies
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_timeout = lease_timeout
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def backoff(self, attempts: int) -> float:
+        """
+            :return: seconds before the next attempt, the upper bound doubles after every failure
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+            logger.info('Outbox worker started')
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info('Outbox worker stopped')
+
+    async def run_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if loop.time() >= self._next_purge:
+                    self._next_purge = loop.time() + self.purge_interval
+                    await self.purge()
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error('Outbox batch failed: %s', e)
+                processed = 0
+
+            if processed < self.batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """
+            Deliver one batch of due notifications
+            :return: number of notifications processed
+        """
+        async with self._session_factory() as session:
+            entries = await OutboxRepository(session).claim_batch(self.batch_size, utcnow(), self.lease_timeout)
+        if not entries:
+            return 0
+
+        by_channel: dict[NotificationChannel, list[NotificationOutbox]] = defaultdict(list)
+        for entry in entries:
+            by_channel[entry.channel].append(entry)
+        for channel, group in by_channel.items():
+            await self._deliver(channel, group)
+
+        async with self._session_factory() as session:
+            # the detached entries carry their changes, adding them back issues the UPDATEs
+            session.add_all(entries)
+            await session.commit()
+
+        logger.info('Outbox batch of %d notifications processed', len(entries))
+        return len(entries)
+
+    async def purge(self) -> int:
+        """
+            :return: number of sent and failed notifications deleted
+        """
+        async with self._session_factory() as session:
+            return await OutboxRepository(session).purge(utcnow() - datetime.timedelta(seconds=self.retention))
+
+    async def _deliver(self, channel: NotificationChannel, entries: list[NotificationOutbox]) -> None:
+        strategy = self._strategies.get(channel)
+        try:
+            if strategy is None:
+                raise LookupError(f'No strategy for channel {channel}')
+            delivered = await strategy.notify_many([(e.recipient, e.subject, e.message) for e in entries])
+            errors = [None] * len(entries)
+        except Exception as e:
+            delivered, errors = [False] * len(entries), [str(e)] * len(entries)
+
+        for entry, sent, error in zip(entries, delivered, errors):
+            self._record(entry, sent, error)
+
+    @staticmethod
+    def _scrub(entry: NotificationOutbox) -> None:
+        # the row stays for the retention period, a one-time code must not
+        if entry.sensitive:
+            entry.message = ''
+
+    def _record(self, entry: NotificationOutbox, delivered: bool, error: str | None) -> None:
+        now = utcnow()
+        if delivered:
+            entry.status = OutboxStatus.SENT
+            entry.sent_at = now
+            entry.last_error = None
+            self._scrub(entry)
+            NOTIFICATIONS.inc(entry.channel.value, 'sent')
+            return
+
+        entry.attempts += 1
+        entry.last_error = error or 'Delivery failed'
+        if entry.attempts >= self.max_attempts:
+            entry.status = OutboxStatus.FAILED
+            self._scrub(entry)
+            NOTIFICATIONS.inc(entry.channel.value, 'failed')
+            logger.error('Notification %d to %s failed after %d attempts: %s', entry.id, entry.recipient, entry.attempts, entry.last_error)
+            return
+
+        NOTIFICATIONS.inc(entry.channel.value, 'retry')
+        entry.next_attempt_at = now + datetime.timedelta(seconds=self.backoff(entry.attempts))
+        logger.warning('Notification %d to %s failed, retry at %s: %s', entry.id, entry.recipient, entry.next_attempt_at, entry.last_error)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from typing import Iterable
+
+import aiosmtplib
+
+logger = logging.getLogger('fixkg.smtp_pool')
+
+
+@dataclass
+class _PooledClient:
+    client: aiosmtplib.SMTP
+    last_used: float = field(default_factory=time.monotonic)
+    sent: int = 0
+
+
+class SMTPPool:
+    """
+        Keeps authenticated SMTP connections open between emails, so connect, STARTTLS and AUTH
+        are paid once per connection instead of once per message.
+        An idle connection is checked with NOOP before reuse, a dropped one is replaced transparently.
+    """
+    def __init__(
+            self,
+            hostname: str,
+            port: int,
+            username: str | None = None,
+            password: str | None = None,
+            size: int = 4,
+            start_tls: bool = True,
+            timeout: float = 30,
+            max_idle: float = 60,
+            health_check_after: float = 5,
+            max_messages_per_connection: int = 100
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.start_tls = start_tls
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: list[_PooledClient] = []
+        self._semaphore = asyncio.Semaphore(size)
+        self.connections_opened = 0
+
+    async def _connect(self) -> _PooledClient:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        await client.connect()
+        if self.username:
+            try:
+                await client.login(self.username, self.password)
+            except aiosmtplib.SMTPException:
+                client.close()
+                raise
+
+        self.connections_opened += 1
+        logger.debug('SMTP connection to %s:%d opened', self.hostname, self.port)
+        return _PooledClient(client)
+
+    @staticmethod
+    async def _close(pooled: _PooledClient) -> None:
+        try:
+            if pooled.client.is_connected:
+                await pooled.client.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            pooled.client.close()
+
+    async def _checkout(self) -> _PooledClient:
+        while self._idle:
+            pooled = self._idle.pop()
+            idle_for = time.monotonic() - pooled.last_used
+
+            if not pooled.client.is_connected or idle_for > self.max_idle:
+                await self._close(pooled)
+                continue
+
+            if idle_for > self.health_check_after:
+                try:
+                    await pooled.client.noop()
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    logger.info('Idle SMTP connection failed health check, reconnecting: %s', e)
+                    await self._close(pooled)
+                    continue
+            return pooled
+
+        return await self._connect()
+
+    def _checkin(self, pooled: _PooledClient | None) -> None:
+        if pooled is not None:
+            pooled.last_used = time.monotonic()
+            self._idle.append(pooled)
+
+    async def send_many(self, messages: Iterable[EmailMessage]) -> list[Exception | None]:
+        """
+            Send messages one after another over a single pooled connection.
+            A message that hits a dropped connection is retried once on a new one,
+            when no new connection can be opened the rest of the messages fail with that error.
+            :return: per message None when sent, otherwise the error
+        """
+        messages = list(messages)
+        results: list[Exception | None] = []
+        async with self._semaphore:
+            pooled = None
+            try:
+                for index, message in enumerate(messages):
+                    for attempt in range(2):
+                        if pooled is None:
+                            try:
+                                pooled = await self._checkout()
+                            except (aiosmtplib.SMTPException, OSError) as e:
+                                logger.warning(
+                                    'SMTP connection to %s:%d failed, %d messages not sent: %s',
+                                    self.hostname, self.port, len(messages) - index, e
+                                )
+                                results.extend([e] * (len(messages) - index))
+                                return results
+                        try:
+                            await pooled.client.send_message(message)
+                            pooled.sent += 1
+                            results.append(None)
+                            break
+                        except OSError as e:
+                            # connection level failure, SMTPServerDisconnected is a ConnectionError
+                            await self._close(pooled)
+                            pooled = None
+                            if attempt:
+                                results.append(e)
+                        except aiosmtplib.SMTPException as e:
+                            results.append(e)
+                            break
+
+                    if pooled is not None and pooled.sent >= self.max_messages_per_connection:
+                        await self._close(pooled)
+                        pooled = None
+            finally:
+                self._checkin(pooled)
+
+        return results
+
+    async def send_all(self, messages: Iterable[EmailMessage]) -> list[Exception | None]:
+        """
+            Split messages into contiguous chunks sent concurrently, one pooled connection per chunk
+            :return: per message None when sent, otherwise the error, in the order of messages
+        """
+        messages = list(messages)
+        if not messages:
+            return []
+
+        chunk_size = -(-len(messages) // self.size)
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        results = await asyncio.gather(*(self.send_many(chunk) for chunk in chunks))
+        return [error for chunk in results for error in chunk]
+
+    async def send(self, message: EmailMessage) -> None:
+        [error] = await self.send_many([message])
+        if error is not None:
+            raise error
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._close(self._idle.pop())
+        logger.info('SMTP pool closed')
@@ -5,17 +5,17 @@ from fastapi import HTTPException
 from starlette import status
 
 from src.core.redis_client import RedisClient
-from src.notification import NotificationService, EmailNotification
+from src.notification import OutboxRepository, NotificationChannel
 
 logger = logging.getLogger('fixkg.otp_service')
 
 
 class OTPService:
-    def __init__(self, notification_service: NotificationService, redis_client: RedisClient):
-        self.notification_service = notification_service
+    def __init__(self, outbox: OutboxRepository, redis_client: RedisClient):
+        self.outbox = outbox
         self.redis_client = redis_client
         self.redis_ttl = 300
-        logger.info('OTPService initialized with NotificationService and RedisClient')
+        logger.info('OTPService initialized with OutboxRepository and RedisClient')
 
     @staticmethod
     def _generate_otp_code(length: int = 6) -> str:
@@ -28,13 +28,12 @@ class OTPService:
         subject = "Your One-Time Password"
         body = f"Hello!\n\nYour OTP code is: {otp_code}\n\nRegards."
 
-        logger.info(f'Sending OTP to email: {email}')
-        self.notification_service.set_strategy(EmailNotification())
-        await self.notification_service.send_notification(email, subject, body)
-
-        logger.info('Successfully sent OTP to %s', email)
         await self.save_otp(email, otp_code)
 
+        logger.info(f'Queueing OTP email to: {email}')
+        await self.outbox.enqueue(NotificationChannel.EMAIL, email, subject, body, sensitive=True)
+        logger.info('OTP email to %s queued', email)
+
 
     async def save_otp(self, email: str, code: str) -> None:
         logger.debug(f'Saving OTP code for {email} in Redis')
@@ -0,0 +1,37 @@
+"""
+    Standalone notification outbox worker, for deployments that set outbox__run_in_process=false:
+
+        python -m src.outbox_worker
+"""
+import asyncio
+
+from logger import register_logger
+from src.core import redis_client, database_helper, settings
+from src.core.outbox import outbox_worker
+from src.core.smtp import smtp_pool
+from src.websocket import broker
+
+
+async def main():
+    register_logger(
+        level=settings.logging.level,
+        console_level=settings.logging.console_level,
+        filename=settings.logging.filename,
+        json_format=settings.logging.json_format,
+        sample_rates=settings.logging.sample_rates
+    )
+    await redis_client.connect()
+    # websocket notifications reach API workers through redis pub/sub
+    await broker.start()
+
+    try:
+        await outbox_worker.run_forever()
+    finally:
+        await smtp_pool.close()
+        await broker.stop()
+        await redis_client.close()
+        await database_helper.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
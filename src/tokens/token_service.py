@@ -69,7 +69,15 @@ class TokenService:
         logger.debug('Token created successfully')
         return token
 
-    def create_access_token(self, user_id: int, email: str, username: str, avatar_url: str, is_verified: bool) -> str:
+    def create_access_token(
+            self,
+            user_id: int,
+            email: str,
+            username: str,
+            avatar_url: str,
+            is_verified: bool,
+            created_at: datetime.date | None = None
+    ) -> str:
         logger.debug('Creating access token for user_id=%d', user_id)
         payload = {
             'sub': str(user_id),
@@ -78,6 +86,8 @@ class TokenService:
             'avatar_url': avatar_url,
             'is_verified': is_verified
         }
+        if created_at is not None:
+            payload['created_at'] = created_at.isoformat()
         access_token = self._build_token(
             payload=payload,
             expire_in_minutes=settings.jwt.access_expires_in_minutes,
@@ -107,7 +117,8 @@ class TokenService:
             username=user.username,
             email=str(user.email),
             avatar_url=user.avatar_url,
-            is_verified=user.is_verified
+            is_verified=user.is_verified,
+            created_at=user.created_at
         )
         refresh_token = self.create_refresh_token(
             user_id=user.id,
@@ -116,6 +127,24 @@ class TokenService:
         logger.info('Access and refresh tokens generated for user_id=%d', user.id)
         return access_token, refresh_token
 
+    @staticmethod
+    def user_from_claims(decoded_token: dict[str, Any]) -> UserRead | None:
+        """
+            :return: UserRead built from access token claims, None if the token lacks some of them
+        """
+        try:
+            return UserRead(
+                id=int(decoded_token['sub']),
+                email=decoded_token['email'],
+                username=decoded_token['username'],
+                avatar_url=decoded_token.get('avatar_url'),
+                is_verified=decoded_token['is_verified'],
+                created_at=decoded_token['created_at']
+            )
+        except (KeyError, ValueError):
+            logger.debug('Token claims are not enough to build user')
+            return None
+
     @staticmethod
     def decode_token_with_token_type_checking(
             token: str,
@@ -2,4 +2,5 @@ from .schemas import BaseUser, UserCreate, UserRead, UserUpdate
 from src.users.models import User
 from .exceptions import UserWithIdNotFound, UserWithEmailNotFound, UserAlreadyVerifiedEmail, UserNotVerifyEmail, UserWithUsernameNotFound, EmailOrUsernameAlreadyExists, UserWithUsernameAlreadyExists, EmailAlreadyExists
 from .user_services import UserService
-from .repositories import UserRepositories
\ No newline at end of file
+from .repositories import UserRepositories
+from .user_cache import UserCache
\ No newline at end of file
@@ -1,6 +1,7 @@
 import datetime
 from typing import Optional, TYPE_CHECKING
 
+from sqlalchemy import Column, JSON
 from sqlmodel import Field, Relationship
 
 from src.users import BaseUser
@@ -18,6 +19,7 @@ class User(BaseUser, table = True):
     password: str = Field(nullable=False)
     is_verified: bool = Field(default=False, nullable=False)
     avatar_url: Optional[str] = Field(nullable=True)
+    avatar_variants: Optional[dict] = Field(default=None, sa_column=Column(JSON, nullable=True))
     created_at: datetime.date = Field(default_factory=datetime.date.today)
 
     complaints: list["Complaint"] = Relationship(
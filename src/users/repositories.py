@@ -1,13 +1,22 @@
 import logging
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, or_
 
 from src.users.models import User
 from src.common import BaseRepository, db_exception_handler
 from .schemas import UserUpdate
+from .user_cache import UserCache
 
 logger = logging.getLogger('fixkg.user_repo')
 
 class UserRepositories(BaseRepository):
+    def __init__(self, db: AsyncSession, user_cache: UserCache | None = None):
+        super().__init__(db)
+        self._user_cache = user_cache
+
+    async def _invalidate_cache(self, user_id: int) -> None:
+        if self._user_cache is not None:
+            await self._user_cache.invalidate(user_id)
 
     @db_exception_handler
     async def get_by_id(self, user_id: int) -> User | None:
@@ -67,6 +76,7 @@ class UserRepositories(BaseRepository):
             update_data=new_data
         )
         logger.debug('update result: %s', updated_instance)
+        await self._invalidate_cache(updated_instance.id)
         return updated_instance
 
     @db_exception_handler
@@ -75,6 +85,7 @@ class UserRepositories(BaseRepository):
         await self.db.delete(user)
         await self.db.commit()
         logger.info('User deleted with id=%d', user.id)
+        await self._invalidate_cache(user.id)
         return None
 
     @db_exception_handler
@@ -84,14 +95,17 @@ class UserRepositories(BaseRepository):
         await self.db.commit()
         await self.db.refresh(user)
         logger.debug('set_verified completed for user_id=%d', user.id)
+        await self._invalidate_cache(user.id)
         return user
 
     @db_exception_handler
-    async def save_user_avatar(self, avatar_url: str, user_id: int) -> User:
+    async def save_user_avatar(self, avatar_url: str, user_id: int, avatar_variants: dict | None = None) -> User:
         logger.debug('save_user_avatar called for user_id=%d with avatar_url=%s', user_id, avatar_url)
         user = await self.get_by_id(user_id)
         user.avatar_url = avatar_url
+        user.avatar_variants = avatar_variants
         await self.db.commit()
         await self.db.refresh(user)
         logger.info('Avatar updated for user_id=%d', user_id)
+        await self._invalidate_cache(user_id)
         return user
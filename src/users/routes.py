@@ -6,8 +6,10 @@ from starlette import status
 from src.common import ErrorResponse
 from src.core import get_current_user, get_user_service
 from src.users import UserRead, UserUpdate, UserService
+from src.common import TimedRoute
 
 router = APIRouter(
+    route_class=TimedRoute,
     tags=['Users'],
     prefix='/users',
     dependencies=[Depends(get_current_user)]
@@ -16,6 +16,7 @@ class UserRead(BaseUser):
     id: int
     is_verified: bool
     avatar_url: Optional[str] = Field(nullable=True)
+    avatar_variants: Optional[dict[str, dict[str, str]]] = None
     created_at: datetime.date
 
 class UserUpdate(SQLModel):
@@ -0,0 +1,116 @@
+import json
+import logging
+import secrets
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from src.common import TTLCache
+from .schemas import UserRead
+
+logger = logging.getLogger('fixkg.user_cache')
+
+INVALIDATION_CHANNEL = 'users:cache-invalidation'
+
+
+class UserCache:
+    """
+        Two tiers of UserRead cache: an in-process LRU in front of Redis.
+        Every user has a version in Redis, a cached user is only valid for the version it was
+        loaded under. Read the version before loading the user from the DB and pass it to set:
+        a load that raced an invalidation is then never cached. Invalidation is published so
+        every worker drops its local copy; if pub/sub is down they keep it until local_ttl runs out.
+    """
+    def __init__(
+            self,
+            client,
+            local_ttl: float = 15,
+            redis_ttl: int = 300,
+            local_maxsize: int = 10_000,
+            publish: Callable[[str, str], Awaitable[None]] | None = None
+    ):
+        self._client = client
+        self._local = TTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.redis_ttl = redis_ttl
+        self._publish = publish
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f'user:{user_id}'
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f'user:{user_id}:version'
+
+    async def get(self, user_id: int) -> UserRead | None:
+        user = self._local.get(user_id)
+        if user is not None:
+            logger.debug('User cache local hit for user_id=%d', user_id)
+            return user
+
+        try:
+            version, payload = await self._client.mget(self._version_key(user_id), self._key(user_id))
+        except (RedisError, RuntimeError, OSError) as e:
+            logger.warning('User cache read failed for user_id=%d: %s', user_id, e)
+            return None
+
+        cached = json.loads(payload) if payload is not None else None
+        if version is None or not isinstance(cached, dict) or cached.get('version') != version:
+            logger.debug('User cache miss for user_id=%d', user_id)
+            return None
+
+        user = UserRead.model_validate(cached['user'])
+        self._local.set(user_id, user)
+        logger.debug('User cache redis hit for user_id=%d', user_id)
+        return user
+
+    async def version(self, user_id: int) -> str | None:
+        """
+            :return: the current version of the user, created when missing or expired,
+                None when Redis is unavailable
+        """
+        key = self._version_key(user_id)
+        try:
+            version = await self._client.get(key)
+            if version is None:
+                # read back, another worker may have created it first
+                await self._client.set(key, secrets.token_hex(4), ex=self.redis_ttl, nx=True)
+                version = await self._client.get(key)
+            return version
+        except (RedisError, RuntimeError, OSError) as e:
+            logger.warning('User cache version read failed for user_id=%d: %s', user_id, e)
+            return None
+
+    async def set(self, user: UserRead, version: str | None) -> None:
+        """
+            Cache a user loaded after reading version, skipped when it was invalidated since
+        """
+        if version is None:
+            return
+
+        try:
+            if await self._client.get(self._version_key(user.id)) != version:
+                logger.debug('User %d was invalidated during the load, not caching it', user.id)
+                return
+
+            self._local.set(user.id, user)
+            pipe = self._client.pipeline(transaction=False)
+            pipe.set(self._key(user.id), json.dumps({'version': version, 'user': user.model_dump(mode='json')}), ex=self.redis_ttl)
+            # the version has to outlive the cached user, an expired version only costs a miss
+            pipe.expire(self._version_key(user.id), self.redis_ttl)
+            await pipe.execute()
+        except (RedisError, RuntimeError, OSError) as e:
+            logger.warning('User cache write failed for user_id=%d: %s', user.id, e)
+
+    async def invalidate(self, user_id: int) -> None:
+        self._local.delete(user_id)
+        try:
+            await self._client.set(self._version_key(user_id), secrets.token_hex(4), ex=self.redis_ttl)
+        except (RedisError, RuntimeError, OSError) as e:
+            logger.warning('User cache invalidation failed for user_id=%d: %s', user_id, e)
+        if self._publish is not None:
+            await self._publish(INVALIDATION_CHANNEL, str(user_id))
+        logger.debug('User cache invalidated for user_id=%d', user_id)
+
+    async def handle_invalidation(self, data: str) -> None:
+        self._local.delete(int(data))
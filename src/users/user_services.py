@@ -124,11 +124,12 @@ class UserService:
         logger.info('Saving avatar image for user_id=%d, filename=%s', user_id, file.filename)
         await self.get_user_by_id(user_id)
 
-        avatar_url = await self._image_service.save_user_avatar_image(file, user_id)
-        logger.info('Avatar saved at: %s', avatar_url)
+        avatar = await self._image_service.save_user_avatar_image(file, user_id)
+        logger.info('Avatar saved at: %s', avatar.url)
 
         updated_user = await self._user_repo.save_user_avatar(
-            avatar_url=avatar_url,
+            avatar_url=avatar.url,
+            avatar_variants=avatar.variants,
             user_id=user_id
         )
 
@@ -1 +1,2 @@
-from .manager import manager
\ No newline at end of file
+from .manager import manager, ConnectionManager, OverflowPolicy, QueueStats
+from .broker import broker, WebSocketBroker, RedisPubSubBackend, InMemoryPubSubBackend
\ No newline at end of file
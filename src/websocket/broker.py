@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+from starlette.websockets import WebSocket
+
+from src.core.redis_client import RedisClient, redis_client
+from .manager import ConnectionManager, manager
+
+logger = logging.getLogger('fixkg.websocket_broker')
+
+type MessageHandler = Callable[[str, str], Awaitable[None]]
+type ChannelListener = Callable[[str], Awaitable[None]]
+
+CHANNEL_PREFIX = 'ws:user:'
+
+
+class PubSubBackend(ABC):
+    @abstractmethod
+    async def start(self, on_message: MessageHandler) -> None:
+        pass
+
+    @abstractmethod
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, data: str) -> None:
+        pass
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> None:
+        pass
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str) -> None:
+        pass
+
+
+class RedisPubSubBackend(PubSubBackend):
+    def __init__(self, client: RedisClient, poll_timeout: float = 1.0):
+        self._client = client
+        self.poll_timeout = poll_timeout
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+        self._on_message: MessageHandler | None = None
+
+    async def start(self, on_message: MessageHandler) -> None:
+        self._on_message = on_message
+        self._pubsub = self._client.pubsub()
+        # pubsub has no connection until the first subscription, a per-worker channel opens it
+        await self._pubsub.subscribe(f'ws:worker:{uuid.uuid4().hex}')
+        self._reader = asyncio.create_task(self._read())
+        logger.info('Redis pub/sub backend started')
+
+    async def stop(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub:
+            await self._pubsub.aclose()
+        logger.info('Redis pub/sub backend stopped')
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=self.poll_timeout)
+                if message and message['type'] == 'message':
+                    await self._on_message(message['channel'], message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error('Error reading pub/sub message: %s', e)
+                await asyncio.sleep(self.poll_timeout)
+
+    async def publish(self, channel: str, data: str) -> None:
+        await self._client.publish(channel, data)
+
+    async def subscribe(self, channel: str) -> None:
+        await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        await self._pubsub.unsubscribe(channel)
+
+
+class InMemoryPubSubBackend(PubSubBackend):
+    """
+        Process-local stand-in for Redis pub/sub. Backends sharing one hub behave like
+        workers connected to the same Redis
+    """
+    def __init__(self, hub: dict[str, set['InMemoryPubSubBackend']] | None = None):
+        self._hub = hub if hub is not None else {}
+        self._on_message: MessageHandler | None = None
+
+    async def start(self, on_message: MessageHandler) -> None:
+        self._on_message = on_message
+
+    async def stop(self) -> None:
+        for subscribers in self._hub.values():
+            subscribers.discard(self)
+
+    async def publish(self, channel: str, data: str) -> None:
+        for backend in list(self._hub.get(channel, ())):
+            await backend._on_message(channel, data)
+
+    async def subscribe(self, channel: str) -> None:
+        self._hub.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._hub.get(channel, set()).discard(self)
+
+
+class WebSocketBroker:
+    """
+        Fans notifications out to every worker: send_to_user publishes on the user's channel,
+        each worker subscribes to channels of its own connected users and delivers to local sockets.
+        Until started, or when publishing fails, messages are delivered only to local sockets.
+        Other modules can listen on channels of their own to hear about events from every worker.
+    """
+    def __init__(self, connection_manager: ConnectionManager, backend: PubSubBackend):
+        self.connection_manager = connection_manager
+        self._backend = backend
+        self._started = False
+        self._listeners: dict[str, ChannelListener] = {}
+
+    @staticmethod
+    def _channel(user_id: int) -> str:
+        return f'{CHANNEL_PREFIX}{user_id}'
+
+    async def start(self) -> None:
+        try:
+            await self._backend.start(self._deliver)
+            for user_id in self.connection_manager.connected_users():
+                await self._backend.subscribe(self._channel(user_id))
+            for channel in self._listeners:
+                await self._backend.subscribe(channel)
+            self._started = True
+        except (RedisError, RuntimeError, OSError) as e:
+            logger.error('Pub/sub backend is unavailable, notifications stay local to this worker: %s', e)
+
+    async def stop(self) -> None:
+        if self._started:
+            self._started = False
+            await self._backend.stop()
+
+    async def connect(self, user_id: int, websocket: WebSocket) -> None:
+        first_connection = not self.connection_manager.is_connected(user_id)
+        await self.connection_manager.connect(user_id, websocket)
+
+        if self._started and first_connection:
+            await self._backend.subscribe(self._channel(user_id))
+            logger.debug('Subscribed to channel of user %d', user_id)
+
+    async def disconnect(self, user_id: int, websocket: WebSocket | None = None) -> None:
+        await self.connection_manager.disconnect(user_id, websocket)
+
+        if self._started and not self.connection_manager.is_connected(user_id):
+            await self._backend.unsubscribe(self._channel(user_id))
+            logger.debug('Unsubscribed from channel of user %d', user_id)
+
+    async def send_to_user(self, user_id: int, message: dict) -> None:
+        if not self._started:
+            await self.connection_manager.send_to_user(user_id, message)
+            return
+
+        try:
+            await self._backend.publish(self._channel(user_id), json.dumps(message))
+        except (RedisError, RuntimeError, OSError) as e:
+            logger.error('Publishing to user %d failed, delivering locally: %s', user_id, e)
+            await self.connection_manager.send_to_user(user_id, message)
+
+    def listen(self, channel: str, listener: ChannelListener) -> None:
+        """
+            Call listener with the data of every message published on channel by any worker.
+            Register before start, the channel is subscribed when the broker starts
+        """
+        self._listeners[channel] = listener
+
+    async def publish(self, channel: str, data: str) -> None:
+        """
+            Publish to the listeners of channel in every worker, this worker included.
+            Until started, or when publishing fails, only the listener of this worker is called
+        """
+        if self._started:
+            try:
+                await self._backend.publish(channel, data)
+                return
+            except (RedisError, RuntimeError, OSError) as e:
+                logger.error('Publishing to channel %s failed, delivering locally: %s', channel, e)
+
+        listener = self._listeners.get(channel)
+        if listener is not None:
+            await listener(data)
+
+    async def _deliver(self, channel: str, data: str) -> None:
+        listener = self._listeners.get(channel)
+        if listener is not None:
+            await listener(data)
+            return
+        if not channel.startswith(CHANNEL_PREFIX):
+            return
+        user_id = int(channel.removeprefix(CHANNEL_PREFIX))
+        await self.connection_manager.send_to_user(user_id, json.loads(data))
+
+
+broker = WebSocketBroker(manager, RedisPubSubBackend(redis_client))
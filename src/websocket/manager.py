@@ -1,21 +1,191 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from enum import Enum
+
 from starlette.websockets import WebSocket
 
+from src.common import metrics
+from src.core.settings import settings
+
+logger = logging.getLogger('fixkg.websocket_manager')
+
+# 1013 Try Again Later: the client did not keep up with its send queue
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class OverflowPolicy(str, Enum):
+    drop_oldest = 'drop_oldest'
+    drop_newest = 'drop_newest'
+    disconnect = 'disconnect'
+
+
+@dataclass
+class QueueStats:
+    connections: int
+    queued: int
+    max_depth: int
+    dropped: int
+    disconnected: int
+
+
+class Connection:
+    """
+        One socket of a user with its own bounded send queue, drained by a writer task,
+        so a slow client never blocks the request that produced the message
+    """
+    def __init__(self, user_id: int, websocket: WebSocket, queue_size: int, on_close):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._on_close = on_close
+        self._writer = asyncio.create_task(self._write())
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def enqueue(self, message: dict, policy: OverflowPolicy) -> bool:
+        """
+            :return: False when the connection has to be closed according to the policy
+        """
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+            return True
+
+        if policy == OverflowPolicy.disconnect:
+            return False
+
+        self.dropped += 1
+        if policy == OverflowPolicy.drop_oldest:
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.queue.put_nowait(message)
+        logger.warning('Send queue of user %d is full, message dropped (%s)', self.user_id, policy.value)
+        return True
+
+    async def _write(self) -> None:
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_json(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning('Sending to user %d failed, closing connection: %s', self.user_id, e)
+                await self._on_close(self)
+                return
+            finally:
+                self.queue.task_done()
+
+    async def join(self) -> None:
+        """
+            Wait until every queued message is written
+        """
+        await self.queue.join()
+
+    async def close(self, code: int | None = None) -> None:
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+        if code is not None:
+            try:
+                await self.websocket.close(code=code)
+            except Exception as e:
+                logger.debug('Closing websocket of user %d failed: %s', self.user_id, e)
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connection: dict[int, WebSocket] = {}
+    def __init__(self, queue_size: int = 100, overflow_policy: OverflowPolicy = OverflowPolicy.drop_oldest):
+        # user id -> id(websocket) -> connection, starlette websockets are not hashable
+        self.active_connection: dict[int, dict[int, Connection]] = {}
+        self.queue_size = queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self._dropped = 0
+        self._disconnected = 0
 
     async def connect(self, user_id: int, websocket: WebSocket):
         await websocket.accept()
-        self.active_connection[user_id] = websocket
+        connection = Connection(user_id, websocket, self.queue_size, on_close=self._remove)
+        self.active_connection.setdefault(user_id, {})[id(websocket)] = connection
+        logger.debug('User %d connected, %d open sockets', user_id, len(self.active_connection[user_id]))
+
+    async def disconnect(self, user_id: int, websocket: WebSocket | None = None):
+        connections = self.active_connection.get(user_id, {})
+        targets = list(connections.values()) if websocket is None else [connections.get(id(websocket))]
+        for connection in targets:
+            if connection is not None:
+                await self._remove(connection)
+
+    async def _remove(self, connection: Connection, code: int | None = None) -> None:
+        connections = self.active_connection.get(connection.user_id)
+        if not connections or connections.get(id(connection.websocket)) is not connection:
+            return
 
-    async def disconnect(self, user_id: int):
-         self.active_connection.pop(user_id, None)
+        del connections[id(connection.websocket)]
+        if not connections:
+            del self.active_connection[connection.user_id]
+        self._dropped += connection.dropped
+        await connection.close(code)
+
+    def is_connected(self, user_id: int) -> bool:
+        return user_id in self.active_connection
+
+    def connected_users(self) -> list[int]:
+        return list(self.active_connection)
+
+    def connections(self, user_id: int) -> list[Connection]:
+        return list(self.active_connection.get(user_id, {}).values())
 
     async def send_to_user(self, user_id: int, message:dict):
-        ws = self.active_connection.get(user_id)
+        """
+            Queue the message on every socket of the user, it is written in the background
+        """
+        for connection in self.connections(user_id):
+            if not connection.enqueue(message, self.overflow_policy):
+                self._disconnected += 1
+                logger.warning('Send queue of user %d is full, disconnecting slow client', user_id)
+                await self._remove(connection, code=SLOW_CONSUMER_CLOSE_CODE)
+
+    async def flush(self) -> None:
+        """
+            Wait until messages queued so far are written to every socket
+        """
+        for connections in list(self.active_connection.values()):
+            for connection in list(connections.values()):
+                await connection.join()
+
+    async def close(self) -> None:
+        """
+            Stop writer tasks of all connections, used on shutdown
+        """
+        for user_id in self.connected_users():
+            await self.disconnect(user_id)
+
+    def stats(self) -> QueueStats:
+        connections = [c for user in self.active_connection.values() for c in user.values()]
+        return QueueStats(
+            connections=len(connections),
+            queued=sum(c.depth for c in connections),
+            max_depth=max((c.depth for c in connections), default=0),
+            dropped=self._dropped + sum(c.dropped for c in connections),
+            disconnected=self._disconnected
+        )
 
-        if ws:
-            await ws.send_json(message)
+manager = ConnectionManager(
+    queue_size=settings.websocket.send_queue_size,
+    overflow_policy=settings.websocket.overflow_policy
+)
 
-manager = ConnectionManager()
\ No newline at end of file
+metrics.gauge('websocket_connections', 'Open WebSocket connections in this worker', function=lambda: manager.stats().connections)
+metrics.gauge('websocket_send_queue_depth', 'Messages waiting in WebSocket send queues', function=lambda: manager.stats().queued)
+metrics.gauge('websocket_send_queue_max_depth', 'Deepest WebSocket send queue', function=lambda: manager.stats().max_depth)
+metrics.counter('websocket_messages_dropped_total', 'Messages dropped by full send queues', function=lambda: manager.stats().dropped)
+metrics.counter('websocket_slow_disconnects_total', 'Connections closed because the send queue was full', function=lambda: manager.stats().disconnected)
@@ -5,7 +5,7 @@ from fastapi.params import Depends
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
 from src.users import UserRead
-from src.websocket import manager
+from src.websocket import broker
 from src.websocket.utils import get_current_user_from_websocket
 
 router = APIRouter(
@@ -14,10 +14,13 @@ router = APIRouter(
 
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket, decoded_token: Annotated[UserRead, Depends(get_current_user_from_websocket)]):
-    await manager.connect(int(decoded_token['sub']), websocket)
+    user_id = int(decoded_token['sub'])
+    await broker.connect(user_id, websocket)
 
     try:
         while True:
             await websocket.receive_json()
     except WebSocketDisconnect:
-        manager.disconnect(decoded_token['sub'])
+        pass
+    finally:
+        await broker.disconnect(user_id, websocket)
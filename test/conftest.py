@@ -4,18 +4,20 @@ import shutil
 from typing import AsyncGenerator
 from unittest.mock import AsyncMock
 
+import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlmodel import SQLModel
 
 from src.core import redis_client, database_helper
+from src.core.database_helper import count_queries as count_queries_context
 from src.main import app
 
 # Register my fixtures
 from .unit.user.fixtures import user_repository, user, fake_user, user_service, mock_user_repository, mock_user,mock_user_service, mock_user_create, mock_user_update, mock_users_list
 from .unit.complaint.complaint_fixtures import  complaint_repository, fake_complaint, mock_complaint_repository, mock_complaint, mock_complaint_create, complaint_service, mock_complaint_update
-from .unit.auth.auth_fixtures import mock_otp_service, mock_token_service, auth_service, mock_login_form_data, mock_verify_email_schema
+from .unit.auth.auth_fixtures import mock_otp_service, mock_token_service, auth_service, mock_login_form_data, mock_verify_email_schema, password_hasher
 
 @pytest_asyncio.fixture(scope='function')
 async def test_engine():
@@ -73,10 +75,10 @@ def cleanup_test_artifacts():
 @pytest_asyncio.fixture(scope='function')
 async def async_client(session) -> AsyncGenerator[AsyncClient]:
 
-    async def override_get_session():
-        yield session
+    def override_get_session_factory():
+        return lambda: session
 
-    app.dependency_overrides[database_helper.session_getter] = override_get_session
+    app.dependency_overrides[database_helper.get_session_factory] = override_get_session_factory
 
     async with AsyncClient(
             transport=ASGITransport(app=app), base_url="http://test"
@@ -92,4 +94,11 @@ def mock_image_service():
 async def redis_connection():
     await redis_client.connect()
     yield
-    await redis_client.close()
\ No newline at end of file
+    await redis_client.close()
+
+@pytest.fixture(scope='function')
+def count_queries():
+    """
+        with count_queries() as queries: ... then assert on queries.count and queries.duplicates()
+    """
+    return count_queries_context
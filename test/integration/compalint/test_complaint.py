@@ -86,3 +86,41 @@ class TestComplaint:
         assert isinstance(response.json(), list)
 
         app.dependency_overrides = {}
+
+    @pytest.mark.asyncio
+    async def test_get_clusters(self, async_client, mock_user, mock_complaint_create):
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        await async_client.post(self.base_url, json=mock_complaint_create.model_dump())
+        response = await async_client.get(f"{self.base_url}clusters", params={'bbox': '0.5,-0.5,1.5,0.5', 'zoom': 10})
+
+        assert response.status_code == 200
+        assert sum(cluster['count'] for cluster in response.json()) == 1
+
+        app.dependency_overrides = {}
+
+    @pytest.mark.asyncio
+    async def test_get_vector_tile(self, async_client, mock_user):
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = await async_client.get(f"{self.base_url}tiles/0/0/0.mvt")
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'application/vnd.mapbox-vector-tile'
+
+        app.dependency_overrides = {}
+
+    @pytest.mark.asyncio
+    async def test_server_timing_is_opt_in(self, async_client, mock_user, session, mock_complaint):
+        session.add(mock_complaint)
+        await session.commit()
+
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        plain = await async_client.get(f"{self.base_url}{mock_complaint.id}")
+        timed = await async_client.get(f"{self.base_url}{mock_complaint.id}", headers={'X-Debug-Timing': '1'})
+
+        assert 'server-timing' not in plain.headers
+        phases = {part.split(';')[0] for part in timed.headers['server-timing'].split(', ')}
+        assert {'db', 'endpoint', 'serialize', 'total'} <= phases
+
+        app.dependency_overrides = {}
@@ -3,7 +3,7 @@ from unittest.mock import AsyncMock
 import pytest
 from fastapi.security import OAuth2PasswordRequestForm
 
-from src.auth import AuthService, VerifyEmailSchema
+from src.auth import AuthService, VerifyEmailSchema, PasswordHasher
 
 
 @pytest.fixture()
@@ -17,12 +17,19 @@ def mock_otp_service():
     return service
 
 @pytest.fixture()
-def auth_service(mock_user_service, mock_user_repository,mock_otp_service,mock_token_service):
+def password_hasher():
+    hasher = PasswordHasher(pool_size=1, max_pending=1)
+    yield hasher
+    hasher.shutdown()
+
+@pytest.fixture()
+def auth_service(mock_user_service, mock_user_repository,mock_otp_service,mock_token_service, password_hasher):
     return AuthService(
         user_service=mock_user_service,
         token_service=mock_token_service,
         otp_service=mock_otp_service,
         user_repo=mock_user_repository,
+        password_hasher=password_hasher,
     )
 
 @pytest.fixture()
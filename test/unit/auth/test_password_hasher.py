@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.auth import PasswordHasher, PasswordHashingOverloaded, hash_password, verify_password
+
+
+class TestPasswordHasher:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self, password_hasher):
+        hashed = await password_hasher.run(hash_password, b'secret')
+
+        assert await password_hasher.run(verify_password, b'secret', hashed.encode())
+        assert not await password_hasher.run(verify_password, b'wrong', hashed.encode())
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_sheds_work_when_queue_is_full(self):
+        hasher = PasswordHasher(pool_size=1, max_pending=1)
+        release = threading.Event()
+        running = [asyncio.create_task(hasher.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(PasswordHashingOverloaded):
+            await hasher.run(release.wait)
+
+        release.set()
+        await asyncio.gather(*running)
+        assert hasher.pending == 0
+        hasher.shutdown()
@@ -0,0 +1,57 @@
+import pytest
+
+from src.common import RedisCache
+
+
+class FakePipeline:
+    def __init__(self, client: 'FakeRedis'):
+        self._client = client
+        self._commands = []
+
+    def set(self, key, value, ex=None):
+        self._commands.append(lambda: self._client.data.__setitem__(key, value))
+        return self
+
+    def expire(self, key, seconds):
+        return self
+
+    async def execute(self):
+        for command in self._commands:
+            command()
+
+
+class FakeRedis:
+    """Just enough of RedisClient for RedisCache"""
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def delete_many(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+@pytest.fixture()
+def fake_redis():
+    return FakeRedis()
+
+@pytest.fixture()
+def redis_cache(fake_redis):
+    return RedisCache(fake_redis, lock_timeout=1, poll_interval=0.01)
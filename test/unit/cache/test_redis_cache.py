@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import TypeAdapter
+from redis.exceptions import ConnectionError
+
+from test.unit.cache.cache_fixtures import fake_redis, redis_cache
+
+ADAPTER = TypeAdapter(list[int])
+
+
+class TestRedisCache:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self, redis_cache):
+        loader = AsyncMock(return_value=[1, 2])
+
+        first = await redis_cache.get_or_load('key', loader, ADAPTER, tags=['tag'])
+        second = await redis_cache.get_or_load('key', loader, ADAPTER, tags=['tag'])
+
+        loader.assert_awaited_once()
+        assert first == second == [1, 2]
+        assert redis_cache.stats.misses == 1
+        assert redis_cache.stats.hits == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self, redis_cache):
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return [calls]
+
+        results = await asyncio.gather(*[redis_cache.get_or_load('key', loader, ADAPTER) for _ in range(5)])
+
+        assert calls == 1
+        assert results == [[1]] * 5
+        assert redis_cache.stats.coalesced == 4
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_waits_for_lock_holder(self, redis_cache, fake_redis):
+        fake_redis.data['cache:key:lock'] = '1'
+        loader = AsyncMock(return_value=[1])
+
+        async def other_worker_fills_key():
+            await asyncio.sleep(0.05)
+            fake_redis.data['cache:key'] = b'[7]'
+
+        result, _ = await asyncio.gather(
+            redis_cache.get_or_load('key', loader, ADAPTER),
+            other_worker_fills_key()
+        )
+
+        loader.assert_not_awaited()
+        assert result == [7]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_invalidate_tags(self, redis_cache):
+        loader = AsyncMock(return_value=[1])
+        await redis_cache.get_or_load('a', loader, ADAPTER, tags=['tag'])
+        await redis_cache.get_or_load('b', loader, ADAPTER, tags=['other'])
+
+        await redis_cache.invalidate_tags('tag')
+        await redis_cache.get_or_load('a', loader, ADAPTER, tags=['tag'])
+        await redis_cache.get_or_load('b', loader, ADAPTER, tags=['other'])
+
+        assert loader.await_count == 3
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_load_racing_invalidation_is_not_served(self, redis_cache):
+        loading = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_loader():
+            loading.set()
+            await release.wait()
+            return [1]
+
+        load = asyncio.create_task(redis_cache.get_or_load('key', slow_loader, ADAPTER, tags=['tag']))
+        await loading.wait()
+        await redis_cache.invalidate_tags('tag')
+        release.set()
+        await load
+
+        fresh = await redis_cache.get_or_load('key', AsyncMock(return_value=[2]), ADAPTER, tags=['tag'])
+
+        assert fresh == [2]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_invalidation_keeps_no_key_lists(self, redis_cache, fake_redis):
+        loader = AsyncMock(return_value=[1])
+        for n in range(5):
+            await redis_cache.get_or_load(f'key{n}', loader, ADAPTER, tags=['tag'])
+
+        await redis_cache.invalidate_tags('tag')
+
+        # one version per tag, the keys stored under the old one are left to expire
+        assert [key for key in fake_redis.data if key.startswith('cache:tag:')] == ['cache:tag:tag']
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_loader(self, redis_cache, fake_redis):
+        fake_redis.get = AsyncMock(side_effect=ConnectionError)
+        loader = AsyncMock(return_value=[1])
+
+        result = await redis_cache.get_or_load('key', loader, ADAPTER)
+
+        assert result == [1]
+        assert redis_cache.stats.errors >= 1
@@ -0,0 +1,47 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlmodel import select
+
+from src.comments.schemas import CommentCreate
+from src.comments.services import CommentService
+from src.complaints import ComplaintService
+from src.notification import OutboxRepository, NotificationOutbox, NotificationChannel
+from test.unit.comments.comment_fixtures import comment_repository, fake_comment
+
+
+class TestCommentService:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_create_comment_commits_notification_with_comment(self, session, comment_repository, fake_complaint, user):
+        complaint_service = AsyncMock()
+        complaint_service.get_by_id.return_value = fake_complaint
+        wake = Mock()
+        service = CommentService(comment_repository, complaint_service, OutboxRepository(session, on_enqueue=wake))
+
+        comment = await service.create_comment(CommentCreate(complaint_id=fake_complaint.id, content='Some comment'), user.id)
+
+        [entry] = await session.scalars(select(NotificationOutbox))
+        assert comment.id is not None
+        assert entry.channel == NotificationChannel.WEBSOCKET
+        assert entry.recipient == str(fake_complaint.user_id)
+        assert entry.message == 'Some comment'
+        wake.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_comments_by_complaint_loads_comments_once(
+            self, session, comment_repository, complaint_repository, fake_comment, mock_user_service, mock_image_service, count_queries
+    ):
+        complaint_service = ComplaintService(complaint_repository, mock_user_service, mock_image_service)
+        service = CommentService(comment_repository, complaint_service, OutboxRepository(session))
+        session.expunge_all()
+
+        with count_queries() as queries:
+            comments = await service.get_comments_by_complaint(fake_comment.complaint_id)
+
+        assert [comment.id for comment in comments] == [fake_comment.id]
+        # the complaint, its comments and images through selectinload, no separate comments query
+        assert queries.count == 3
+        assert queries.duplicates() == {}
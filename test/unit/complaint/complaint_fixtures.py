@@ -96,4 +96,23 @@ def mock_complaint_create():
 def mock_complaint_update():
     return ComplaintUpdate(
         status = ComplaintStatus.APPROVED
-    )
\ No newline at end of file
+    )
+
+@pytest_asyncio.fixture(scope='function')
+async def geo_complaints(user, complaint_repository):
+    points = [
+        ('Ала-Тоо', 42.8765, 74.6037),
+        ('Ошский базар', 42.8746, 74.5698),
+        ('Ош', 40.5283, 72.7985),
+    ]
+    complaints = []
+    for text, latitude, longitude in points:
+        complaints.append(await complaint_repository.create(Complaint(
+            complaint_text=text,
+            category='Дороги',
+            latitude=latitude,
+            longitude=longitude,
+            description=f'{text} description',
+            user_id=user.id
+        )))
+    return complaints
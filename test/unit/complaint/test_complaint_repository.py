@@ -1,8 +1,12 @@
 import pytest
+from sqlalchemy.dialects import postgresql
 
-from src import Complaint, ComplaintStatus, Comment
-from src.complaints import ComplaintUpdate
-from test.unit.complaint.complaint_fixtures import complaint_repository, fake_complaint, complaint_with_user_and_comments
+from src import Complaint, ComplaintStatus, Comment, ComplaintImage
+from src.complaints import ComplaintUpdate, ComplaintQueryModel, vector_tiles
+from src.complaints.repositories import ComplaintRepositories
+from src.complaints.clustering import cluster_cache
+from src.common import encode_cursor
+from test.unit.complaint.complaint_fixtures import complaint_repository, fake_complaint, complaint_with_user_and_comments, geo_complaints
 
 class TestComplaintRepository:
     @pytest.mark.unit
@@ -61,4 +65,122 @@ class TestComplaintRepository:
             image_url='some_url',
             complaint_id = fake_complaint.id
         )
-        assert fake_complaint.image_url
\ No newline at end of file
+        assert fake_complaint.image_url
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_add_images_in_one_insert(self, fake_complaint, complaint_repository, count_queries):
+        variants = {'thumb': {'webp': '/static/complaints/a_thumb.webp'}}
+        await complaint_repository.add_images(fake_complaint.id, [('/static/complaints/a.jpg', variants)])
+
+        with count_queries() as queries:
+            images = await complaint_repository.add_images(
+                fake_complaint.id,
+                [('/static/complaints/b.jpg', None), ('/static/complaints/c.jpg', None)]
+            )
+
+        assert [image.url for image in images] == ['/static/complaints/b.jpg', '/static/complaints/c.jpg']
+        assert [image.position for image in images] == [1, 2]
+        assert len([statement for statement in queries.statements if statement.startswith('INSERT')]) == 1
+
+        complaint = await complaint_repository.get_by_id_with_comments(fake_complaint.id)
+        # the first image became the complaint image, later ones did not replace it
+        assert complaint.image_url == '/static/complaints/a.jpg'
+        assert complaint.image_variants == variants
+        assert [image.url for image in complaint.images] == [
+            '/static/complaints/a.jpg', '/static/complaints/b.jpg', '/static/complaints/c.jpg'
+        ]
+        assert all(isinstance(image, ComplaintImage) for image in complaint.images)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_add_no_images_runs_no_queries(self, fake_complaint, complaint_repository, count_queries):
+        with count_queries() as queries:
+            images = await complaint_repository.add_images(fake_complaint.id, [])
+
+        assert images == []
+        assert queries.statements == []
+
+    @pytest.mark.unit
+    def test_image_position_locks_the_complaint(self):
+        statement = ComplaintRepositories._lock_complaint(1).compile(dialect=postgresql.dialect())
+
+        assert str(statement).endswith('FOR UPDATE')
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_save_image_appends_to_images(self, fake_complaint, complaint_repository):
+        await complaint_repository.add_images(fake_complaint.id, [('/static/complaints/a.jpg', None)])
+        await complaint_repository.save_complaint_image(complaint_id=fake_complaint.id, image_url='/static/complaints/b.jpg')
+
+        complaint = await complaint_repository.get_by_id_with_comments(fake_complaint.id)
+
+        assert complaint.image_url == '/static/complaints/b.jpg'
+        assert [(image.url, image.position) for image in complaint.images] == [
+            ('/static/complaints/a.jpg', 0), ('/static/complaints/b.jpg', 1)
+        ]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_create_sets_geohash(self, geo_complaints):
+        assert all(c.geohash and len(c.geohash) == 12 for c in geo_complaints)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_all_by_bbox(self, geo_complaints, complaint_repository):
+        query = ComplaintQueryModel(bbox='74.5,42.8,74.7,42.9')
+        complaints = await complaint_repository.get_all(query)
+
+        assert {c.complaint_text for c in complaints} == {'Ала-Тоо', 'Ошский базар'}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_all_by_radius(self, geo_complaints, complaint_repository):
+        query = ComplaintQueryModel(lat=42.8765, lon=74.6037, radius=1000)
+        complaints = await complaint_repository.get_all(query)
+
+        assert [c.complaint_text for c in complaints] == ['Ала-Тоо']
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_cluster_rows(self, geo_complaints, complaint_repository):
+        tiles = [c.geohash[:2] for c in geo_complaints]
+        rows = await complaint_repository.get_cluster_rows(sorted(set(tiles)), precision=4)
+
+        assert sum(row[2] for row in rows) == 3
+        assert all(len(row[0]) == 4 for row in rows)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_tile_points(self, geo_complaints, complaint_repository):
+        x, y = vector_tiles.point_to_tile(42.8765, 74.6037, 10)
+        rows = await complaint_repository.get_tile_points(vector_tiles.tile_bounds(10, x, y))
+
+        assert {row[0] for row in rows} == {geo_complaints[0].id, geo_complaints[1].id}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_create_invalidates_spatial_caches(self, geo_complaints, complaint_repository, user):
+        geohash = geo_complaints[0].geohash
+        x, y = vector_tiles.point_to_tile(42.8765, 74.6037, 10)
+        cluster_cache.set((4, geohash[:2], None), [])
+        vector_tiles.tile_cache.set((10, x, y), b'tile')
+
+        await complaint_repository.create(Complaint(
+            complaint_text='new', latitude=42.8765, longitude=74.6037, description='', user_id=user.id
+        ))
+
+        assert (4, geohash[:2], None) not in cluster_cache
+        assert (10, x, y) not in vector_tiles.tile_cache
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_all_by_cursor(self, geo_complaints, complaint_repository):
+        first_page = await complaint_repository.get_all(ComplaintQueryModel(limit=2))
+        last = first_page[-1]
+        second_page = await complaint_repository.get_all(
+            ComplaintQueryModel(limit=2, cursor=encode_cursor(last.created_at, last.id))
+        )
+
+        assert [c.id for c in first_page] == [geo_complaints[2].id, geo_complaints[1].id]
+        assert [c.id for c in second_page] == [geo_complaints[0].id]
@@ -2,7 +2,13 @@ from unittest import mock
 
 import pytest
 
-from src.complaints import ComplaintWithIdNotFound, AccessDenied
+from src import ComplaintStatus, ComplaintImage
+from src.complaints import ComplaintService, ComplaintWithIdNotFound, AccessDenied, ComplaintClusterQueryModel, InvalidTileCoordinates, ComplaintQueryModel
+from src.common import decode_cursor
+from src.images import StoredImage
+from src.complaints.vector_tiles import tile_cache
+from src.complaints.clustering import cluster_cache
+from src.complaints import spatial_cache
 
 
 class TestComplaintService:
@@ -17,6 +23,59 @@ class TestComplaintService:
         mock_complaint_repository.create.assert_called_once_with(mock.ANY)
         assert result.id == mock_complaint.id
 
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_create_broadcasts_spatial_invalidation(self, mock_user_service, mock_image_service, mock_complaint_repository, mock_complaint, mock_complaint_create):
+        invalidator = mock.AsyncMock()
+        service = ComplaintService(mock_complaint_repository, mock_user_service, mock_image_service, spatial_invalidator=invalidator)
+        mock_complaint_repository.create.return_value = mock_complaint
+
+        await service.create_complaint(mock_complaint_create, 1)
+
+        invalidator.invalidate.assert_awaited_once_with(mock_complaint)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_upload_image_stores_variants(self, complaint_service, mock_complaint_repository, mock_image_service, mock_complaint):
+        variants = {'thumb': {'webp': '/static/complaints/complaint_1_thumb.webp'}}
+        mock_complaint_repository.get_by_id_with_comments.return_value = mock_complaint
+        mock_image_service.save_complaint_image.return_value = StoredImage(url='/static/complaints/complaint_1.jpg', variants=variants)
+        mock_complaint.image_variants = variants
+        mock_complaint_repository.save_complaint_image.return_value = mock_complaint
+
+        result = await complaint_service.upload_complaint_image(mock.Mock(), 1)
+
+        mock_complaint_repository.save_complaint_image.assert_called_once_with(
+            image_url='/static/complaints/complaint_1.jpg',
+            image_variants=variants,
+            complaint_id=1
+        )
+        assert result.image_variants == variants
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_upload_images_bulk_inserts_rows(self, complaint_service, mock_complaint_repository, mock_image_service, mock_complaint):
+        mock_complaint_repository.get_by_id_with_comments.return_value = mock_complaint
+        mock_image_service.save_complaint_images.return_value = [
+            StoredImage(url='/static/complaints/a.jpg'),
+            StoredImage(url='/static/complaints/b.jpg', variants={'thumb': {'webp': '/static/complaints/b_thumb.webp'}})
+        ]
+        mock_complaint_repository.add_images.return_value = [
+            ComplaintImage(id=1, complaint_id=1, url='/static/complaints/a.jpg', position=0),
+            ComplaintImage(id=2, complaint_id=1, url='/static/complaints/b.jpg', position=1)
+        ]
+
+        result = await complaint_service.upload_complaint_images([mock.Mock(), mock.Mock()], 1)
+
+        mock_complaint_repository.add_images.assert_called_once_with(
+            complaint_id=1,
+            images=[
+                ('/static/complaints/a.jpg', None),
+                ('/static/complaints/b.jpg', {'thumb': {'webp': '/static/complaints/b_thumb.webp'}})
+            ]
+        )
+        assert [image.url for image in result] == ['/static/complaints/a.jpg', '/static/complaints/b.jpg']
+
     @pytest.mark.unit
     @pytest.mark.asyncio
     async def test_get_by_id_successful(self, complaint_service, mock_complaint_repository, mock_complaint):
@@ -109,4 +168,106 @@ class TestComplaintService:
         mock_user_service.get_user_by_id.assert_called_once_with(user_id)
         mock_complaint_repository.get_by_user_id.assert_called_once_with(user_id)
         assert isinstance(result, list)
-        assert result[0].id == mock_complaint.id
\ No newline at end of file
+        assert result[0].id == mock_complaint.id
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_clusters_uses_tile_cache(self, complaint_service, mock_complaint_repository):
+        cluster_cache.clear()
+        mock_complaint_repository.get_cluster_rows.return_value = [
+            ('txwv', ComplaintStatus.PENDING, 2, 85.75, 149.17),
+            ('txwv', ComplaintStatus.RESOLVED, 1, 42.87, 74.6),
+        ]
+        query = ComplaintClusterQueryModel(bbox='74.5,42.8,74.7,42.9', zoom=8)
+
+        first = await complaint_service.get_clusters(query)
+        second = await complaint_service.get_clusters(query)
+
+        mock_complaint_repository.get_cluster_rows.assert_called_once()
+        assert first == second
+        assert len(first) == 1
+        assert first[0].count == 3
+        assert first[0].statuses == {ComplaintStatus.PENDING: 2, ComplaintStatus.RESOLVED: 1}
+        assert first[0].latitude == pytest.approx(42.873, abs=1e-3)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_clusters_invalidated_during_query_are_not_cached(self, complaint_service, mock_complaint_repository):
+        cluster_cache.clear()
+
+        async def rows_then_write(*args):
+            spatial_cache.invalidate_local('txwv', None, 42.87, 74.6)
+            return [('txwv', ComplaintStatus.PENDING, 1, 42.87, 74.6)]
+
+        mock_complaint_repository.get_cluster_rows.side_effect = rows_then_write
+        query = ComplaintClusterQueryModel(bbox='74.5,42.8,74.7,42.9', zoom=8)
+
+        await complaint_service.get_clusters(query)
+        await complaint_service.get_clusters(query)
+
+        assert mock_complaint_repository.get_cluster_rows.await_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_tile_invalidated_during_query_is_not_cached(self, complaint_service, mock_complaint_repository):
+        tile_cache.clear()
+
+        async def points_then_write(*args):
+            spatial_cache.invalidate_local(None, None, 42.87, 74.6)
+            return [(1, 42.87, 74.6, ComplaintStatus.PENDING, 'road')]
+
+        mock_complaint_repository.get_tile_points.side_effect = points_then_write
+
+        await complaint_service.get_vector_tile(12, 2896, 1513)
+        await complaint_service.get_vector_tile(12, 2896, 1513)
+
+        assert mock_complaint_repository.get_tile_points.await_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_vector_tile_uses_cache(self, complaint_service, mock_complaint_repository):
+        tile_cache.clear()
+        mock_complaint_repository.get_tile_points.return_value = [(1, 42.87, 74.6, ComplaintStatus.PENDING, 'road')]
+
+        first = await complaint_service.get_vector_tile(10, 724, 374)
+        second = await complaint_service.get_vector_tile(10, 724, 374)
+
+        mock_complaint_repository.get_tile_points.assert_called_once()
+        assert first == second
+        assert b'road' in first
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_vector_tile_invalid_coordinates(self, complaint_service, mock_complaint_repository):
+        with pytest.raises(InvalidTileCoordinates):
+            await complaint_service.get_vector_tile(2, 4, 0)
+
+        mock_complaint_repository.get_tile_points.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_page_next_cursor(self, complaint_service, mock_complaint_repository, mock_complaint):
+        mock_complaint_repository.get_all.return_value = [mock_complaint]
+
+        full_page = await complaint_service.get_page(ComplaintQueryModel(limit=1))
+        last_page = await complaint_service.get_page(ComplaintQueryModel(limit=2))
+
+        assert decode_cursor(full_page.next_cursor) == (mock_complaint.created_at, mock_complaint.id)
+        assert last_page.next_cursor is None
+
+    @pytest.mark.unit
+    def test_query_model_rejects_invalid_cursor(self):
+        with pytest.raises(ValueError):
+            ComplaintQueryModel(cursor='not-a-cursor')
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_update_invalidates_cache(self, mock_complaint_repository, mock_user_service, mock_image_service, mock_complaint, mock_complaint_update):
+        cache = mock.AsyncMock()
+        service = ComplaintService(mock_complaint_repository, mock_user_service, mock_image_service, cache=cache)
+        mock_complaint_repository.get_by_id.return_value = mock_complaint
+        mock_complaint_repository.update.return_value = mock_complaint
+
+        await service.update_complaint(1, 1, mock_complaint_update)
+
+        cache.invalidate_tags.assert_awaited_once_with('complaints:list', 'complaint:1')
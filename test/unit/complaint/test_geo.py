@@ -0,0 +1,52 @@
+import pytest
+from pydantic import ValidationError
+
+from src.complaints import ComplaintQueryModel
+from src.complaints import geo
+
+
+class TestGeo:
+
+    @pytest.mark.unit
+    def test_encode_known_point(self):
+        assert geo.encode(57.64911, 10.40744, precision=11) == 'u4pruydqqvj'
+
+    @pytest.mark.unit
+    def test_decode_returns_cell_center(self):
+        latitude, longitude = geo.decode(geo.encode(42.8765, 74.6037))
+
+        assert latitude == pytest.approx(42.8765, abs=1e-6)
+        assert longitude == pytest.approx(74.6037, abs=1e-6)
+
+    @pytest.mark.unit
+    def test_safe_encode_invalid_point(self):
+        assert geo.safe_encode(3123.3123, 31231.3123) is None
+
+    @pytest.mark.unit
+    def test_covering_prefixes_cover_points_inside(self):
+        bbox = geo.BoundingBox(42.8, 74.5, 42.9, 74.7)
+        prefixes = geo.covering_prefixes(bbox)
+
+        assert len(prefixes) <= geo.MAX_COVERING_CELLS
+        for latitude, longitude in [(42.8, 74.5), (42.85, 74.6), (42.9, 74.7)]:
+            assert any(geo.encode(latitude, longitude).startswith(p) for p in prefixes)
+
+    @pytest.mark.unit
+    def test_prefix_ranges_merge_adjacent_cells(self):
+        assert geo.prefix_ranges(['tz', 'u0', 'u1', 'u3']) == [('tz', 'u2'), ('u3', 'u4')]
+        assert geo.prefix_ranges(['zz']) == [('zz', None)]
+
+    @pytest.mark.unit
+    def test_haversine(self):
+        distance = geo.haversine(42.8765, 74.6037, 42.8746, 74.5698)
+        assert distance == pytest.approx(2780, rel=0.02)
+
+    @pytest.mark.unit
+    def test_query_model_requires_full_center(self):
+        with pytest.raises(ValidationError):
+            ComplaintQueryModel(lat=42.0, lon=74.0)
+
+    @pytest.mark.unit
+    def test_query_model_rejects_bad_bbox(self):
+        with pytest.raises(ValidationError):
+            ComplaintQueryModel(bbox='1,2,3')
@@ -0,0 +1,42 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src import Complaint
+from src.complaints import SpatialCacheInvalidator, geo, vector_tiles
+from src.complaints.clustering import cluster_cache
+from src.complaints.spatial_cache import INVALIDATION_CHANNEL
+from src.websocket import WebSocketBroker, InMemoryPubSubBackend
+from src.websocket.manager import ConnectionManager
+
+
+class TestSpatialCacheInvalidator:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers(self):
+        hub = {}
+        writer = WebSocketBroker(ConnectionManager(), InMemoryPubSubBackend(hub))
+        reader = WebSocketBroker(ConnectionManager(), InMemoryPubSubBackend(hub))
+        reader_handler = AsyncMock(side_effect=SpatialCacheInvalidator.handle)
+        writer.listen(INVALIDATION_CHANNEL, SpatialCacheInvalidator.handle)
+        reader.listen(INVALIDATION_CHANNEL, reader_handler)
+        await writer.start()
+        await reader.start()
+
+        geohash = geo.safe_encode(42.8765, 74.6037)
+        x, y = vector_tiles.point_to_tile(42.8765, 74.6037, 10)
+        cluster_cache.set((4, geohash[:2], None), [])
+        vector_tiles.tile_cache.set((10, x, y), b'tile')
+        complaint = Complaint(
+            id=1, complaint_text='new', latitude=42.8765, longitude=74.6037,
+            geohash=geohash, description='', user_id=1
+        )
+
+        await SpatialCacheInvalidator(writer.publish).invalidate(complaint)
+
+        reader_handler.assert_awaited_once()
+        assert (4, geohash[:2], None) not in cluster_cache
+        assert (10, x, y) not in vector_tiles.tile_cache
+        await writer.stop()
+        await reader.stop()
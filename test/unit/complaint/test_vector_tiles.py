@@ -0,0 +1,44 @@
+import pytest
+
+from src import ComplaintStatus
+from src.complaints import vector_tiles
+
+
+class TestVectorTiles:
+
+    @pytest.mark.unit
+    def test_tile_bounds_of_world_tile(self):
+        bounds = vector_tiles.tile_bounds(0, 0, 0)
+
+        assert bounds.min_lon == -180.0
+        assert bounds.max_lon == 180.0
+        assert bounds.max_lat == pytest.approx(vector_tiles.MAX_MERCATOR_LAT)
+
+    @pytest.mark.unit
+    def test_point_to_tile_inside_bounds(self):
+        x, y = vector_tiles.point_to_tile(42.8765, 74.6037, 14)
+
+        assert vector_tiles.tile_bounds(14, x, y).contains(42.8765, 74.6037)
+
+    @pytest.mark.unit
+    def test_encode_tile(self):
+        tile = vector_tiles.encode_tile([(7, 0.0, 0.0, ComplaintStatus.PENDING, None)], 0, 0, 0)
+
+        assert tile[0] == 0x1a
+        assert b'complaints' in tile
+        assert b'status' in tile and b'pending' in tile
+        assert b'category' not in tile
+        # MoveTo(1) to the middle of the tile: zigzag(2048) == 4096
+        assert bytes([0x22, 0x05, 0x09, 0x80, 0x20, 0x80, 0x20]) in tile
+
+    @pytest.mark.unit
+    def test_invalidate_tiles(self):
+        vector_tiles.tile_cache.clear()
+        x, y = vector_tiles.point_to_tile(42.8765, 74.6037, 12)
+        vector_tiles.tile_cache.set((12, x, y), b'tile')
+        vector_tiles.tile_cache.set((12, x + 1, y), b'tile')
+
+        vector_tiles.invalidate_tiles(42.8765, 74.6037)
+
+        assert (12, x, y) not in vector_tiles.tile_cache
+        assert (12, x + 1, y) in vector_tiles.tile_cache
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import exc
+
+from src.core.database_helper import DatabaseHelper, DB_POOL_CHECKOUT, DB_POOL_EXHAUSTED, DB_POOL_TIMEOUTS, asyncpg_connect_args
+
+
+class TestDatabasePool:
+
+    @pytest.mark.unit
+    def test_asyncpg_connect_args(self):
+        assert asyncpg_connect_args(0, 0, 0) == {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+        assert asyncpg_connect_args(100, 500, 5000)['server_settings'] == {'statement_timeout': '5000'}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_reports_checkout_time_exhaustion_and_timeouts(self, tmp_path):
+        helper = DatabaseHelper(f'sqlite+aiosqlite:///{tmp_path / "pool.db"}', pool_size=1, max_overflow=0, pool_timeout=0.05)
+        checkouts = DB_POOL_CHECKOUT.count('primary')
+        exhausted = DB_POOL_EXHAUSTED.value('primary')
+        timeouts = DB_POOL_TIMEOUTS.value('primary')
+
+        try:
+            async with helper.async_engine.connect():
+                with pytest.raises(exc.TimeoutError):
+                    await helper.async_engine.connect().start()
+        finally:
+            await helper.dispose()
+
+        assert DB_POOL_CHECKOUT.count('primary') == checkouts + 2
+        assert DB_POOL_EXHAUSTED.value('primary') == exhausted + 1
+        assert DB_POOL_TIMEOUTS.value('primary') == timeouts + 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_engine_options_are_applied(self, tmp_path):
+        helper = DatabaseHelper(
+            f'sqlite+aiosqlite:///{tmp_path / "pool.db"}',
+            pool_size=3,
+            max_overflow=2,
+            pool_timeout=7,
+            pool_recycle=600,
+            replica_urls=[f'sqlite+aiosqlite:///{tmp_path / "replica.db"}']
+        )
+        try:
+            pool = helper.async_engine.pool
+            assert (pool.size(), pool._max_overflow, pool._timeout, pool._recycle) == (3, 2, 7, 600)
+            assert helper.async_engine.echo is False
+            assert helper.replica_engines[0].pool.size() == 3
+        finally:
+            await helper.dispose()
@@ -0,0 +1,40 @@
+import pytest
+
+from src import Complaint, ComplaintImage
+from src.core.images import referenced_image_urls
+
+
+class TestImageReferences:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_collects_images_and_variants_of_complaints_galleries_and_users(self, session, user):
+        user.avatar_url = '/static/avatars/a.jpg'
+        user.avatar_variants = {'thumb': {'webp': '/static/avatars/a_thumb.webp'}}
+        complaint = Complaint(
+            complaint_text='complaint',
+            latitude=42.87,
+            longitude=74.59,
+            description='description',
+            user_id=user.id,
+            image_url='/static/complaints/b.png',
+            image_variants={'thumb': {'webp': '/static/complaints/b_thumb.webp', 'jpeg': '/static/complaints/b_thumb.jpg'}}
+        )
+        session.add(complaint)
+        await session.flush()
+        session.add(ComplaintImage(
+            complaint_id=complaint.id,
+            url='/static/complaints/c.jpg',
+            variants={'thumb': {'webp': '/static/complaints/c_thumb.webp'}}
+        ))
+        await session.commit()
+
+        assert await referenced_image_urls(session) == {
+            '/static/avatars/a.jpg',
+            '/static/avatars/a_thumb.webp',
+            '/static/complaints/b.png',
+            '/static/complaints/b_thumb.webp',
+            '/static/complaints/b_thumb.jpg',
+            '/static/complaints/c.jpg',
+            '/static/complaints/c_thumb.webp'
+        }
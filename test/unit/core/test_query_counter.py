@@ -0,0 +1,46 @@
+import pytest
+from sqlmodel import select
+
+from src import User
+from src.core.database_helper import QueryCounter
+
+
+class TestQueryCounter:
+
+    @pytest.mark.unit
+    def test_shape_ignores_whitespace_and_parameter_lists(self):
+        assert QueryCounter.shape('SELECT *\n  FROM users WHERE id IN (?, ?, ?)') == 'SELECT * FROM users WHERE id IN (?)'
+        assert QueryCounter.shape('SELECT * FROM users WHERE id IN ($1, $2)') == 'SELECT * FROM users WHERE id IN (?)'
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_counts_statements_and_duplicates(self, session, user, count_queries):
+        with count_queries() as queries:
+            await session.scalar(select(User).where(User.id == user.id))
+            await session.scalar(select(User).where(User.id == user.id + 1))
+
+        assert queries.count == 2
+        [(shape, times)] = queries.duplicates().items()
+        assert shape.startswith('SELECT')
+        assert times == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_nested_counters_report_to_parent(self, session, user, count_queries):
+        with count_queries() as outer:
+            await session.scalar(select(User).where(User.id == user.id))
+            with count_queries() as inner:
+                await session.scalar(select(User.email))
+
+        assert inner.count == 1
+        assert outer.count == 2
+        assert outer.duplicates() == {}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_statements_outside_are_not_counted(self, session, user, count_queries):
+        with count_queries() as queries:
+            pass
+        await session.scalar(select(User))
+
+        assert queries.count == 0
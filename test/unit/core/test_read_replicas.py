@@ -0,0 +1,74 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src import Complaint
+from src.complaints.repositories import ComplaintRepositories
+from src.complaints import ComplaintQueryModel
+from src.core import Services
+from src.core.database_helper import DatabaseHelper
+
+
+class TestReadReplicas:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_read_sessions_rotate_over_replicas(self, tmp_path):
+        helper = DatabaseHelper(
+            f'sqlite+aiosqlite:///{tmp_path / "primary.db"}',
+            echo=False,
+            replica_urls=[f'sqlite+aiosqlite:///{tmp_path / "replica1.db"}', f'sqlite+aiosqlite:///{tmp_path / "replica2.db"}']
+        )
+        try:
+            read_session = helper.get_read_session_factory()
+            binds = [read_session().bind for _ in range(3)]
+        finally:
+            await helper.dispose()
+
+        assert binds == [helper.replica_engines[0], helper.replica_engines[1], helper.replica_engines[0]]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_without_replicas_reads_use_write_session(self, tmp_path):
+        helper = DatabaseHelper(f'sqlite+aiosqlite:///{tmp_path / "primary.db"}', echo=False)
+        try:
+            assert helper.get_read_session_factory() is None
+        finally:
+            await helper.dispose()
+
+        session = Mock()
+        services = Services(Mock(return_value=session))
+        assert services.complaint_repository.read_db is session
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_reads_stick_to_primary_after_commit(self, test_engine, tmp_database):
+        replica = AsyncMock()
+        services = Services(async_sessionmaker(test_engine, expire_on_commit=False), Mock(return_value=replica))
+        repository = services.complaint_repository
+
+        assert repository.read_db is replica
+        await services.db.commit()
+
+        assert repository.read_db is services.db
+        await services.close()
+        replica.close.assert_awaited_once()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_repository_reads_from_replica(self, session, user, test_engine):
+        session.add(Complaint(complaint_text='replicated', latitude=42.87, longitude=74.59, description='', user_id=user.id))
+        await session.commit()
+        replica = async_sessionmaker(test_engine, expire_on_commit=False)()
+        # reads must not touch the write session
+        repository = ComplaintRepositories(Mock(), read_db=Mock(return_value=replica))
+
+        try:
+            complaints = await repository.get_all(ComplaintQueryModel())
+            complaint = await repository.get_by_id_with_comments(complaints[0].id)
+        finally:
+            await replica.close()
+
+        assert [complaint.complaint_text for complaint in complaints] == ['replicated']
+        assert complaint.comments == []
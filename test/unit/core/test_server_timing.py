@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import exc, text
+
+from src.common import server_timing
+
+
+class TestServerTimingDatabasePhase:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_statement_does_not_skew_later_timings(self, session):
+        timings = server_timing.start_request()
+
+        with pytest.raises(exc.OperationalError):
+            await session.execute(text('SELECT * FROM missing_table'))
+        await session.rollback()
+        await session.execute(text('SELECT 1'))
+
+        count, duration = timings.phases['db']
+        assert count == 2
+        assert 0 <= duration < 1
+        connection = await session.connection()
+        assert 'server_timing_start' not in connection.info
@@ -0,0 +1,42 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.core import Services
+
+
+class TestServices:
+
+    @pytest.mark.unit
+    def test_shared_services_do_not_open_session(self):
+        session_factory = Mock()
+
+        services = Services(session_factory)
+
+        assert services.token_service is Services(session_factory).token_service
+        assert services.image_service is Services(session_factory).image_service
+        session_factory.assert_not_called()
+
+    @pytest.mark.unit
+    def test_session_and_repositories_created_once_on_first_access(self):
+        session_factory = Mock()
+        services = Services(session_factory)
+
+        assert services.complaint_service is services.complaint_service
+        assert services.comment_service._complaint_service is services.complaint_service
+        assert services.auth_service._user_repo is services.user_repository
+
+        session_factory.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_close_only_closes_opened_session(self):
+        session = AsyncMock()
+        untouched, used = Services(Mock(return_value=session)), Services(Mock(return_value=session))
+
+        await untouched.close()
+        session.close.assert_not_awaited()
+
+        used.user_repository
+        await used.close()
+        session.close.assert_awaited_once()
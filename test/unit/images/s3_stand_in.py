@@ -0,0 +1,147 @@
+"""
+In-memory stand-in for an S3-compatible server, the subset of the API S3Storage uses:
+objects (PUT, copy, GET with Range, HEAD, DELETE), ListObjectsV2 and multipart uploads.
+Signatures are not verified, SigV4 is covered against the AWS test vectors.
+"""
+import base64
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from urllib.parse import unquote
+from xml.etree import ElementTree
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+NAMESPACE = 'http://s3.amazonaws.com/doc/2006-03-01/'
+
+
+@dataclass
+class StoredBlob:
+    content: bytes
+    content_type: str
+    modified: float = field(default_factory=time.time)
+
+
+class S3StandIn:
+    def __init__(self, bucket: str, max_keys: int = 1000):
+        self.bucket = bucket
+        self.max_keys = max_keys
+        self.objects: dict[str, StoredBlob] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.completed_parts: dict[str, int] = {}
+        self.requests: list[tuple[str, str]] = []
+
+    async def __call__(self, scope, receive, send):
+        request = Request(scope, receive)
+        response = await self.handle(request)
+        await response(scope, receive, send)
+
+    @staticmethod
+    def _error(status: int, code: str) -> Response:
+        return Response(f'<Error><Code>{code}</Code></Error>', status_code=status, media_type='application/xml')
+
+    async def handle(self, request: Request) -> Response:
+        bucket, _, key = unquote(request.url.path).lstrip('/').partition('/')
+        self.requests.append((request.method, key))
+        if bucket != self.bucket:
+            return self._error(404, 'NoSuchBucket')
+        if 'X-Amz-Signature' not in request.query_params and 'authorization' not in request.headers:
+            return self._error(403, 'AccessDenied')
+
+        params = request.query_params
+        if not key:
+            return self._list(params)
+        if 'uploads' in params:
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {}
+            return self._xml(f'<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+        if 'uploadId' in params:
+            return await self._multipart(request, key, params)
+
+        if request.method == 'PUT':
+            return await self._put(request, key)
+
+        blob = self.objects.get(key)
+        if request.method == 'DELETE':
+            self.objects.pop(key, None)
+            return Response(status_code=204)
+        if blob is None:
+            return self._error(404, 'NoSuchKey')
+
+        headers = {
+            'content-type': blob.content_type,
+            'content-length': str(len(blob.content)),
+            'last-modified': formatdate(blob.modified, usegmt=True),
+            'etag': f'"{hashlib.md5(blob.content).hexdigest()}"'
+        }
+        if request.method == 'HEAD':
+            return Response(status_code=200, headers=headers)
+
+        if range_header := request.headers.get('range'):
+            start, _, end = range_header.removeprefix('bytes=').partition('-')
+            content = blob.content[int(start):int(end) + 1]
+            headers['content-length'] = str(len(content))
+            return Response(content, status_code=206, headers=headers)
+        return Response(blob.content, headers=headers)
+
+    async def _put(self, request: Request, key: str) -> Response:
+        if source := request.headers.get('x-amz-copy-source'):
+            blob = self.objects.get(unquote(source).lstrip('/').partition('/')[2])
+            if blob is None:
+                return self._error(404, 'NoSuchKey')
+            self.objects[key] = StoredBlob(blob.content, request.headers.get('content-type', blob.content_type))
+            return self._xml('<CopyObjectResult></CopyObjectResult>')
+
+        content = await request.body()
+        if 'content-length' in request.headers and int(request.headers['content-length']) != len(content):
+            return self._error(400, 'IncompleteBody')
+        if checksum := request.headers.get('x-amz-checksum-sha256'):
+            if base64.b64encode(hashlib.sha256(content).digest()).decode() != checksum:
+                return self._error(400, 'BadDigest')
+
+        self.objects[key] = StoredBlob(content, request.headers.get('content-type', 'application/octet-stream'))
+        return Response(status_code=200, headers={'etag': f'"{hashlib.md5(content).hexdigest()}"'})
+
+    async def _multipart(self, request: Request, key: str, params) -> Response:
+        parts = self.uploads.get(params['uploadId'])
+        if parts is None:
+            return self._error(404, 'NoSuchUpload')
+
+        if request.method == 'PUT':
+            content = await request.body()
+            parts[int(params['partNumber'])] = content
+            return Response(status_code=200, headers={'etag': f'"{hashlib.md5(content).hexdigest()}"'})
+        if request.method == 'DELETE':
+            del self.uploads[params['uploadId']]
+            return Response(status_code=204)
+
+        root = ElementTree.fromstring(await request.body())
+        numbers = [int(part.findtext('PartNumber')) for part in root.findall('Part')]
+        del self.uploads[params['uploadId']]
+        self.objects[key] = StoredBlob(b''.join(parts[number] for number in numbers), 'application/octet-stream')
+        self.completed_parts[key] = len(numbers)
+        return self._xml('<CompleteMultipartUploadResult></CompleteMultipartUploadResult>')
+
+    def _list(self, params) -> Response:
+        keys = sorted(key for key in self.objects if key.startswith(params.get('prefix', '')))
+        start = int(params.get('continuation-token', 0))
+        page = keys[start:start + self.max_keys]
+        truncated = start + self.max_keys < len(keys)
+
+        contents = ''.join(
+            f'<Contents><Key>{key}</Key><Size>{len(self.objects[key].content)}</Size>'
+            f'<LastModified>{time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(self.objects[key].modified))}</LastModified></Contents>'
+            for key in page
+        )
+        token = f'<NextContinuationToken>{start + self.max_keys}</NextContinuationToken>' if truncated else ''
+        return self._xml(
+            f'<ListBucketResult xmlns="{NAMESPACE}"><IsTruncated>{str(truncated).lower()}</IsTruncated>'
+            f'{token}{contents}</ListBucketResult>'
+        )
+
+    @staticmethod
+    def _xml(body: str) -> Response:
+        return Response(f'<?xml version="1.0" encoding="UTF-8"?>{body}', media_type='application/xml')
@@ -0,0 +1,91 @@
+import os
+import time
+
+import pytest
+
+from src.images import LocalStorage, collect_garbage, clean_staging
+
+DIGEST = 'a' * 64
+OTHER = 'b' * 64
+
+
+@pytest.fixture()
+def storage(tmp_path):
+    (tmp_path / 'static' / 'complaints').mkdir(parents=True)
+    return LocalStorage(root=tmp_path / 'static')
+
+def touch(path, age: float = 0):
+    path.write_bytes(b'image')
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestImageGarbageCollection:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_removes_unreferenced_content_addressed_files(self, storage):
+        complaints = storage.root / 'complaints'
+        kept = touch(complaints / f'{DIGEST}.jpg', age=7200)
+        kept_variant = touch(complaints / f'{DIGEST}_thumb.webp', age=7200)
+        touch(complaints / f'{OTHER}.jpg', age=7200)
+        touch(complaints / f'{OTHER}_thumb.webp', age=7200)
+
+        removed = await collect_garbage(
+            storage,
+            ['complaints'],
+            # URLs are matched by key, whatever storage base URL they were stored with
+            {f'/static/complaints/{DIGEST}.jpg', f'https://cdn.test/complaints/{DIGEST}_thumb.webp'},
+            grace_period=3600
+        )
+
+        assert sorted(removed) == [f'complaints/{OTHER}.jpg', f'complaints/{OTHER}_thumb.webp']
+        assert kept.exists() and kept_variant.exists()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_keeps_recent_and_legacy_files(self, storage):
+        complaints = storage.root / 'complaints'
+        recent = touch(complaints / f'{OTHER}.jpg', age=10)
+        legacy = touch(complaints / 'complaint_1.jpg', age=7200)
+        touch(complaints / f'.{DIGEST}.jpg.part', age=7200)
+
+        removed = await collect_garbage(storage, ['complaints', 'avatars'], set(), grace_period=3600)
+
+        assert removed == [f'complaints/.{DIGEST}.jpg.part']
+        assert recent.exists() and legacy.exists()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_keeps_file_touched_after_listing(self, storage):
+        complaints = storage.root / 'complaints'
+        deduplicated = touch(complaints / f'{OTHER}.jpg', age=7200)
+        listing = storage.list
+
+        async def list_then_upload(prefix):
+            async for stored in listing(prefix):
+                # a repeated upload of the same content refreshes the file before GC deletes it
+                await storage.touch(stored.key)
+                yield stored
+
+        storage.list = list_then_upload
+
+        removed = await collect_garbage(storage, ['complaints'], set(), grace_period=3600)
+
+        assert removed == []
+        assert deduplicated.exists()
+
+    @pytest.mark.unit
+    def test_clean_staging_removes_abandoned_uploads(self, tmp_path):
+        abandoned = tmp_path / 'abandoned'
+        abandoned.mkdir()
+        touch(abandoned / 'upload', age=7200)
+        os.utime(abandoned, (time.time() - 7200, time.time() - 7200))
+        in_progress = tmp_path / 'in_progress'
+        in_progress.mkdir()
+
+        removed = clean_staging(tmp_path, grace_period=3600)
+
+        assert removed == [abandoned]
+        assert in_progress.exists()
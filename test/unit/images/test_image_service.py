@@ -0,0 +1,331 @@
+import asyncio
+import errno
+import hashlib
+import io
+import os
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from src.images import ImageService, ImageProcessor, LocalStorage, S3Storage, DirectUploadRequest
+from src.images.variants import variant_file_names
+from test.unit.images.s3_stand_in import S3StandIn
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 100
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 100
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def upload(content: bytes, filename: str = 'photo.jpg', content_type: str = 'image/jpeg', size: int | None = None) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(content),
+        filename=filename,
+        size=size,
+        headers=Headers({'content-type': content_type})
+    )
+
+
+@pytest.fixture()
+def image_service(tmp_path):
+    return ImageService(
+        storage=LocalStorage(root=tmp_path / 'static'),
+        staging_dir=tmp_path / 'staging',
+        max_size=1024,
+        chunk_size=16
+    )
+
+@pytest.fixture()
+def s3_server():
+    return S3StandIn(bucket='images')
+
+@pytest_asyncio.fixture()
+async def s3_image_service(s3_server, tmp_path):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=s3_server))
+    storage = S3Storage('http://s3.test', 'images', 'access', 'secret', client=client)
+    yield ImageService(storage=storage, staging_dir=tmp_path / 'staging', max_size=1024)
+    await client.aclose()
+
+def stored_files(tmp_path) -> list[str]:
+    return sorted(str(path.relative_to(tmp_path / 'static')) for path in (tmp_path / 'static').rglob('*') if path.is_file())
+
+
+class TestImageService:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_extension_comes_from_magic_bytes(self, image_service, tmp_path):
+        image = await image_service.save_complaint_image(upload(PNG, filename='photo.jpg'), complaint_id=1)
+
+        assert image.url == f'/static/complaints/{sha256(PNG)}.png'
+        assert image.variants is None
+        assert (tmp_path / 'static' / 'complaints' / f'{sha256(PNG)}.png').read_bytes() == PNG
+        # the working directory is removed
+        assert list((tmp_path / 'staging').iterdir()) == []
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_rejects_non_image_with_image_content_type(self, image_service, tmp_path):
+        with pytest.raises(HTTPException) as exc:
+            await image_service.save_user_avatar_image(upload(b'<?php echo 1; ?>'), user_id=1)
+
+        assert exc.value.status_code == 400
+        assert stored_files(tmp_path) == []
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload_while_streaming(self, image_service, tmp_path):
+        with pytest.raises(HTTPException) as exc:
+            await image_service.save_complaint_image(upload(JPEG + b'\x00' * 2048), complaint_id=1)
+
+        assert exc.value.status_code == 413
+        # the partial file is removed
+        assert stored_files(tmp_path) == []
+        assert list((tmp_path / 'staging').iterdir()) == []
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_rejects_declared_size_before_reading(self, image_service):
+        with pytest.raises(HTTPException) as exc:
+            await image_service.save_complaint_image(upload(JPEG, size=4096), complaint_id=1)
+
+        assert exc.value.status_code == 413
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_identical_uploads_share_one_file(self, image_service, tmp_path):
+        first = await image_service.save_user_avatar_image(upload(JPEG), user_id=1)
+        second = await image_service.save_user_avatar_image(upload(JPEG), user_id=2)
+        other = await image_service.save_user_avatar_image(upload(PNG), user_id=1)
+
+        assert first.url == second.url == f'/static/avatars/{sha256(JPEG)}.jpg'
+        assert other.url == f'/static/avatars/{sha256(PNG)}.png'
+        assert stored_files(tmp_path) == sorted([f'avatars/{sha256(JPEG)}.jpg', f'avatars/{sha256(PNG)}.png'])
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_variants_are_stored_and_reused(self, tmp_path):
+        digest = sha256(JPEG)
+
+        async def render(source, stem):
+            for files in variant_file_names(stem, {'thumb': 320}).values():
+                for filename in files.values():
+                    (source.parent / filename).write_bytes(b'variant')
+            return variant_file_names(stem, {'thumb': 320})
+
+        processor = AsyncMock()
+        processor.file_names = lambda stem: variant_file_names(stem, {'thumb': 320})
+        processor.render.side_effect = render
+        image_service = ImageService(storage=LocalStorage(root=tmp_path / 'static'), staging_dir=tmp_path / 'staging', processor=processor)
+
+        image = await image_service.save_complaint_image(upload(JPEG), complaint_id=1)
+        await image_service.save_complaint_image(upload(JPEG), complaint_id=2)
+
+        processor.render.assert_awaited_once()
+        assert image.variants == {'thumb': {
+            'webp': f'/static/complaints/{digest}_thumb.webp',
+            'jpeg': f'/static/complaints/{digest}_thumb.jpg'
+        }}
+        assert stored_files(tmp_path) == sorted([
+            f'complaints/{digest}.jpg', f'complaints/{digest}_thumb.jpg', f'complaints/{digest}_thumb.webp'
+        ])
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_upload_renders_variants(self, tmp_path):
+        photo = io.BytesIO()
+        Image.new('RGB', (640, 480), 'blue').save(photo, 'JPEG')
+        content = photo.getvalue()
+        processor = ImageProcessor(sizes={'thumb': 100}, pool_size=1)
+        image_service = ImageService(storage=LocalStorage(root=tmp_path / 'static'), staging_dir=tmp_path / 'staging', processor=processor)
+
+        try:
+            image = await image_service.save_complaint_image(upload(content), complaint_id=1)
+        finally:
+            processor.shutdown()
+
+        thumb = image.variants['thumb']['jpeg']
+        assert thumb == f'/static/complaints/{sha256(content)}_thumb.jpg'
+        with Image.open(tmp_path / 'static' / 'complaints' / f'{sha256(content)}_thumb.jpg') as rendered:
+            assert rendered.size == (100, 75)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_proxied_upload_to_s3(self, s3_image_service, s3_server):
+        image = await s3_image_service.save_complaint_image(upload(JPEG), complaint_id=1)
+
+        assert image.url == f'http://s3.test/images/complaints/{sha256(JPEG)}.jpg'
+        assert s3_server.objects[f'complaints/{sha256(JPEG)}.jpg'].content == JPEG
+
+
+class TestBatchUpload:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_stores_files_concurrently_within_limit(self, tmp_path):
+        image_service = ImageService(storage=LocalStorage(root=tmp_path / 'static'), staging_dir=tmp_path / 'staging', upload_concurrency=2)
+        running = 0
+        peak = 0
+        put_file = image_service.storage.put_file
+
+        async def slow_put_file(*args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            await put_file(*args)
+
+        image_service.storage.put_file = slow_put_file
+        contents = [JPEG + bytes([number]) for number in range(5)]
+
+        images = await image_service.save_complaint_images([upload(content) for content in contents], complaint_id=1)
+
+        assert [image.url for image in images] == [f'/static/complaints/{sha256(content)}.jpg' for content in contents]
+        assert peak == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_one_invalid_file_fails_the_batch(self, image_service):
+        with pytest.raises(HTTPException) as exc:
+            await image_service.save_complaint_images([upload(JPEG), upload(b'not an image')], complaint_id=1)
+
+        assert exc.value.status_code == 400
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_unexpected_error_is_not_wrapped(self, image_service):
+        image_service.storage.put_file = AsyncMock(side_effect=RuntimeError('disk gone'))
+
+        with pytest.raises(RuntimeError):
+            await image_service.save_complaint_images([upload(JPEG), upload(JPEG + b'1')], complaint_id=1)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_mixed_failures_raise_one_error(self, image_service):
+        stored = asyncio.Event()
+
+        async def failing_put_file(*args):
+            stored.set()
+            try:
+                await asyncio.sleep(1)
+            finally:
+                # fails even when cancelled, so the batch ends with errors of both kinds
+                raise RuntimeError('disk gone')
+
+        class SlowInvalidFile(io.BytesIO):
+            def read(self, size=-1):
+                asyncio.run_coroutine_threadsafe(stored.wait(), loop).result()
+                return super().read(size)
+
+        loop = asyncio.get_running_loop()
+        image_service.storage.put_file = failing_put_file
+        invalid = upload(b'not an image')
+        invalid.file = SlowInvalidFile(b'not an image')
+
+        with pytest.raises((HTTPException, RuntimeError)):
+            await image_service.save_complaint_images([upload(JPEG), invalid], complaint_id=1)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_rejects_too_many_files(self, image_service):
+        with pytest.raises(HTTPException) as exc:
+            await image_service.save_complaint_images([upload(JPEG)] * (image_service.max_files + 1), complaint_id=1)
+
+        assert exc.value.status_code == 400
+
+
+class TestDirectUpload:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_presign_upload_and_complete(self, s3_image_service, s3_server):
+        direct = await s3_image_service.presign_complaint_upload(
+            DirectUploadRequest(content_type='image/jpeg', size=len(JPEG), sha256=sha256(JPEG))
+        )
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=s3_server)) as client:
+            response = await client.request(direct.method, direct.url, headers=direct.headers, content=JPEG)
+
+        image = await s3_image_service.complete_complaint_upload(direct.key)
+
+        assert response.status_code == 200
+        assert direct.key == f'complaints/{sha256(JPEG)}.jpg'
+        assert image.url == f'http://s3.test/images/{direct.key}'
+        # the API never received the image bytes
+        assert [method for method, key in s3_server.requests if key == direct.key and method == 'GET'] == ['GET']
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_already_stored_image_needs_no_upload(self, s3_image_service, s3_server):
+        await s3_image_service.save_complaint_image(upload(JPEG), complaint_id=1)
+
+        direct = await s3_image_service.presign_complaint_upload(
+            DirectUploadRequest(content_type='image/jpeg', size=len(JPEG), sha256=sha256(JPEG))
+        )
+
+        assert direct.url is None
+        assert direct.key == f'complaints/{sha256(JPEG)}.jpg'
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_complete_rejects_and_deletes_non_image(self, s3_image_service, s3_server, tmp_path):
+        content = b'not an image at all'
+        key = f'complaints/{sha256(content)}.jpg'
+        path = tmp_path / 'upload'
+        path.write_bytes(content)
+        await s3_image_service.storage.put_file(key, path, 'image/jpeg')
+
+        with pytest.raises(HTTPException) as exc:
+            await s3_image_service.complete_complaint_upload(key)
+
+        assert exc.value.status_code == 400
+        assert key not in s3_server.objects
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_complete_without_upload(self, s3_image_service):
+        with pytest.raises(HTTPException) as exc:
+            await s3_image_service.complete_complaint_upload(f'complaints/{sha256(JPEG)}.jpg')
+
+        assert exc.value.status_code == 400
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_local_storage_has_no_direct_uploads(self, image_service):
+        with pytest.raises(HTTPException) as exc:
+            await image_service.presign_complaint_upload(
+                DirectUploadRequest(content_type='image/jpeg', size=len(JPEG), sha256=sha256(JPEG))
+            )
+
+        assert exc.value.status_code == 501
+
+
+class TestLocalStorage:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_put_file_across_file_systems(self, tmp_path, monkeypatch):
+        storage = LocalStorage(root=tmp_path / 'static')
+        upload_path = tmp_path / 'upload'
+        upload_path.write_bytes(JPEG)
+        replace = os.replace
+
+        def cross_device_replace(src, dst):
+            if src == upload_path:
+                raise OSError(errno.EXDEV, 'Invalid cross-device link')
+            replace(src, dst)
+
+        monkeypatch.setattr(os, 'replace', cross_device_replace)
+
+        await storage.put_file('complaints/a.jpg', upload_path, 'image/jpeg')
+
+        assert (tmp_path / 'static' / 'complaints' / 'a.jpg').read_bytes() == JPEG
+        assert not upload_path.exists()
+        assert [path.name for path in (tmp_path / 'static' / 'complaints').iterdir()] == ['a.jpg']
@@ -0,0 +1,58 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from src.images import ImmutableStaticFiles
+
+DIGEST = 'c' * 64
+CONTENT = bytes(range(256))
+
+
+@pytest.fixture()
+def static_app(tmp_path):
+    (tmp_path / f'{DIGEST}.jpg').write_bytes(CONTENT)
+    (tmp_path / 'complaint_1.jpg').write_bytes(CONTENT)
+    app = FastAPI()
+    app.mount('/static', ImmutableStaticFiles(directory=tmp_path), name='static')
+    return app
+
+async def get(app: FastAPI, path: str, headers: dict | None = None):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        return await client.get(path, headers=headers)
+
+
+class TestImmutableStaticFiles:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_content_addressed_file_is_immutable(self, static_app):
+        response = await get(static_app, f'/static/{DIGEST}.jpg')
+
+        assert response.status_code == 200
+        assert response.headers['cache-control'] == 'public, max-age=31536000, immutable'
+        assert response.headers['etag'] == f'"{DIGEST}"'
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_matching_etag_is_not_modified(self, static_app):
+        response = await get(static_app, f'/static/{DIGEST}.jpg', headers={'If-None-Match': f'"{DIGEST}"'})
+
+        assert response.status_code == 304
+        assert response.headers['cache-control'] == 'public, max-age=31536000, immutable'
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_range_request(self, static_app):
+        response = await get(static_app, f'/static/{DIGEST}.jpg', headers={'Range': 'bytes=10-19'})
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[10:20]
+        assert response.headers['content-range'] == f'bytes 10-19/{len(CONTENT)}'
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_other_files_are_not_immutable(self, static_app):
+        response = await get(static_app, '/static/complaint_1.jpg')
+
+        assert response.status_code == 200
+        assert 'cache-control' not in response.headers
@@ -0,0 +1,64 @@
+import pytest
+from PIL import Image
+
+from src.images import ImageProcessor
+from src.images.variants import render_variants, variant_file_names
+
+
+ORIENTATION = 0x0112
+
+
+@pytest.fixture()
+def rotated_photo(tmp_path):
+    """
+        Landscape pixels with EXIF orientation 6, displayed as a 600x800 portrait
+    """
+    path = tmp_path / 'complaint_1.jpg'
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    Image.new('RGB', (800, 600), 'red').save(path, 'JPEG', exif=exif)
+    return path
+
+
+class TestImageVariants:
+
+    @pytest.mark.unit
+    def test_resizes_rotates_and_strips_exif(self, rotated_photo, tmp_path):
+        variants = render_variants(str(rotated_photo), 'complaint_1', {'thumb': 320, 'medium': 1280}, 80)
+
+        assert variants['thumb'] == {'webp': 'complaint_1_thumb.webp', 'jpeg': 'complaint_1_thumb.jpg'}
+        with Image.open(tmp_path / 'complaint_1_thumb.jpg') as thumb:
+            assert thumb.size == (240, 320)
+            assert ORIENTATION not in thumb.getexif()
+        # smaller than the requested size, not upscaled
+        with Image.open(tmp_path / 'complaint_1_medium.webp') as medium:
+            assert medium.size == (600, 800)
+
+    @pytest.mark.unit
+    def test_file_names_match_rendered_files(self, rotated_photo, tmp_path):
+        variants = render_variants(str(rotated_photo), 'complaint_1', {'thumb': 320}, 80)
+
+        assert variants == variant_file_names('complaint_1', {'thumb': 320})
+        assert all((tmp_path / filename).exists() for files in variants.values() for filename in files.values())
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_processor_renders_in_worker_process(self, rotated_photo):
+        processor = ImageProcessor(sizes={'thumb': 100}, pool_size=1)
+        try:
+            variants = await processor.render(rotated_photo, 'complaint_1')
+        finally:
+            processor.shutdown()
+
+        assert variants == {'thumb': {'webp': 'complaint_1_thumb.webp', 'jpeg': 'complaint_1_thumb.jpg'}}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_undecodable_image_has_no_variants(self, tmp_path):
+        broken = tmp_path / 'complaint_1.jpg'
+        broken.write_bytes(b'\xff\xd8\xff\xe0 truncated')
+        processor = ImageProcessor(pool_size=1)
+        try:
+            assert await processor.render(broken, 'complaint_1') is None
+        finally:
+            processor.shutdown()
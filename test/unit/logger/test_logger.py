@@ -0,0 +1,68 @@
+import json
+import logging
+
+import pytest
+
+from logger import register_logger, stop_logger, SamplingFilter, JsonFormatter
+
+
+def make_record(name: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, 'called with %s', ('args',), None)
+
+
+@pytest.fixture()
+def queued_logger(tmp_path):
+    filename = tmp_path / 'test.log'
+
+    def configure(**kwargs) -> logging.Logger:
+        register_logger(filename=str(filename), name='fixkg_test', **kwargs)
+        return logging.getLogger('fixkg_test')
+
+    yield configure, filename
+    stop_logger('fixkg_test')
+
+
+class TestLogger:
+
+    @pytest.mark.unit
+    def test_sampling_filter_applies_to_children_and_keeps_warnings(self):
+        sampling = SamplingFilter({'fixkg.db_exception_handler': 0.0})
+
+        assert not sampling.filter(make_record('fixkg.db_exception_handler'))
+        assert not sampling.filter(make_record('fixkg.db_exception_handler.child'))
+        assert sampling.filter(make_record('fixkg.db_exception_handler', logging.ERROR))
+        assert sampling.filter(make_record('fixkg.user_repo'))
+
+    @pytest.mark.unit
+    def test_json_formatter(self):
+        payload = json.loads(JsonFormatter().format(make_record('fixkg.user_repo')))
+
+        assert payload['logger'] == 'fixkg.user_repo'
+        assert payload['level'] == 'INFO'
+        assert payload['message'] == 'called with args'
+
+    @pytest.mark.unit
+    def test_records_written_by_listener(self, queued_logger):
+        configure, filename = queued_logger
+        logger = configure(level='INFO', json_format=True)
+
+        logger.getChild('repo').debug('skipped by level')
+        logger.getChild('repo').info('written %d', 1)
+        stop_logger('fixkg_test')
+
+        [line] = filename.read_text().splitlines()
+        assert json.loads(line)['message'] == 'written 1'
+
+    @pytest.mark.unit
+    def test_sampled_out_records_are_dropped(self, queued_logger):
+        configure, filename = queued_logger
+        logger = configure(sample_rates={'fixkg_test.hot': 0.0})
+
+        logger.getChild('hot').info('dropped')
+        logger.getChild('hot').warning('kept')
+        logger.getChild('cold').info('kept')
+        stop_logger('fixkg_test')
+
+        lines = filename.read_text().splitlines()
+        assert len(lines) == 2
+        assert all('kept' in line for line in lines)
@@ -0,0 +1,66 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+from src.common import MetricsRegistry
+from src.main import app
+from src.middlewares import HTTP_REQUESTS
+
+
+class TestMetricsRegistry:
+
+    @pytest.mark.unit
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        requests = registry.counter('requests_total', 'Requests', labels=('route',))
+        registry.gauge('connections', 'Connections', function=lambda: 3)
+
+        requests.inc('/a "b"')
+        requests.inc('/a "b"', amount=2)
+
+        text = registry.render()
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{route="/a \\"b\\""} 3' in text
+        assert 'connections 3' in text
+
+    @pytest.mark.unit
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 5):
+            latency.observe(value=value)
+
+        lines = registry.render().splitlines()
+        assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{le="1"} 3' in lines
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+        assert 'latency_seconds_count 4' in lines
+        assert 'latency_seconds_sum 5.65' in lines
+
+    @pytest.mark.unit
+    def test_duplicate_name_rejected(self):
+        registry = MetricsRegistry()
+        registry.counter('requests_total', 'Requests')
+
+        with pytest.raises(ValueError):
+            registry.gauge('requests_total', 'Requests')
+
+
+class TestMetricsEndpoint:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_counts_requests_by_route_template(self):
+        before = HTTP_REQUESTS.value('GET', '/complaints/{complaint_id}', '401')
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+            await client.get('/complaints/1')
+            await client.get('/complaints/2')
+            response = await client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+        assert HTTP_REQUESTS.value('GET', '/complaints/{complaint_id}', '401') == before + 2
+        for name in ('http_request_duration_seconds', 'db_pool_checked_out', 'websocket_connections', 'notifications_total', 'redis_command_duration_seconds',
+                     'cache_hits_total', 'cache_misses_total'):
+            assert f'# TYPE {name}' in response.text
@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlmodel import select
+
+from src import User
+from src.middlewares import QueryCountMiddleware
+
+
+def build_app(session, queries: int, **options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryCountMiddleware, **options)
+
+    @app.get('/users/{user_id}')
+    async def get_user(user_id: int):
+        for _ in range(queries):
+            await session.scalar(select(User).where(User.id == user_id))
+        return 'ok'
+
+    return app
+
+async def get(app: FastAPI):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        return await client.get('/users/1')
+
+
+class TestQueryCountMiddleware:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_warns_above_threshold_with_route_template(self, session):
+        with patch('src.middlewares.logger') as logger:
+            await get(build_app(session, queries=3, warn_threshold=2))
+
+        logger.warning.assert_called_once()
+        assert logger.warning.call_args.args[1:] == ('GET', '/users/{user_id}', 3)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_warns_on_duplicates(self, session):
+        with patch('src.middlewares.logger') as logger:
+            await get(build_app(session, queries=2, warn_on_duplicates=True))
+
+        logger.warning.assert_called_once()
+        [(shape, times)] = logger.warning.call_args.args[3].items()
+        assert times == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_quiet_within_limits(self, session):
+        with patch('src.middlewares.logger') as logger:
+            await get(build_app(session, queries=1, warn_threshold=2, warn_on_duplicates=True))
+
+        logger.warning.assert_not_called()
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from src.middlewares import RequestLoggingMiddleware
+
+
+def build_app(log_headers: bool) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, log_headers=log_headers)
+
+    @app.get('/ping')
+    async def ping():
+        return {'status': 'ok'}
+
+    return app
+
+async def get(app: FastAPI):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url='http://test') as client:
+        return await client.get('/ping?x=1', headers={'Authorization': 'Bearer secret'})
+
+
+class TestRequestLoggingMiddleware:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_sets_process_time_header(self):
+        response = await get(build_app(log_headers=False))
+
+        assert response.status_code == 200
+        assert response.headers['x-process-time'].startswith('Process time: ')
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_headers_not_logged_by_default(self):
+        with patch('src.middlewares.logger') as logger:
+            await get(build_app(log_headers=False))
+
+        request_call, response_call = logger.info.call_args_list
+        assert request_call.args[1:] == ('GET', '/ping?x=1', '127.0.0.1')
+        assert response_call.args[1] == 200
+        assert 'secret' not in str(logger.info.call_args_list)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_headers_logged_when_enabled(self):
+        with patch('src.middlewares.logger') as logger:
+            await get(build_app(log_headers=True))
+
+        assert 'secret' in str(logger.info.call_args_list[0])
@@ -0,0 +1,208 @@
+import datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+
+from src.notification import OutboxRepository, OutboxWorker, NotificationOutbox, NotificationChannel, OutboxStatus, NotificationStrategy
+from src.notification.models import utcnow
+from src.otp import OTPService
+
+
+@pytest.fixture()
+def session_factory(test_engine, tmp_database):
+    return async_sessionmaker(bind=test_engine, expire_on_commit=False)
+
+class StubStrategy(NotificationStrategy):
+    def __init__(self):
+        self.notify_mock = AsyncMock(return_value=True)
+
+    async def notify(self, recipient: str, subject: str, message: str) -> bool:
+        return await self.notify_mock(recipient, subject, message)
+
+
+@pytest.fixture()
+def email_strategy():
+    return StubStrategy()
+
+@pytest.fixture()
+def outbox_worker(session_factory, email_strategy):
+    return OutboxWorker(
+        session_factory,
+        strategies={NotificationChannel.EMAIL: email_strategy},
+        batch_size=10,
+        max_attempts=3
+    )
+
+async def enqueue(session_factory, count: int = 1) -> None:
+    async with session_factory() as session:
+        for n in range(count):
+            await OutboxRepository(session).enqueue(NotificationChannel.EMAIL, f'user{n}@example.com', 'Subject', 'Body')
+
+async def entries(session_factory) -> list[NotificationOutbox]:
+    async with session_factory() as session:
+        return list(await session.scalars(select(NotificationOutbox).order_by(NotificationOutbox.id)))
+
+
+class TestOutboxRepository:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_add_is_saved_by_caller_commit(self, session_factory):
+        async with session_factory() as session:
+            OutboxRepository(session).add(NotificationChannel.EMAIL, 'a@example.com', 'Subject', 'Body')
+            await session.rollback()
+            OutboxRepository(session).add(NotificationChannel.EMAIL, 'b@example.com', 'Subject', 'Body')
+            await session.commit()
+
+        assert [entry.recipient for entry in await entries(session_factory)] == ['b@example.com']
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_enqueue_wakes_worker(self, session):
+        on_enqueue = Mock()
+        await OutboxRepository(session, on_enqueue=on_enqueue).enqueue(NotificationChannel.EMAIL, 'a@example.com', 'Subject', 'Body')
+
+        on_enqueue.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_claimed_entries_are_leased_until_timeout(self, session_factory):
+        await enqueue(session_factory)
+        now = utcnow()
+
+        async with session_factory() as session:
+            [claimed] = await OutboxRepository(session).claim_batch(10, now, lease=600)
+        async with session_factory() as session:
+            assert await OutboxRepository(session).claim_batch(10, now + datetime.timedelta(seconds=599), lease=600) == []
+            # the worker holding the lease died, the notification is due again
+            [reclaimed] = await OutboxRepository(session).claim_batch(10, now + datetime.timedelta(seconds=601), lease=600)
+
+        assert reclaimed.id == claimed.id
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_purge_removes_old_sent_and_failed(self, session_factory):
+        await enqueue(session_factory, count=4)
+        async with session_factory() as session:
+            old, sent, failed, pending = await session.scalars(select(NotificationOutbox).order_by(NotificationOutbox.id))
+            old.status = OutboxStatus.SENT
+            old.created_at = utcnow() - datetime.timedelta(days=30)
+            sent.status = OutboxStatus.SENT
+            failed.status = OutboxStatus.FAILED
+            failed.created_at = utcnow() - datetime.timedelta(days=30)
+            pending.created_at = utcnow() - datetime.timedelta(days=30)
+            await session.commit()
+
+            deleted = await OutboxRepository(session).purge(utcnow() - datetime.timedelta(days=7))
+
+        assert deleted == 2
+        assert [entry.id for entry in await entries(session_factory)] == [sent.id, pending.id]
+
+
+class TestOutboxWorker:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_delivers_and_marks_sent(self, outbox_worker, session_factory, email_strategy):
+        await enqueue(session_factory)
+
+        assert await outbox_worker.run_once() == 1
+
+        email_strategy.notify_mock.assert_awaited_once_with('user0@example.com', 'Subject', 'Body')
+        [entry] = await entries(session_factory)
+        assert entry.status == OutboxStatus.SENT
+        assert entry.sent_at is not None
+        assert await outbox_worker.run_once() == 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_sensitive_message_is_blanked_after_delivery(self, outbox_worker, session_factory, email_strategy):
+        async with session_factory() as session:
+            await OutboxRepository(session).enqueue(NotificationChannel.EMAIL, 'a@example.com', 'Code', 'Your code is 123456', sensitive=True)
+            await OutboxRepository(session).enqueue(NotificationChannel.EMAIL, 'b@example.com', 'Subject', 'Body')
+
+        await outbox_worker.run_once()
+
+        email_strategy.notify_mock.assert_any_await('a@example.com', 'Code', 'Your code is 123456')
+        assert [entry.message for entry in await entries(session_factory)] == ['', 'Body']
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_delivers_without_open_transaction(self, outbox_worker, session_factory, email_strategy):
+        await enqueue(session_factory, count=2)
+        seen_during_delivery = []
+
+        async def notify(recipient, subject, message):
+            # the lease is committed and no lock is held, another worker can write and finds nothing due
+            seen_during_delivery.append(await outbox_worker.run_once())
+            return True
+
+        email_strategy.notify_mock.side_effect = notify
+
+        assert await outbox_worker.run_once() == 2
+        assert seen_during_delivery == [0, 0]
+        assert {entry.status for entry in await entries(session_factory)} == {OutboxStatus.SENT}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failure_is_retried_with_backoff(self, outbox_worker, session_factory, email_strategy):
+        email_strategy.notify_mock.return_value = False
+        await enqueue(session_factory)
+
+        before = utcnow()
+        await outbox_worker.run_once()
+
+        [entry] = await entries(session_factory)
+        assert entry.status == OutboxStatus.PENDING
+        assert entry.attempts == 1
+        assert before + datetime.timedelta(seconds=1) <= entry.next_attempt_at
+        assert await outbox_worker.run_once() == 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_marks_failed_after_max_attempts(self, outbox_worker, session_factory, email_strategy):
+        email_strategy.notify_mock.side_effect = OSError('connection refused')
+        outbox_worker.backoff = lambda attempts: 0
+        await enqueue(session_factory)
+
+        for _ in range(outbox_worker.max_attempts):
+            await outbox_worker.run_once()
+
+        [entry] = await entries(session_factory)
+        assert entry.status == OutboxStatus.FAILED
+        assert entry.attempts == 3
+        assert entry.last_error == 'connection refused'
+        assert await outbox_worker.run_once() == 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_processes_in_batches(self, outbox_worker, session_factory):
+        await enqueue(session_factory, count=15)
+
+        assert await outbox_worker.run_once() == 10
+        assert await outbox_worker.run_once() == 5
+
+    @pytest.mark.unit
+    def test_backoff_grows_exponentially_up_to_max(self, outbox_worker):
+        assert 1 <= outbox_worker.backoff(1) <= 2
+        assert 4 <= outbox_worker.backoff(3) <= 8
+        assert outbox_worker.backoff(30) <= outbox_worker.backoff_max
+
+
+class TestOTPService:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_send_and_save_otp_queues_email(self):
+        outbox, redis = AsyncMock(), AsyncMock()
+
+        await OTPService(outbox, redis).send_and_save_otp('user@example.com')
+
+        code = redis.set.await_args.kwargs['value']
+        channel, recipient, subject, body = outbox.enqueue.await_args.args
+        assert channel == NotificationChannel.EMAIL
+        assert recipient == 'user@example.com'
+        assert code in body
+        assert outbox.enqueue.await_args.kwargs['sensitive'] is True
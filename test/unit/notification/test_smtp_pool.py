@@ -0,0 +1,160 @@
+import socket
+from email.message import EmailMessage
+from unittest.mock import AsyncMock
+
+import aiosmtplib
+import pytest
+from aiosmtpd.controller import Controller
+
+from src.notification import SMTPPool, EmailNotification
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return '250 OK'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture()
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+@pytest.fixture()
+async def smtp_pool(smtp_server):
+    controller, _ = smtp_server
+    pool = SMTPPool(hostname=controller.hostname, port=controller.port, size=2, start_tls=False)
+    yield pool
+    await pool.close()
+
+def make_email(recipient: str) -> EmailMessage:
+    email = EmailMessage()
+    email['From'] = 'noreply@example.com'
+    email['To'] = recipient
+    email['Subject'] = 'Subject'
+    email.set_content('Body')
+    return email
+
+
+class TestSMTPPool:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_reuses_connection(self, smtp_pool, smtp_server):
+        _, handler = smtp_server
+
+        for n in range(3):
+            await smtp_pool.send(make_email(f'user{n}@example.com'))
+
+        assert len(handler.messages) == 3
+        assert smtp_pool.connections_opened == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_send_many_uses_one_connection(self, smtp_pool, smtp_server):
+        _, handler = smtp_server
+
+        errors = await smtp_pool.send_many(make_email(f'user{n}@example.com') for n in range(5))
+
+        assert errors == [None] * 5
+        assert len(handler.sessions) == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_send_all_spreads_over_pool(self, smtp_pool, smtp_server):
+        _, handler = smtp_server
+
+        errors = await smtp_pool.send_all(make_email(f'user{n}@example.com') for n in range(6))
+
+        assert errors == [None] * 6
+        assert smtp_pool.connections_opened == 2
+        assert sorted(m.rcpt_tos[0] for m in handler.messages) == sorted(f'user{n}@example.com' for n in range(6))
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_reconnects_after_connection_dropped(self, smtp_pool, smtp_server):
+        _, handler = smtp_server
+        await smtp_pool.send(make_email('first@example.com'))
+        smtp_pool._idle[0].client.close()
+
+        await smtp_pool.send(make_email('second@example.com'))
+
+        assert len(handler.messages) == 2
+        assert smtp_pool.connections_opened == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_health_check_replaces_dead_idle_connection(self, smtp_pool, smtp_server):
+        _, handler = smtp_server
+        smtp_pool.health_check_after = 0
+        await smtp_pool.send(make_email('first@example.com'))
+        stale = smtp_pool._idle[0].client
+        stale.noop = AsyncMock(side_effect=aiosmtplib.SMTPServerDisconnected('gone'))
+
+        await smtp_pool.send(make_email('second@example.com'))
+
+        stale.noop.assert_awaited_once()
+        assert len(handler.messages) == 2
+        assert smtp_pool.connections_opened == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_recycles_connection_after_max_messages(self, smtp_pool):
+        smtp_pool.max_messages_per_connection = 2
+
+        await smtp_pool.send_many(make_email(f'user{n}@example.com') for n in range(5))
+
+        assert smtp_pool.connections_opened == 3
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_unreachable_server_reports_error(self):
+        pool = SMTPPool(hostname='127.0.0.1', port=1, start_tls=False, timeout=1)
+
+        [error] = await pool.send_many([make_email('user@example.com')])
+
+        assert isinstance(error, OSError)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_reconnect_fails_rest_of_chunk(self, smtp_pool, smtp_server):
+        controller, handler = smtp_server
+        await smtp_pool.send(make_email('first@example.com'))
+        smtp_pool._idle[0].client.close()
+        smtp_pool.port = free_port()
+        smtp_pool.timeout = 1
+        smtp_pool._connect = AsyncMock(wraps=smtp_pool._connect)
+
+        errors = await smtp_pool.send_many(make_email(f'user{n}@example.com') for n in range(3))
+
+        assert len(errors) == 3
+        assert all(isinstance(error, OSError) for error in errors)
+        assert smtp_pool._connect.await_count == 1
+        assert len(handler.messages) == 1
+
+
+class TestEmailNotification:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_notify_many(self, smtp_pool, smtp_server):
+        _, handler = smtp_server
+        notification = EmailNotification(smtp_pool, sender='noreply@example.com')
+
+        result = await notification.notify_many([('a@example.com', 'Subject', 'Body'), ('b@example.com', 'Subject', 'Body')])
+
+        assert result == [True, True]
+        assert len(handler.messages) == 2
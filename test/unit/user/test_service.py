@@ -4,6 +4,7 @@ from unittest.mock import AsyncMock
 import pytest
 from fastapi import UploadFile
 
+from src.images import StoredImage
 from src.users import EmailOrUsernameAlreadyExists, UserWithIdNotFound, UserWithUsernameNotFound, UserWithEmailNotFound
 
 
@@ -146,7 +147,7 @@ class TestUserService:
         mock_file = AsyncMock(spec=UploadFile)
         mock_file.filename = "avatar.jpg"
         mock_user_repository.get_by_id.return_value = mock_user
-        mock_image_service.save_user_avatar_image.return_value = "http://example.com/avatar.jpg"
+        mock_image_service.save_user_avatar_image.return_value = StoredImage(url="http://example.com/avatar.jpg")
         mock_user_repository.save_user_avatar.return_value = mock_user
 
         result = await user_service.save_user_avatar_image(mock_file, user_id=1)
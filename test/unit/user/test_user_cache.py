@@ -0,0 +1,117 @@
+import datetime
+from unittest.mock import AsyncMock
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from src.tokens import TokenService, TokenType
+from src.users import UserCache, UserRead, UserRepositories, UserUpdate
+from src.users.user_cache import INVALIDATION_CHANNEL
+from src.websocket import WebSocketBroker, InMemoryPubSubBackend
+from src.websocket.manager import ConnectionManager
+from test.unit.cache.cache_fixtures import fake_redis
+
+
+@pytest.fixture()
+def user_read():
+    return UserRead(
+        id=1,
+        username='test',
+        email='test@example.com',
+        is_verified=True,
+        avatar_url=None,
+        created_at=datetime.date.today()
+    )
+
+
+class TestUserCache:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_set_and_get(self, fake_redis, user_read):
+        user_cache = UserCache(fake_redis)
+        await user_cache.set(user_read, await user_cache.version(1))
+
+        assert await user_cache.get(1) == user_read
+        assert 'user:1' in fake_redis.data
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_from_redis_fills_local_tier(self, fake_redis, user_read):
+        writer = UserCache(fake_redis)
+        await writer.set(user_read, await writer.version(1))
+        user_cache = UserCache(fake_redis)
+
+        assert await user_cache.get(1) == user_read
+        fake_redis.data.clear()
+        assert await user_cache.get(1) == user_read
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_invalidate(self, fake_redis, user_read):
+        user_cache = UserCache(fake_redis)
+        await user_cache.set(user_read, await user_cache.version(1))
+
+        await user_cache.invalidate(1)
+
+        assert await user_cache.get(1) is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_load_racing_invalidation_is_not_cached(self, fake_redis, user_read):
+        user_cache = UserCache(fake_redis)
+        version = await user_cache.version(1)
+
+        # the user is updated while the lookup reads the DB
+        await user_cache.invalidate(1)
+        await user_cache.set(user_read, version)
+
+        assert await user_cache.get(1) is None
+        assert await UserCache(fake_redis).get(1) is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_invalidation_clears_other_workers(self, fake_redis, user_read):
+        hub = {}
+        first = WebSocketBroker(ConnectionManager(), InMemoryPubSubBackend(hub))
+        second = WebSocketBroker(ConnectionManager(), InMemoryPubSubBackend(hub))
+        writer = UserCache(fake_redis, publish=first.publish)
+        reader = UserCache(fake_redis, publish=second.publish)
+        first.listen(INVALIDATION_CHANNEL, writer.handle_invalidation)
+        second.listen(INVALIDATION_CHANNEL, reader.handle_invalidation)
+        await first.start()
+        await second.start()
+        await reader.set(user_read, await reader.version(1))
+
+        await writer.invalidate(1)
+
+        assert await reader.get(1) is None
+        await first.stop()
+        await second.stop()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_redis_failure_is_a_miss(self, fake_redis):
+        fake_redis.get = AsyncMock(side_effect=ConnectionError)
+
+        assert await UserCache(fake_redis).get(1) is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_repository_update_invalidates(self, session, user):
+        user_cache = AsyncMock()
+        repository = UserRepositories(session, user_cache=user_cache)
+
+        await repository.update(user, UserUpdate(username='renamed'))
+
+        user_cache.invalidate.assert_awaited_once_with(user.id)
+
+    @pytest.mark.unit
+    def test_user_from_claims(self, user_read):
+        token_service = TokenService(AsyncMock())
+        access_token, _ = token_service.get_access_and_refresh_tokens(user_read)
+        claims = token_service.decode_token_with_token_type_checking(access_token, TokenType.access)
+
+        assert token_service.user_from_claims(claims) == user_read
+        claims.pop('created_at')
+        assert token_service.user_from_claims(claims) is None
@@ -0,0 +1,94 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.websocket import WebSocketBroker, InMemoryPubSubBackend
+from src.websocket.manager import ConnectionManager
+
+
+@pytest.fixture()
+def hub():
+    return {}
+
+@pytest.fixture()
+async def workers(hub):
+    created = []
+
+    async def make(start: bool = True) -> WebSocketBroker:
+        worker = WebSocketBroker(ConnectionManager(), InMemoryPubSubBackend(hub))
+        if start:
+            await worker.start()
+        created.append(worker)
+        return worker
+
+    yield make
+    for worker in created:
+        await worker.stop()
+        await worker.connection_manager.close()
+
+
+class TestWebSocketBroker:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_delivers_to_socket_on_other_worker(self, workers):
+        first, second = await workers(), await workers()
+        websocket = AsyncMock()
+        await second.connect(1, websocket)
+
+        await first.send_to_user(1, {'subject': 'hi'})
+        await second.connection_manager.flush()
+
+        websocket.send_json.assert_awaited_once_with({'subject': 'hi'})
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_disconnect_unsubscribes(self, hub, workers):
+        first, second = await workers(), await workers()
+        websocket = AsyncMock()
+        await second.connect(1, websocket)
+        await second.disconnect(1, websocket)
+
+        await first.send_to_user(1, {'subject': 'hi'})
+
+        websocket.send_json.assert_not_awaited()
+        assert not hub['ws:user:1']
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_not_started_delivers_locally(self, hub, workers):
+        worker = await workers(start=False)
+        websocket = AsyncMock()
+        await worker.connect(1, websocket)
+
+        await worker.send_to_user(1, {'subject': 'hi'})
+        await worker.connection_manager.flush()
+
+        websocket.send_json.assert_awaited_once_with({'subject': 'hi'})
+        assert hub == {}
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_listeners_hear_every_worker(self, workers):
+        first, second = await workers(start=False), await workers(start=False)
+        listener = AsyncMock()
+        first.listen('events', AsyncMock())
+        second.listen('events', listener)
+        await first.start()
+        await second.start()
+
+        await first.publish('events', 'data')
+
+        listener.assert_awaited_once_with('data')
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_not_started_publish_calls_local_listener(self, hub, workers):
+        worker = await workers(start=False)
+        listener = AsyncMock()
+        worker.listen('events', listener)
+
+        await worker.publish('events', 'data')
+
+        listener.assert_awaited_once_with('data')
+        assert hub == {}
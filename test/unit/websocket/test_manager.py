@@ -0,0 +1,140 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.websocket import ConnectionManager, OverflowPolicy
+
+
+def blocked_websocket() -> tuple[AsyncMock, asyncio.Event]:
+    """
+        :return: websocket whose send_json waits until the event is set
+    """
+    release = asyncio.Event()
+    websocket = AsyncMock()
+
+    async def send_json(message):
+        await release.wait()
+
+    websocket.send_json.side_effect = send_json
+    return websocket, release
+
+
+@pytest.fixture()
+async def connection_managers():
+    created = []
+
+    def make(**kwargs) -> ConnectionManager:
+        created.append(ConnectionManager(**kwargs))
+        return created[-1]
+
+    yield make
+    for manager in created:
+        await manager.close()
+
+
+class TestConnectionManager:
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_sends_to_every_socket_of_user(self, connection_managers):
+        manager = connection_managers()
+        phone, browser = AsyncMock(), AsyncMock()
+        await manager.connect(1, phone)
+        await manager.connect(1, browser)
+
+        await manager.send_to_user(1, {'subject': 'hi'})
+        await manager.flush()
+
+        phone.send_json.assert_awaited_once_with({'subject': 'hi'})
+        browser.send_json.assert_awaited_once_with({'subject': 'hi'})
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_disconnect_keeps_other_sockets(self, connection_managers):
+        manager = connection_managers()
+        phone, browser = AsyncMock(), AsyncMock()
+        await manager.connect(1, phone)
+        await manager.connect(1, browser)
+
+        await manager.disconnect(1, phone)
+
+        assert manager.is_connected(1)
+        await manager.disconnect(1, browser)
+        assert not manager.is_connected(1)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_slow_socket_does_not_block_sender(self, connection_managers):
+        manager = connection_managers()
+        slow, release = blocked_websocket()
+        fast = AsyncMock()
+        await manager.connect(1, slow)
+        await manager.connect(1, fast)
+
+        await asyncio.wait_for(manager.send_to_user(1, {'n': 1}), timeout=1)
+        await manager.connections(1)[1].join()
+
+        fast.send_json.assert_awaited_once_with({'n': 1})
+        release.set()
+        await manager.flush()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_latest_messages(self, connection_managers):
+        manager = connection_managers(queue_size=2, overflow_policy=OverflowPolicy.drop_oldest)
+        websocket, release = blocked_websocket()
+        await manager.connect(1, websocket)
+
+        for n in range(5):
+            await manager.send_to_user(1, {'n': n})
+            await asyncio.sleep(0)
+
+        assert manager.stats().max_depth == 2
+        assert manager.stats().dropped == 2
+        release.set()
+        await manager.flush()
+        assert [c.args[0]['n'] for c in websocket.send_json.await_args_list] == [0, 3, 4]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_drop_newest_keeps_queued_messages(self, connection_managers):
+        manager = connection_managers(queue_size=1, overflow_policy=OverflowPolicy.drop_newest)
+        websocket, release = blocked_websocket()
+        await manager.connect(1, websocket)
+
+        for n in range(3):
+            await manager.send_to_user(1, {'n': n})
+            await asyncio.sleep(0)
+
+        release.set()
+        await manager.flush()
+        assert [c.args[0]['n'] for c in websocket.send_json.await_args_list] == [0, 1]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_closes_slow_socket(self, connection_managers):
+        manager = connection_managers(queue_size=1, overflow_policy=OverflowPolicy.disconnect)
+        websocket, release = blocked_websocket()
+        await manager.connect(1, websocket)
+
+        for n in range(3):
+            await manager.send_to_user(1, {'n': n})
+            await asyncio.sleep(0)
+
+        assert not manager.is_connected(1)
+        websocket.close.assert_awaited_once_with(code=1013)
+        assert manager.stats().disconnected == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_send_removes_connection(self, connection_managers):
+        manager = connection_managers()
+        websocket = AsyncMock()
+        websocket.send_json.side_effect = RuntimeError('closed')
+        await manager.connect(1, websocket)
+
+        await manager.send_to_user(1, {'n': 1})
+        await asyncio.sleep(0)
+
+        assert not manager.is_connected(1)